@@ -0,0 +1,79 @@
+"""
+Times the branching step of selector optimization on random DAGs: the
+`networkx.dag_longest_path` loop it replaced against LongestPathDecomposition.
+
+    python -m benchmarks.bench_branching 1000 10000 50000
+
+The networkx loop is quadratic, so it is skipped above --reference-limit nodes.
+"""
+import argparse
+import random
+import time
+
+import networkx
+
+from jobby.branching import LongestPathDecomposition
+
+
+def random_dag(nodes: int, seed: int, max_parents: int = 3) -> networkx.DiGraph:
+    generator = random.Random(seed)
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(range(nodes))
+    for node in range(1, nodes):
+        count = min(node, generator.randint(0, max_parents))
+        for parent in generator.sample(range(max(0, node - 200), node), count):
+            graph.add_edge(parent, node)
+    return graph.copy()
+
+
+def networkx_decomposition(graph: networkx.DiGraph) -> list:
+    graph = graph.copy()
+    paths = []
+    while len(graph) > 2:
+        path = networkx.dag_longest_path(graph)
+        paths.append(path)
+        graph.remove_nodes_from(path)
+    return paths
+
+
+def decomposition(graph: networkx.DiGraph) -> list:
+    branches = LongestPathDecomposition(graph.copy())
+    paths = []
+    while len(branches) > 2:
+        path = branches.longest_path()
+        paths.append(path)
+        branches.remove(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000])
+    parser.add_argument("--reference-limit", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        graph = random_dag(size, args.seed)
+
+        start = time.perf_counter()
+        paths = decomposition(graph)
+        elapsed = time.perf_counter() - start
+
+        if size <= args.reference_limit:
+            start = time.perf_counter()
+            reference = networkx_decomposition(graph)
+            reference_elapsed = f"{time.perf_counter() - start:.2f}s"
+            identical = paths == reference
+        else:
+            reference_elapsed, identical = "skipped", "-"
+
+        print(
+            f"{size} nodes: networkx {reference_elapsed}, "
+            f"decomposition {elapsed:.2f}s, {len(paths)} paths, "
+            f"identical: {identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
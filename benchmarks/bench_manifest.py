@@ -0,0 +1,100 @@
+"""
+Times loading a manifest and measures its peak memory: the pydantic nodes
+jobby used to build from `json.load` against the streaming `Manifest.load`.
+
+    python -m benchmarks.bench_manifest --models 20000
+    python -m benchmarks.bench_manifest --path target/manifest.json
+
+Without --path, a synthetic manifest is written to a temporary file. Each
+loader runs in its own process so neither sees the other's allocations.
+"""
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from dbt.node_types import NodeType
+from pydantic import BaseModel, Field
+
+from jobby.types.manifest import Manifest
+from tests.manifests import make_manifest
+
+
+class BaselineConfig(BaseModel):
+    enabled: bool
+
+
+class BaselineNode(BaseModel):
+    """The pydantic GenericNode that Manifest.load replaced."""
+
+    name: str
+    unique_id: str
+    fqn: List[str]
+    config: Optional[BaselineConfig]
+    depends_on: Optional[Dict] = Field(default_factory=dict)
+    empty: bool = False
+    tags: Set[str]
+    resource_type: NodeType
+    package_name: str
+    source_name: Optional[str]
+    path: str
+    root_path: str
+    original_file_path: str
+
+
+def load_baseline(path: str) -> int:
+    with open(path) as file:
+        data = json.load(file)
+    sections = [
+        {key: BaselineNode(**value) for key, value in data[name].items()}
+        for name in ("sources", "nodes", "exposures", "metrics")
+    ]
+    return sum(len(section) for section in sections)
+
+
+def load_streaming(path: str) -> int:
+    manifest = Manifest.load(path)
+    return sum(1 for _ in manifest.all_nodes())
+
+
+def measure(loader, path: str, results) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = loader(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    results.put((count, elapsed, peak))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path")
+    parser.add_argument("--models", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.path
+        if path is None:
+            path = str(Path(directory) / "manifest.json")
+            manifest = make_manifest(models=args.models, sources=args.models // 20)
+            Path(path).write_text(json.dumps(manifest))
+        size = Path(path).stat().st_size / 1e6
+        print(f"{path}: {size:.0f} MB")
+
+        for name, loader in [("pydantic", load_baseline), ("stream", load_streaming)]:
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=measure, args=(loader, path, results)
+            )
+            process.start()
+            count, elapsed, peak = results.get()
+            process.join()
+            print(f"{name}: {count} nodes, {elapsed:.2f}s, peak {peak / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
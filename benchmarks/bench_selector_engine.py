@@ -0,0 +1,62 @@
+"""
+Times selector evaluation through dbt against the native SelectorEngine, on a
+synthetic manifest, and checks that both select the same models.
+
+    python -m benchmarks.bench_selector_engine --models 20000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from jobby import Jobby
+from jobby.selector_engine import SelectorEngine
+from tests.manifests import make_manifest, write_manifest
+
+
+def selections(names, count, seed):
+    generator = random.Random(seed)
+    forms = ["+{}", "{}+", "+{}+", "@{}", "2+{}", "{}+1"]
+    output = [
+        [generator.choice(forms).format(generator.choice(names))] for _ in range(count)
+    ]
+    return output + [["tag:daily"], ["path:models/staging"], ["source:src1+"], None]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=20000)
+    parser.add_argument("--selections", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = make_manifest(models=args.models, sources=args.models // 20)
+        path = write_manifest(Path(directory) / "manifest.json", manifest)
+        jobby = Jobby(1, "key", manifest_path=path, use_cache=False)
+
+    start = time.perf_counter()
+    engine = SelectorEngine(jobby.manifest)
+    print(f"engine build: {time.perf_counter() - start:.2f}s")
+
+    names = [f"m{i}" for i in range(args.models)]
+    cases = selections(names, args.selections, args.seed)
+    results = {}
+    for name, evaluate in [
+        ("dbt", jobby._evaluate_selector_strings),
+        ("native", engine.select),
+    ]:
+        start = time.perf_counter()
+        results[name] = [evaluate(select, None) for select in cases]
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed:.2f}s for {len(cases)} selections")
+
+    print("identical:", results["dbt"] == results["native"])
+
+
+if __name__ == "__main__":
+    main()
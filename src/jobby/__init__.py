@@ -1,12 +1,11 @@
 import copy
-import json
 import re
 import os
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Optional, Set, List, Tuple, Dict, Iterator
+from typing import Optional, Set, List, Tuple, Dict, Iterator, Callable, Iterable, Union
 
 import dbt.flags
+import networkx
 from dbt.compilation import Linker, Compiler
 from dbt.graph import UniqueId, ResourceTypeSelector, parse_difference, Graph
 from dbt.graph.selector_methods import SelectorMethod, MethodManager, MethodName
@@ -14,11 +13,47 @@ from dbt.graph.selector_spec import IndirectSelection, SelectionSpec
 from dbt.node_types import NodeType
 from loguru import logger
 
+from jobby.cache import ArtifactCache
+from jobby.checkpoints import (
+    Checkpoint,
+    CheckpointMapping,
+    CheckpointStore,
+    StabilityResult,
+    default_checkpoint_directory,
+)
 from jobby.dbt_cloud import DBTCloud
-from jobby.selector_generator import SelectorGenerator
+from jobby.membership import DeduplicationPlan, ImpactedJobs, MembershipIndex
+from jobby.metrics import MetricsCollector, NullMetrics
+from jobby.operations import job_dependency_graph
+from jobby.parallel import parallel_map
+from jobby.partitioner import JobPartitioner, PartitionPlan
+from jobby.reachability import ReachabilityIndex
+from jobby.refresh import (
+    RefreshReport,
+    SelectionInvalidator,
+    apply_diff,
+    diff_manifests,
+    reach,
+)
+from jobby.runtime import (
+    RuntimeEstimate,
+    combine_timings,
+    estimate_runtime,
+    read_run_results,
+)
+from jobby.selector_cache import (
+    BatchResolutionStats,
+    SelectorCache,
+    key_atoms,
+    selector_key,
+)
+from jobby.selector_engine import SelectorEngine
+from jobby.selector_generator import SelectorFailure, SelectorGenerator
+from jobby.simulation import SimulationSession
 from jobby.types.job import Job
-from jobby.types.manifest import Manifest
+from jobby.types.manifest import GenericNode, Manifest
 from jobby.types.model import Model
+from jobby.verification import SelectorVerifier
 
 
 class RelativePathSelectorMethod(SelectorMethod):
@@ -26,24 +61,40 @@ class RelativePathSelectorMethod(SelectorMethod):
         self, included_nodes: Set[UniqueId], selector: str
     ) -> Iterator[UniqueId]:
         """Yields nodes from included that match the given path."""
-        roots = {Path(node.root_path) for _, node in self.all_nodes(included_nodes)}
-        paths = set(p.relative_to(root) for root in roots for p in root.glob(selector))
-        for node, real_node in self.all_nodes(included_nodes):
-            if Path(real_node.root_path) not in roots:
-                continue
-            ofp = Path(real_node.original_file_path)
-            if ofp in paths:
-                yield node
-            elif any(parent in paths for parent in ofp.parents):
-                yield node
+        for unique_id in self.manifest.path_index.search(selector):
+            if unique_id in included_nodes:
+                yield unique_id
 
 
 # Monkeypatch!
 MethodManager.SELECTOR_METHODS[MethodName.Path] = RelativePathSelectorMethod
 
+
+def _resolve_atom(
+    jobby: "Jobby", atom: Optional[str]
+) -> Union[Set[UniqueId], Exception]:
+    """Evaluate one selector atom. Errors are returned for the caller to report."""
+    try:
+        return jobby._evaluate_selector_strings(None if atom is None else [atom], [])
+    except Exception as e:
+        return e
+
+
+def _generate_job_selector(
+    jobby: "Jobby", item: Tuple[Job, bool]
+) -> Union[Job, SelectorFailure]:
+    """Generate a selector for one job. Errors are summarized for the caller."""
+    job, optimize = item
+    try:
+        return jobby.generate_selector(job, optimize=optimize)
+    except Exception as e:
+        return SelectorFailure.from_exception(job.job_id, e)
+
+
 # Environment Variables
 dbt_cloud_base_url = os.getenv("DBT_CLOUD_BASE_URL", default="cloud.getdbt.com")
 
+
 @dataclass
 class MockConfig:
     target_path = "target"
@@ -58,42 +109,143 @@ class Jobby:
         dbt_cloud_base_url: str = dbt_cloud_base_url,
         manifest_path: Optional[str] = None,
         environemnt_id: Optional[int] = None,
+        use_cache: bool = True,
+        artifact_cache: Optional[ArtifactCache] = None,
+        native_selectors: bool = False,
+        metrics: Optional[MetricsCollector] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
     ):
 
-        self.dbt_cloud_client = DBTCloud(account_id, api_key, dbt_cloud_base_url)
+        self.metrics = metrics or NullMetrics()
+        self.artifact_cache: Optional[ArtifactCache] = (
+            (artifact_cache or ArtifactCache()) if use_cache else None
+        )
+        self.dbt_cloud_client = DBTCloud(
+            account_id, api_key, dbt_cloud_base_url, metrics=self.metrics
+        )
         self.environment_id = environemnt_id
+        self._manifest_path = manifest_path
+        self._manifest_run_id: Optional[int] = None
 
         if manifest_path:
-            manifest_dictionary = json.load(open(manifest_path))
+            self.manifest, self.graph = self._load_manifest_and_graph(
+                lambda: ArtifactCache.key_for_file(manifest_path),
+                lambda: Manifest.load(manifest_path),
+            )
         else:
             if environemnt_id is None:
                 raise Exception(
                     "If a manfest path is not provided, then an environment_id must be provided."
                 )
-            manifest_dictionary = self.dbt_cloud_client.get_latest_manifest(
-                environemnt_id
+            # Start from the last known good run, unless a newer run succeeded.
+            run_id = self._read_manifest_run_id()
+            run = self.dbt_cloud_client.get_newer_run(environemnt_id, run_id)
+            if run is not None:
+                run_id = run["id"]
+            self._manifest_run_id = run_id
+            self.manifest, self.graph = self._load_manifest_and_graph(
+                lambda: ArtifactCache.key_for_run(account_id, run_id),
+                lambda: Manifest.load(
+                    self.dbt_cloud_client.get_artifact(run_id, "manifest.json")
+                ),
             )
-
-        self.manifest = Manifest(manifest_dictionary)
-
-        # Compile a graph
-
-        self.graph: Graph = self._compile_graph(self.manifest)
+            self._save_manifest_run_id()
 
         self.node_mapping = {
             unique_id: node.name for unique_id, node in self.manifest.nodes.items()
         }
         self.model_mapping = {value: key for key, value in self.node_mapping.items()}
+        self.selector_engine: Optional[SelectorEngine] = (
+            SelectorEngine(self.manifest) if native_selectors else None
+        )
+        self.selector_cache = SelectorCache(self._evaluate_selector_strings)
         self.selector_generator = SelectorGenerator(
             manifest=self.manifest,
             graph=self.graph,
             selector_evaluator=self.get_models_for_selector_strings,
+            metrics=self.metrics,
         )
+        self._build_indexes()
 
-        self.checkpoints: Dict[str, Set[UniqueId]] = {}
+        self.checkpoint_store = checkpoint_store or CheckpointStore(
+            self.artifact_cache.directory / "checkpoints"
+            if self.artifact_cache is not None
+            else default_checkpoint_directory
+        )
+        self._run_timings: Dict[int, Dict[UniqueId, float]] = {}
+        self._membership: Optional[MembershipIndex] = None
 
         dbt.flags.INDIRECT_SELECTION = IndirectSelection.Eager
 
+    def _build_indexes(self) -> None:
+        """Build the reachability index and selector verifier for the graph."""
+        with self.metrics.phase("indexes.build"):
+            self.reachability = ReachabilityIndex(
+                self.graph.graph, self.manifest.node_index
+            )
+            self.selector_generator.verifier = SelectorVerifier(
+                self.manifest,
+                self.graph,
+                self.reachability,
+                fallback=self.get_models_for_selector_strings,
+            )
+            self.selector_generator.clear_foundation()
+
+    def _load_manifest_and_graph(
+        self,
+        get_cache_key: Callable[[], str],
+        load_manifest: Callable[[], Manifest],
+    ) -> Tuple[Manifest, Graph]:
+        """
+        Load a manifest and compile its graph, using the artifact cache if enabled.
+        """
+        if self.artifact_cache is None:
+            return self._load_and_compile(load_manifest)
+
+        cache_key = get_cache_key()
+        with self.metrics.phase("cache.read"):
+            cached = self.artifact_cache.get(cache_key)
+        if cached is not None:
+            manifest, digraph = cached
+            return manifest, Graph(digraph)
+
+        manifest, graph = self._load_and_compile(load_manifest)
+        with self.metrics.phase("cache.write"):
+            self.artifact_cache.put(cache_key, manifest, graph.graph)
+
+        return manifest, graph
+
+    def _read_manifest_run_id(self) -> Optional[int]:
+        """Return the environment's last known good run, saved by any process."""
+        if self.artifact_cache is None:
+            return None
+        return self.artifact_cache.get_run_id(
+            ArtifactCache.key_for_environment(
+                self.dbt_cloud_client.account_id, self.environment_id
+            )
+        )
+
+    def _save_manifest_run_id(self) -> None:
+        """Save the run the manifest was loaded from, for later processes."""
+        if self.artifact_cache is None or self._manifest_run_id is None:
+            return
+        self.artifact_cache.put_run_id(
+            ArtifactCache.key_for_environment(
+                self.dbt_cloud_client.account_id, self.environment_id
+            ),
+            self._manifest_run_id,
+        )
+
+    def _load_and_compile(
+        self, load_manifest: Callable[[], Manifest]
+    ) -> Tuple[Manifest, Graph]:
+        with self.metrics.phase("manifest.load") as phase:
+            manifest = load_manifest()
+            phase.items = len(manifest.nodes)
+        with self.metrics.phase("graph.compile", items=len(manifest.nodes)):
+            graph = self._compile_graph(manifest)
+        return manifest, graph
+
     @staticmethod
     def _compile_graph(manifest: Manifest):
         """Use the internal dbt Compiler to link a graph together from a manifest."""
@@ -102,12 +254,203 @@ class Jobby:
         compiler.link_graph(_linker, manifest, add_test_edges=False)
         return Graph(_linker.graph)
 
+    def refresh(
+        self,
+        manifest_path: Optional[str] = None,
+        jobs: Optional[Iterable[Job]] = None,
+    ) -> RefreshReport:
+        """
+        Update the manifest, graph and jobs to the newest manifest, in place.
+
+        The newest manifest is read from `manifest_path`, or the path this
+        Jobby was created with, or otherwise the latest run in the environment.
+        Its nodes and edges are diffed against the loaded manifest and the
+        graph is patched rather than recompiled. Only the cached selector atoms
+        that the changed nodes could affect are evaluated again, and only jobs
+        using those atoms or containing changed nodes are resolved again. Jobs
+        default to those last returned by get_all_jobs. Models added to a job by
+        hand, rather than selected by its selectors, are kept while they remain
+        in the manifest.
+        """
+        manifest_path = manifest_path or self._manifest_path
+        run_id = None
+        if manifest_path is not None:
+            cache_key = ArtifactCache.key_for_file(manifest_path)
+        else:
+            run = self.dbt_cloud_client.get_newer_run(
+                self.environment_id, self._manifest_run_id
+            )
+            if run is None:
+                logger.info(
+                    "The manifest from run {run_id} is current",
+                    run_id=self._manifest_run_id,
+                )
+                return RefreshReport(set(), set(), set(), set(), set())
+            run_id = run["id"]
+            cache_key = ArtifactCache.key_for_run(
+                self.dbt_cloud_client.account_id, run_id
+            )
+
+        with self.metrics.phase("cache.read"):
+            cached = self.artifact_cache.get(cache_key) if self.artifact_cache else None
+        if cached is not None:
+            new_manifest = cached[0]
+        else:
+            with self.metrics.phase("manifest.load"):
+                if manifest_path is not None:
+                    new_manifest = Manifest.load(manifest_path)
+                else:
+                    new_manifest = Manifest.load(
+                        self.dbt_cloud_client.get_artifact(run_id, "manifest.json")
+                    )
+
+        graph = self.graph.graph
+        with self.metrics.phase("graph.patch") as phase:
+            diff = diff_manifests(self.manifest, new_manifest, graph)
+            changed = diff.changed
+            phase.items = len(changed)
+            old_nodes = {
+                unique_id: node
+                for unique_id, node in self.manifest.all_nodes()
+                if unique_id in changed
+            }
+            upstream = reach(graph, changed, upstream=True)
+            downstream = reach(graph, changed, upstream=False)
+
+            # Models that jobs hold without selecting them, found with the
+            # old graph, before it is patched.
+            if jobs is None:
+                jobs = self._membership.jobs.values() if self._membership else []
+            jobs = list(jobs)
+            manual_models: Dict[int, Set[UniqueId]] = {}
+            for job in jobs if len(changed) > 0 else []:
+                selected: Set[UniqueId] = set()
+                for select, exclude in job.selectors:
+                    selected |= self.get_models_for_selector_strings(select, exclude)
+                if not selected.issuperset(job.models):
+                    manual_models[job.job_id] = set(job.models) - selected
+
+            apply_diff(graph, diff)
+        self.manifest.update(new_manifest)
+        self._manifest_path = manifest_path
+        self._manifest_run_id = run_id
+        if self.artifact_cache is not None and cached is None:
+            self.artifact_cache.put(cache_key, new_manifest, graph)
+        self._save_manifest_run_id()
+
+        report = RefreshReport(**vars(diff))
+        if len(changed) == 0:
+            logger.info("The new manifest has no changes")
+            return report
+
+        upstream |= reach(graph, changed, upstream=True)
+        downstream |= reach(graph, changed, upstream=False)
+
+        new_nodes = dict(self.manifest.all_nodes())
+
+        def versions(unique_ids: Iterable[UniqueId]) -> List[GenericNode]:
+            """The old and new versions of some nodes, where they exist."""
+            return [
+                node
+                for unique_id in unique_ids
+                for node in (old_nodes.get(unique_id), new_nodes.get(unique_id))
+                if node is not None
+            ]
+
+        invalidator = SelectionInvalidator(
+            changed=versions(changed),
+            upstream=versions(upstream),
+            downstream=versions(downstream),
+        )
+
+        for unique_id in diff.removed:
+            self.node_mapping.pop(unique_id, None)
+        for unique_id in diff.added | diff.modified:
+            if unique_id in self.manifest.nodes:
+                self.node_mapping[unique_id] = self.manifest.nodes[unique_id].name
+        self.model_mapping = {value: key for key, value in self.node_mapping.items()}
+
+        if self.selector_engine is not None:
+            self.selector_engine = SelectorEngine(self.manifest)
+        self._build_indexes()
+
+        stale = {
+            atom for atom in self.selector_cache.atoms() if invalidator.affects(atom)
+        }
+        self.selector_cache.invalidate(stale)
+        report.invalidated_atoms = len(stale)
+
+        affected = [
+            job
+            for job in jobs
+            if any(
+                stale.intersection(key_atoms(selector_key(select, exclude)))
+                for select, exclude in job.selectors
+            )
+            or not changed.isdisjoint(job.models)
+        ]
+
+        previous_models = {job.job_id: set(job.models) for job in affected}
+        for job in affected:
+            job.models = {}
+        self.resolve_jobs(affected)
+        for job in affected:
+            kept = manual_models.get(job.job_id, set()) & self.manifest.nodes.keys()
+            job.models.update(self._build_models(sorted(kept)))
+
+        for job in affected:
+            models = set(job.models)
+            added = models - previous_models[job.job_id]
+            removed = previous_models[job.job_id] - models
+            if added or removed:
+                report.jobs[job.job_id] = (added, removed)
+
+        logger.info(
+            "Refreshed the manifest: {added} nodes added, {removed} removed and "
+            "{modified} modified. Re-evaluated {atoms} selector atoms and "
+            "{jobs} jobs, of which {changed} changed",
+            added=len(diff.added),
+            removed=len(diff.removed),
+            modified=len(diff.modified),
+            atoms=len(stale),
+            jobs=len(affected),
+            changed=len(report.jobs),
+        )
+
+        return report
+
+    def metrics_report(self) -> Dict:
+        """
+        Return the recorded metrics, and the selector cache's statistics.
+
+        The cache's atom_misses is the number of selector atoms evaluated,
+        including those evaluated by worker processes.
+        """
+        report = self.metrics.report()
+        report["selector_cache"] = self.selector_cache.stats.as_dict()
+        return report
+
     def get_models_for_selector_strings(
         self, select: List[str], exclude: List[str]
     ) -> Set[UniqueId]:
         """Get a set of models given a select and exclude statement"""
-        spec = parse_difference(select, exclude)
-        return self.get_models_for_selector_specification(specification=spec)
+        self.selector_cache.bind(self.manifest, self.graph)
+        return self.selector_cache.evaluate(select, exclude)
+
+    def _evaluate_selector_strings(
+        self, select: Optional[List[str]], exclude: Optional[List[str]]
+    ) -> Set[UniqueId]:
+        """
+        Evaluate a select and exclude statement, bypassing the cache.
+
+        Selection uses the native SelectorEngine when enabled, and dbt otherwise.
+        """
+        with self.metrics.phase("selectors.evaluate"):
+            if self.selector_engine is not None:
+                return self.selector_engine.select(select, exclude)
+
+            spec = parse_difference(select, exclude)
+            return self.get_models_for_selector_specification(specification=spec)
 
     def get_models_for_selector_specification(
         self, specification: SelectionSpec
@@ -123,16 +466,24 @@ class Jobby:
 
         return selector.get_selected(spec=specification)
 
-    def get_all_jobs(self) -> Dict[int, Job]:
-        """Get a dictionary of all jobs"""
+    def get_all_jobs(self, workers: Optional[int] = 1) -> Dict[int, Job]:
+        """
+        Get a dictionary of all jobs.
+
+        Selectors are resolved across `workers` processes. Workers are forked, so
+        they share the compiled graph with this process instead of receiving a
+        pickled copy. Pass None to use one worker per CPU.
+        """
         if self.environment_id is None:
             raise Exception(
                 "All jobs can only be returned if an environment_id has been provided."
             )
 
-        dbt_cloud_jobs = self.dbt_cloud_client.get_jobs(
-            environment_id=self.environment_id
-        )
+        with self.metrics.phase("jobs.fetch") as phase:
+            dbt_cloud_jobs = self.dbt_cloud_client.get_jobs(
+                environment_id=self.environment_id
+            )
+            phase.items = len(dbt_cloud_jobs)
 
         jobs: Dict[int, Job] = {}
 
@@ -146,12 +497,17 @@ class Jobby:
 
             for step in job.steps:
 
-                matches = re.search("(--select|-s|--models|-m|--model) ([@+a-zA-Z0-9_ :,]*)", step)
+                matches = re.search(
+                    "(--select|-s|--models|-m|--model) ([@+a-zA-Z0-9_ :,]*)", step
+                )
                 select = None
                 if matches:
                     select = matches.groups()[1].rstrip().split(" ")
                     if any(["state:" in element for element in select]):
-                        logger.info("Job ID {job_id} contains a state selector, skipping!",job_id=job.job_id)
+                        logger.info(
+                            "Job ID {job_id} contains a state selector, skipping!",
+                            job_id=job.job_id,
+                        )
                         continue
 
                 matches = re.search("(--exclude|-e) ([@+a-zA-Z0-9_ :,]*)", step)
@@ -161,26 +517,91 @@ class Jobby:
 
                 job.selectors.append((select, exclude))
 
-                try:
-                    models = self.get_models_for_selector_strings(select, exclude)
-                except Exception as e:
-                    logger.error("Failed to initialize selector for selection string {select} in job {job_id}", select=select, job_id=job.job_id)
-                    raise e
-                job.models.update(
-                    {
-                        model: Model(
-                            unique_id=model,
-                            name=self.manifest.nodes[model].name,
-                            depends_on=self.manifest.nodes[model].depends_on_nodes,
-                        )
-                        for model in models
-                    }
-                )
-
             jobs[dbt_cloud_job["id"]] = job
 
+        self.resolve_jobs(jobs.values(), workers=workers)
+        self._membership = MembershipIndex(jobs.values())
+
         return jobs
 
+    def resolve_jobs(
+        self, jobs: Iterable[Job], workers: Optional[int] = 1
+    ) -> BatchResolutionStats:
+        """
+        Populate the models of many jobs from their selectors.
+
+        Every (select, exclude) pair across all jobs and steps is normalized and
+        de-duplicated, each distinct selector atom is evaluated once, and the
+        results are fanned back out to the jobs. Atoms are evaluated across
+        `workers` forked processes.
+        """
+        self.selector_cache.bind(self.manifest, self.graph)
+
+        jobs = list(jobs)
+        selections = [
+            (job, select, exclude, selector_key(select, exclude))
+            for job in jobs
+            for select, exclude in job.selectors
+        ]
+        keys = list(dict.fromkeys(key for _, _, _, key in selections))
+        atoms = self.selector_cache.missing_atoms(keys)
+
+        with self.metrics.phase("selectors.resolve", items=len(atoms)):
+            results = parallel_map(_resolve_atom, self, atoms, workers=workers)
+
+        for atom, models in zip(atoms, results):
+            if isinstance(models, Exception):
+                job, select = next(
+                    (job, select)
+                    for job, select, _, key in selections
+                    if atom in key_atoms(key)
+                )
+                logger.error(
+                    "Failed to initialize selector for selection string {select} "
+                    "in job {job_id}",
+                    select=select,
+                    job_id=job.job_id,
+                )
+                raise models
+
+            self.selector_cache.store_atom(atom, models)
+
+        stats = BatchResolutionStats(
+            selections=len(selections),
+            unique_selections=len(keys),
+            unique_atoms=len({atom for key in keys for atom in key_atoms(key)}),
+            evaluations=len(atoms),
+        )
+
+        for job, select, exclude, _ in selections:
+            models = self.get_models_for_selector_strings(select, exclude)
+            # Sort so that model order does not depend on which process
+            # resolved the selection.
+            job.models.update(self._build_models(sorted(models)))
+
+        logger.info(
+            "Resolved {selections} selections from {jobs} jobs with {evaluations} "
+            "selector evaluations ({saved} saved)",
+            selections=stats.selections,
+            jobs=len(jobs),
+            evaluations=stats.evaluations,
+            saved=stats.saved,
+        )
+
+        return stats
+
+    def _build_models(self, unique_ids: Iterable[UniqueId]) -> Dict[UniqueId, Model]:
+        """Create Models for a set of unique_ids"""
+        # The manifest has already been parsed, so skip pydantic validation.
+        return {
+            unique_id: Model.construct(
+                unique_id=unique_id,
+                name=self.manifest.nodes[unique_id].name,
+                depends_on=set(self.manifest.nodes[unique_id].depends_on_nodes),
+            )
+            for unique_id in unique_ids
+        }
+
     def get_job(self, job_id: int):
         """Generate a Job based on a dbt Cloud job."""
 
@@ -194,7 +615,9 @@ class Jobby:
 
         for step in job.steps:
 
-            matches = re.search("(--select|-s|--models|-m|--model) ([@+a-zA-Z0-9_ :,]*)", step)
+            matches = re.search(
+                "(--select|-s|--models|-m|--model) ([@+a-zA-Z0-9_ :,]*)", step
+            )
             select = matches.groups()[1].rstrip().split(" ")
 
             matches = re.search("(--exclude|-e) ([@+a-zA-Z0-9_ :,]*)", step)
@@ -204,17 +627,7 @@ class Jobby:
 
             job.selectors.append((select, exclude))
 
-            models = self.get_models_for_selector_strings(select, exclude)
-            job.models.update(
-                {
-                    model: Model(
-                        unique_id=model,
-                        name=self.manifest.nodes[model].name,
-                        depends_on=self.manifest.nodes[model].depends_on_nodes,
-                    )
-                    for model in models
-                }
-            )
+        self.resolve_jobs([job])
 
         return job
 
@@ -236,35 +649,39 @@ class Jobby:
         # Job for any remaining models
 
         for target_job in target_jobs:
-            job_dependencies = target_job.model_dependencies()
-
-            while len(job_dependencies) > 0:
-                dependency = job_dependencies.pop()
+            job_dependencies = target_job.model_dependencies(self.reachability)
+
+            # Everything the target needs that the source job can provide,
+            # following dependencies through the source job's models and
+            # snapshots.
+            dependencies = self.reachability.upstream_within(
+                job_dependencies,
+                source_job.models,
+                expand=lambda unique_id: unique_id.split(".")[0]
+                in ["model", "snapshot"],
+            )
 
-                if dependency in source_job.models:
-                    del source_job.models[dependency]
+            for dependency in dependencies:
+                del source_job.models[dependency]
 
-                    if dependency.split(".")[0] not in ["model", "snapshot"]:
-                        continue
+                if dependency.split(".")[0] not in ["model", "snapshot"]:
+                    continue
 
-                    logger.trace(
-                        "Adding {dependency} from {source} to {target}",
-                        dependency=dependency,
-                        source=source_job.name,
-                        target=target_job.name,
-                    )
+                logger.trace(
+                    "Adding {dependency} from {source} to {target}",
+                    dependency=dependency,
+                    source=source_job.name,
+                    target=target_job.name,
+                )
 
-                    target_job.models[dependency] = Model(
-                        unique_id=dependency,
-                        name=self.node_mapping[dependency],
-                        depends_on=self.graph.select_parents(
-                            set([dependency]), max_depth=1
-                        ),
-                    )
-                    job_dependencies.update(target_job.models[dependency].depends_on)
-                    target_job.selectors.append(
-                        ([self.manifest.get_model(dependency).name], [])
-                    )
+                target_job.models[dependency] = Model(
+                    unique_id=dependency,
+                    name=self.node_mapping[dependency],
+                    depends_on=self.reachability.parents(dependency),
+                )
+                target_job.selectors.append(
+                    ([self.manifest.get_model(dependency).name], [])
+                )
 
         for job in target_jobs:
             logger.debug("Generating new selector for {job}", job=job.name)
@@ -300,28 +717,362 @@ class Jobby:
         source_job.selectors = self.selector_generator.generate(source_job)
         target_job.selectors = self.selector_generator.generate(target_job)
 
-    def generate_selector(self, job: Job, optimize=False) -> Job:
-        """Optimize a Job's selectors and run steps"""
+    def _get_run_timings(self, run_id: int) -> Dict[UniqueId, float]:
+        """Return the model timings of a run, using the artifact cache if enabled."""
+        if run_id in self._run_timings:
+            return self._run_timings[run_id]
+
+        cache_key = ArtifactCache.key_for_run_results(
+            self.dbt_cloud_client.account_id, run_id
+        )
+        timings = (
+            self.artifact_cache.get_timings(cache_key)
+            if self.artifact_cache is not None
+            else None
+        )
+        if timings is None:
+            timings = read_run_results(self.dbt_cloud_client.get_run_results(run_id))
+            if self.artifact_cache is not None:
+                self.artifact_cache.put_timings(cache_key, timings)
+
+        self._run_timings[run_id] = timings
+        return timings
+
+    def get_model_timings(
+        self,
+        job: Optional[Job] = None,
+        run_results_path: Optional[str] = None,
+        runs: int = 5,
+    ) -> Dict[UniqueId, float]:
+        """
+        Return the execution time of each model, in seconds.
+
+        Times are read from a local run_results.json if a path is given.
+        Otherwise they are the median times across the run_results.json files
+        of the job's `runs` most recent successful runs.
+        """
+        if run_results_path is not None:
+            return read_run_results(run_results_path)
+
+        if job is None:
+            raise Exception("A job or a run_results path is required to get timings.")
+
+        recent_runs = self.dbt_cloud_client.get_recent_successful_runs(
+            job.job_id, count=runs
+        )
+        if len(recent_runs) == 0:
+            raise Exception(f"Unable to find a successful run for job {job.job_id}.")
+
+        return combine_timings(
+            [self._get_run_timings(run["id"]) for run in recent_runs]
+        )
+
+    def estimate_runtimes(
+        self,
+        jobs: Iterable[Job],
+        threads: int = 4,
+        runs: int = 5,
+        timings: Optional[Dict[UniqueId, float]] = None,
+    ) -> Dict[int, RuntimeEstimate]:
+        """
+        Estimate the total build time, critical path and parallelism of jobs.
+
+        Each job's model timings and estimate are also stored on the job, as
+        `job.timings` and `job.runtime`. Timings default to those of each job's
+        recent successful runs.
+        """
+        estimates: Dict[int, RuntimeEstimate] = {}
+        for job in jobs:
+            job_timings = timings
+            if job_timings is None:
+                job_timings = self.get_model_timings(job, runs=runs)
+
+            job.timings = {
+                unique_id: job_timings[unique_id]
+                for unique_id in job.models
+                if unique_id in job_timings
+            }
+            job.runtime = estimate_runtime(
+                self.graph.graph, job.models, job_timings, threads=threads
+            )
+            estimates[job.job_id] = job.runtime
+
+            logger.debug(
+                "{job}: {total:.0f}s of models, {critical:.0f}s critical path, "
+                "about {makespan:.0f}s on {threads} threads",
+                job=job.name,
+                total=job.runtime.total_time,
+                critical=job.runtime.critical_path_time,
+                makespan=job.runtime.makespan,
+                threads=threads,
+            )
+
+        return estimates
+
+    def partition_job(
+        self,
+        job: Job,
+        n: int,
+        timings: Optional[Dict[UniqueId, float]] = None,
+        threads: int = 4,
+        cross_edge_penalty: float = 1.0,
+        optimize=True,
+    ) -> PartitionPlan:
+        """
+        Propose a split of a job into at most n jobs that finishes sooner.
+
+        Model times default to those of the job's latest successful run. Each
+        proposed Job has a generated and verified selector. The first keeps the
+        original job_id; the others have no job_id until they are created.
+        """
+        if timings is None:
+            timings = self.get_model_timings(job)
+
+        partitioner = JobPartitioner(
+            self.graph.graph,
+            timings,
+            threads=threads,
+            cross_edge_penalty=cross_edge_penalty,
+        )
+        plan = partitioner.partition(job.models, n)
+
+        for number, models in enumerate(plan.partitions):
+            new_job = Job(
+                job_id=job.job_id if number == 0 else None,
+                name=f"{job.name} ({number + 1}/{len(plan.partitions)})",
+                steps=[],
+                selectors=[
+                    ([self.node_mapping[model] for model in sorted(models)], [])
+                ],
+                models=self._build_models(sorted(models)),
+            )
+            new_job.selectors = self.selector_generator.generate(
+                new_job, optimize=optimize
+            )
+            selector = self.selector_generator.render_selector(new_job.selectors)
+            new_job.steps = [f"dbt build {selector}"]
+            plan.jobs.append(new_job)
+
+        logger.info(
+            "Partitioned {job} into {count} jobs. Estimated makespan {makespan:.1f}s "
+            "with {cross_edges} dependencies between jobs.",
+            job=job.name,
+            count=len(plan.jobs),
+            makespan=plan.makespan,
+            cross_edges=plan.cross_edges,
+        )
+
+        return plan
+
+    def membership(self, jobs: Iterable[Job]) -> MembershipIndex:
+        """Index which jobs build each model, to find models built more than once."""
+        return MembershipIndex(jobs)
+
+    def job_dependency_graph(self, jobs: Iterable[Job]) -> networkx.DiGraph:
+        """
+        Build the graph of dependencies between jobs, from the compiled graph.
+
+        Each edge carries the `models` that one job needs from the other.
+        Use networkx to look for cycles or a topological order of the jobs.
+        """
+        return job_dependency_graph(jobs, self.reachability)
+
+    def impacted_jobs(
+        self,
+        changed_unique_ids: Iterable[UniqueId],
+        jobs: Optional[Iterable[Job]] = None,
+    ) -> ImpactedJobs:
+        """
+        Find the jobs that will rebuild, or read stale data from, changed models.
+
+        Jobs default to those last returned by get_all_jobs. Direct jobs build a
+        changed model, and downstream jobs build one of their descendants.
+        Unique_ids that are not in the graph, such as new models, affect no jobs.
+        """
+        if jobs is not None:
+            membership = MembershipIndex(jobs)
+        elif self._membership is not None:
+            membership = self._membership
+        else:
+            raise Exception("Jobs are required until get_all_jobs has been called.")
+
+        impacted = membership.impacted(changed_unique_ids, self.reachability)
+
+        logger.debug(
+            "{direct} jobs build the changed models, and {downstream} build "
+            "downstream of them",
+            direct=len(impacted.direct),
+            downstream=len(impacted.downstream),
+        )
+
+        return impacted
+
+    def deduplicate_jobs(self, jobs: Iterable[Job], apply=True) -> DeduplicationPlan:
+        """
+        Plan, and by default apply, transfers that leave each model in one job.
+
+        Transfers are applied with transfer_models, so the affected jobs get
+        new selectors.
+        """
+        jobs = {job.job_id: job for job in jobs}
+        membership = MembershipIndex(jobs.values())
+        _, _, order = self.selector_generator.foundation
+        plan = membership.deduplicate(order, self.reachability)
+
+        logger.info(
+            "Deduplicating {count} models with {transfers} transfers",
+            count=len(plan.owners),
+            transfers=len(plan.transfers),
+        )
+
+        if apply:
+            for unique_ids, source_id, target_id in plan.transfers:
+                self.transfer_models(unique_ids, jobs[source_id], jobs[target_id])
+
+        return plan
+
+    def simulate(self, jobs: Iterable[Job]) -> SimulationSession:
+        """Start a what-if simulation over a set of jobs, without modifying them."""
+        return SimulationSession(self, jobs)
+
+    def generate_selector(self, job: Job, optimize=False, cross_check=False) -> Job:
+        """
+        Optimize a Job's selectors and run steps.
+
+        Pass cross_check to confirm the verification of the new selector through
+        dbt's selector evaluation.
+        """
         new_job = copy.deepcopy(job)
-        new_job.selectors = self.selector_generator.generate(new_job, optimize=optimize)
+        with self.metrics.phase("selectors.generate"):
+            new_job.selectors = self.selector_generator.generate(
+                new_job, optimize=optimize, cross_check=cross_check
+            )
         new_job.steps = [
             f"dbt build {self.selector_generator.render_selector(new_job.selectors)}"
         ]
 
         return new_job
 
-    def save_job_checkpoint(self, jobs: List[Job], name: str):
-        """Save a checkpoint of current Job model selection for future validation"""
-        self.checkpoints[name] = {model for job in jobs for model in job.models.keys()}
+    def generate_selectors(
+        self, jobs: Iterable[Job], optimize=True, workers: Optional[int] = 1
+    ) -> Dict[int, Union[Job, SelectorFailure]]:
+        """
+        Optimize the selectors and run steps of many jobs.
+
+        Jobs are processed across `workers` forked processes, which share the
+        graph, manifest and selector cache with this process. Pass None to use
+        one worker per CPU. Returns the new Job for each job_id, or a
+        SelectorFailure describing why it failed, such as a
+        SelectionMismatchException; a failing job does not stop the batch.
+        """
+        jobs = list(jobs)
+
+        if optimize:
+            # Classify foundation nodes once, before the workers are forked.
+            self.selector_generator.foundation
+
+        results = parallel_map(
+            _generate_job_selector,
+            self,
+            [(job, optimize) for job in jobs],
+            workers=workers,
+        )
+
+        failures = 0
+        for job, result in zip(jobs, results):
+            if isinstance(result, SelectorFailure):
+                failures += 1
+                logger.error(
+                    "Failed to generate a selector for job {job_id}: "
+                    "{error_type}: {message}",
+                    job_id=job.job_id,
+                    error_type=result.error_type,
+                    message=result.message,
+                )
+
+        logger.info(
+            "Generated selectors for {succeeded} of {total} jobs",
+            succeeded=len(jobs) - failures,
+            total=len(jobs),
+        )
+
+        return {job.job_id: result for job, result in zip(jobs, results)}
+
+    @property
+    def checkpoints(self) -> CheckpointMapping:
+        """
+        The models of each saved checkpoint, by name, read from the checkpoint
+        store. Assigning a set of models to a name saves a checkpoint of them.
+        """
+        return CheckpointMapping(self.checkpoint_store)
+
+    @checkpoints.setter
+    def checkpoints(self, checkpoints: Dict[str, Set[UniqueId]]) -> None:
+        """Replace every saved checkpoint."""
+        mapping = CheckpointMapping(self.checkpoint_store)
+        mapping.clear()
+        mapping.update(checkpoints)
+
+    def save_job_checkpoint(self, jobs: List[Job], name: str) -> Checkpoint:
+        """
+        Save a checkpoint of current Job model selection for future validation.
+
+        Checkpoints are saved next to the artifact cache by default, so they
+        can be validated from another process.
+        """
+        checkpoint = Checkpoint.create(
+            name, self._job_models(jobs), self._job_digests(jobs)
+        )
+        self.checkpoint_store.save(checkpoint)
+        return checkpoint
+
+    @staticmethod
+    def _job_models(jobs: Iterable[Job]) -> Dict[int, Iterable[UniqueId]]:
+        return {job.job_id: job.models.keys() for job in jobs}
+
+    @staticmethod
+    def _job_digests(jobs: Iterable[Job]) -> Dict[int, str]:
+        return {job.job_id: job.digest() for job in jobs}
+
+    def validate_checkpoints(
+        self, jobs: List[Job], checkpoint_names: Optional[Iterable[str]] = None
+    ) -> Dict[str, StabilityResult]:
+        """
+        Compare current job model selection with many checkpoints at once.
+
+        Checkpoint names default to every saved checkpoint. Unlike
+        validate_selection_stability, differences are returned, not raised.
+        """
+        if checkpoint_names is None:
+            checkpoint_names = self.checkpoint_store.names()
+
+        with self.metrics.phase("checkpoints.validate") as phase:
+            results = self.checkpoint_store.compare_many(
+                checkpoint_names, self._job_models(jobs), self._job_digests(jobs)
+            )
+            phase.items = len(results)
+
+        for result in results.values():
+            if not result.stable:
+                logger.warning(
+                    "The job set differs from checkpoint {name}: {missing} models "
+                    "missing, {added} added, across {jobs} changed jobs",
+                    name=result.name,
+                    missing=len(result.missing),
+                    added=len(result.added),
+                    jobs=len(result.changed_jobs),
+                )
+
+        return results
 
     def validate_selection_stability(
         self, jobs: List[Job], checkpoint_name: str
     ) -> Tuple[Set[UniqueId], Set[UniqueId]]:
         """Validate current job model selection against a checkpoint."""
-        current_models = {model for job in jobs for model in job.models.keys()}
-        original_models = self.checkpoints[checkpoint_name]
-        missing = original_models.difference(current_models)
-        added = current_models.difference(original_models)
+        result = self.checkpoint_store.compare(
+            checkpoint_name, self._job_models(jobs), self._job_digests(jobs)
+        )
+        missing, added = result.missing, result.added
 
         exceptions = []
 
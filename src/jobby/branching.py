@@ -0,0 +1,166 @@
+import heapq
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+import networkx
+
+
+class _Key:
+    """
+    A node's position in `networkx.topological_sort` of the remaining graph.
+
+    networkx sorts a DAG generation by generation. A node's generation is the
+    length of the longest path ending at it, and within a generation nodes are
+    ordered by the position of their last parent in the previous generation,
+    then by their position among that parent's successors. A key is therefore
+    a chain of successor positions leading back to a node's position in the
+    graph. Keys are immutable, and shared between nodes where their chains
+    meet, so comparing two keys only walks back to where they diverge.
+    """
+
+    __slots__ = ("parent", "index", "root")
+
+    def __init__(self, parent: Optional["_Key"], index: int) -> None:
+        self.parent = parent
+        self.index = index
+        self.root: int = index if parent is None else parent.root
+
+    def __lt__(self, other: "_Key") -> bool:
+        if self.root != other.root:
+            return self.root < other.root
+
+        # Keys compared are always of the same generation, so their chains are
+        # the same length. The difference closest to the root decides.
+        less = False
+        this = self
+        while this is not other:
+            if this.index != other.index:
+                less = this.index < other.index
+            this, other = this.parent, other.parent
+        return less
+
+
+class LongestPathDecomposition:
+    """
+    Repeatedly extracts the longest remaining path from a DAG.
+
+    The length of the longest path ending at each node is computed once, in
+    topological order. When nodes are removed, only the nodes downstream of
+    them are revisited, and propagation stops as soon as a node is unchanged.
+    Finding the next longest path is then a heap lookup followed by a walk back
+    along each node's best parent.
+
+    Paths are the ones `networkx.dag_longest_path` returns for the remaining
+    graph. The best parent of a node is its first maximal parent in adjacency
+    order, and ties between paths of equal length go to the end node that
+    comes first in a topological sort of the remaining graph, which each
+    node's `_Key` tracks.
+    """
+
+    def __init__(self, graph: networkx.DiGraph) -> None:
+        self._position: Dict[Hashable, int] = {
+            node: position for position, node in enumerate(graph.nodes)
+        }
+        self._order: Dict[Hashable, int] = {
+            node: position
+            for position, node in enumerate(networkx.topological_sort(graph))
+        }
+        self._parents = {node: list(graph.predecessors(node)) for node in graph}
+        self._children = {node: list(graph.successors(node)) for node in graph}
+        self._child_index = {
+            node: {child: index for index, child in enumerate(children)}
+            for node, children in self._children.items()
+        }
+        self._alive: Set[Hashable] = set(graph.nodes)
+
+        self._length: Dict[Hashable, int] = {}
+        self._previous: Dict[Hashable, Optional[Hashable]] = {}
+        self._key: Dict[Hashable, _Key] = {}
+        self._heap: List = []
+
+        for node in sorted(self._order, key=self._order.__getitem__):
+            self._relax(node)
+            self._push(node)
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    @property
+    def nodes(self) -> Set[Hashable]:
+        return set(self._alive)
+
+    def _push(self, node: Hashable) -> None:
+        key = self._key[node]
+        heapq.heappush(self._heap, (-self._length[node], key, node))
+
+    def _relax(self, node: Hashable) -> bool:
+        """Recompute the longest path ending at node; True if its key changed."""
+        length, previous, last = 0, None, None
+        for parent in self._parents[node]:
+            if parent not in self._alive:
+                continue
+            candidate = self._length[parent] + 1
+            if candidate > length:
+                length, previous, last = candidate, parent, parent
+            elif candidate == length and self._key[last] < self._key[parent]:
+                # The parent networkx reaches last decides the node's key.
+                last = parent
+
+        self._length[node] = length
+        self._previous[node] = previous
+
+        key = self._key.get(node)
+        if last is None:
+            if key is None or key.parent is not None:
+                self._key[node] = _Key(None, self._position[node])
+                return True
+            return False
+
+        parent_key = self._key[last]
+        index = self._child_index[last][node]
+        if key is None or key.parent is not parent_key or key.index != index:
+            self._key[node] = _Key(parent_key, index)
+            return True
+        return False
+
+    def longest_path(self) -> List[Hashable]:
+        """Return the longest path among the remaining nodes, in topological order."""
+        while self._heap:
+            _, key, node = self._heap[0]
+            if node in self._alive and self._key[node] is key:
+                break
+            heapq.heappop(self._heap)
+        else:
+            return []
+
+        path = [node]
+        while self._previous[node] is not None:
+            node = self._previous[node]
+            path.append(node)
+        path.reverse()
+        return path
+
+    def remove(self, nodes: Iterable[Hashable]) -> None:
+        """Remove nodes, updating the path lengths of everything downstream."""
+        nodes = [node for node in nodes if node in self._alive]
+        self._alive.difference_update(nodes)
+
+        dirty = [
+            (self._order[child], child)
+            for node in nodes
+            for child in self._children[node]
+            if child in self._alive
+        ]
+        heapq.heapify(dirty)
+
+        visited: Set[Hashable] = set()
+        while dirty:
+            _, node = heapq.heappop(dirty)
+            if node in visited:
+                continue
+            visited.add(node)
+
+            if self._relax(node):
+                self._push(node)
+                for child in self._children[node]:
+                    if child in self._alive:
+                        heapq.heappush(dirty, (self._order[child], child))
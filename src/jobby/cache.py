@@ -0,0 +1,166 @@
+import hashlib
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import networkx
+from loguru import logger
+
+from jobby.types.manifest import Manifest
+
+# Bump when the pickled layout of Manifest or GenericNode changes.
+CACHE_VERSION = 3
+
+# Environment Variables
+default_cache_directory = os.getenv(
+    "JOBBY_CACHE_DIR", default=str(Path.home() / ".cache" / "jobby")
+)
+
+
+class ArtifactCache:
+    """
+    A content-addressed, on-disk cache of parsed manifests and their linked graphs,
+    of the model timings of runs, and of the run each environment's manifest
+    was last loaded from.
+
+    Entries are keyed by dbt Cloud run id or by a hash of the manifest contents,
+    and are evicted by total size and by age.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = default_cache_directory,
+        max_size: Optional[int] = 2 * 1024**3,
+        max_age: Optional[float] = 7 * 24 * 60 * 60,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.max_age = max_age
+
+    @staticmethod
+    def key_for_run(account_id: int, run_id: int) -> str:
+        """Return the cache key for a manifest generated by a dbt Cloud run."""
+        return f"run-{account_id}-{run_id}"
+
+    @staticmethod
+    def key_for_run_results(account_id: int, run_id: int) -> str:
+        """Return the cache key for the model timings of a dbt Cloud run."""
+        return f"run-results-{account_id}-{run_id}"
+
+    @staticmethod
+    def key_for_environment(account_id: int, environment_id: int) -> str:
+        """Return the cache key for the last manifest run of an environment."""
+        return f"environment-{account_id}-{environment_id}"
+
+    @staticmethod
+    def key_for_file(path: Union[str, Path]) -> str:
+        """Return the cache key for a manifest file, based on its contents."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return f"sha256-{digest.hexdigest()}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"v{CACHE_VERSION}-{key}.pickle"
+
+    def _read(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, if present and fresh."""
+        path = self._path(key)
+
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            logger.debug("Artifact cache miss for {key}", key=key)
+            return None
+
+        if self.max_age is not None and age > self.max_age:
+            logger.debug("Artifact cache entry {key} has expired", key=key)
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+        except Exception as e:
+            logger.warning(
+                "Discarding unreadable artifact cache entry {key}: {error}",
+                key=key,
+                error=e,
+            )
+            path.unlink(missing_ok=True)
+            return None
+
+        # Refresh the modification time so that eviction is least-recently-used.
+        os.utime(path)
+        logger.debug("Artifact cache hit for {key}", key=key)
+        return value
+
+    def _write(self, key: str, value: Any) -> None:
+        """Store a value, then apply the eviction policy."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(temporary_path, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+        logger.debug("Stored {key} in the artifact cache", key=key)
+        self.evict()
+
+    def get(self, key: str) -> Optional[Tuple[Manifest, networkx.DiGraph]]:
+        """Return the cached manifest and graph for a key, if present and fresh."""
+        return self._read(key)
+
+    def put(self, key: str, manifest: Manifest, graph: networkx.DiGraph) -> None:
+        """Store a manifest and its linked graph, then apply the eviction policy."""
+        self._write(key, (manifest, graph))
+
+    def get_timings(self, key: str) -> Optional[Dict[str, float]]:
+        """Return the cached model execution times of a run, if present and fresh."""
+        return self._read(key)
+
+    def put_timings(self, key: str, timings: Dict[str, float]) -> None:
+        """Store the model execution times of a run."""
+        self._write(key, timings)
+
+    def get_run_id(self, key: str) -> Optional[int]:
+        """Return the id of the last known good run, if present and fresh."""
+        return self._read(key)
+
+    def put_run_id(self, key: str, run_id: int) -> None:
+        """Store the id of the last known good run."""
+        self._write(key, run_id)
+
+    def evict(self) -> None:
+        """Remove expired entries, then the oldest entries until under max_size."""
+        if not self.directory.exists():
+            return
+
+        now = time.time()
+        entries = []
+        for path in self.directory.glob(f"v{CACHE_VERSION}-*.pickle"):
+            stat = path.stat()
+            if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_size is None:
+            return
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logger.debug("Evicting {path} from the artifact cache", path=path.name)
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        for path in self.directory.glob("v*-*.pickle"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,295 @@
+import hashlib
+import os
+import pickle
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote, unquote
+
+from dbt.graph import UniqueId
+from loguru import logger
+
+from jobby.cache import default_cache_directory
+
+# Bump when the pickled layout of Checkpoint changes.
+CHECKPOINT_VERSION = 1
+
+default_checkpoint_directory = str(Path(default_cache_directory) / "checkpoints")
+
+
+def _encode(unique_ids: List[UniqueId]) -> bytes:
+    return "\n".join(unique_ids).encode()
+
+
+def digest(unique_ids: Iterable[UniqueId]) -> str:
+    """Return the content hash of a set of unique_ids."""
+    return hashlib.sha256(_encode(sorted(unique_ids))).hexdigest()
+
+
+def _union(models: Dict[int, Iterable[UniqueId]]) -> Tuple[Set[UniqueId], bytes]:
+    """Return the union of each job's models, and its encoding."""
+    union: Set[UniqueId] = set()
+    for unique_ids in models.values():
+        union.update(unique_ids)
+    return union, _encode(sorted(union))
+
+
+def _job_digests(models: Dict[int, Iterable[UniqueId]]) -> Dict[int, str]:
+    return {job_id: digest(unique_ids) for job_id, unique_ids in models.items()}
+
+
+@dataclass
+class Checkpoint:
+    """
+    A saved model selection: the union of a set of jobs' models, and each job's.
+
+    The union is stored as its sorted unique_ids, compressed, with a hash of
+    them, and each job only as a hash.
+    """
+
+    name: str
+    digest: str
+    count: int
+    data: bytes
+    job_digests: Dict[int, str] = field(default_factory=dict)
+    created: float = field(default_factory=time.time)
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        models: Dict[int, Iterable[UniqueId]],
+        job_digests: Optional[Dict[int, str]] = None,
+    ) -> "Checkpoint":
+        """
+        Create a checkpoint from the models of each job, keyed by job_id.
+
+        The digest of each job's models is computed unless it is given.
+        """
+        union, encoded = _union(models)
+        return cls(
+            name=name,
+            digest=hashlib.sha256(encoded).hexdigest(),
+            count=len(union),
+            data=zlib.compress(encoded),
+            job_digests=(
+                dict(job_digests) if job_digests is not None else _job_digests(models)
+            ),
+        )
+
+    @classmethod
+    def from_unique_ids(cls, name: str, unique_ids: Iterable[UniqueId]) -> "Checkpoint":
+        """Create a checkpoint of a set of models, with no per-job hashes."""
+        checkpoint = cls.create(name, {0: unique_ids})
+        checkpoint.job_digests = {}
+        return checkpoint
+
+    def unique_ids(self) -> Set[UniqueId]:
+        """Decompress the union of models."""
+        if self.count == 0:
+            return set()
+        return set(zlib.decompress(self.data).decode().split("\n"))
+
+
+@dataclass
+class StabilityResult:
+    """How a model selection differs from a checkpoint."""
+
+    name: str
+    missing: Set[UniqueId] = field(default_factory=set)
+    added: Set[UniqueId] = field(default_factory=set)
+    # Jobs whose models differ from the checkpoint, or that are new or gone.
+    # Empty for checkpoints created from a set of models, with no jobs.
+    changed_jobs: Set[int] = field(default_factory=set)
+
+    @property
+    def stable(self) -> bool:
+        return len(self.missing) == 0 and len(self.added) == 0
+
+
+class CheckpointStore:
+    """
+    Saves checkpoints of job model selections, on disk or only in memory.
+
+    Each checkpoint is one file, named after the checkpoint, so it can be
+    validated from another process. A checkpoint is unchanged if the digest of
+    each job's models is, and the selection is only sorted and hashed as a
+    whole when they differ, or are not given.
+    """
+
+    def __init__(
+        self, directory: Optional[Union[str, Path]] = default_checkpoint_directory
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        # Loaded checkpoints, and the modification time of their files.
+        self._checkpoints: Dict[str, Checkpoint] = {}
+        self._mtimes: Dict[str, int] = {}
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"v{CHECKPOINT_VERSION}-{quote(name, safe='')}.pickle"
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        """Store a checkpoint, replacing any checkpoint of the same name."""
+        self._checkpoints[checkpoint.name] = checkpoint
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(checkpoint.name)
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary_path, "wb") as file:
+            pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+        self._mtimes[checkpoint.name] = path.stat().st_mtime_ns
+
+        logger.debug(
+            "Saved checkpoint {name} of {count} models",
+            name=checkpoint.name,
+            count=checkpoint.count,
+        )
+
+    def load(self, name: str) -> Checkpoint:
+        """Return a checkpoint. Files are only read again if they have changed."""
+        if self.directory is None:
+            if name not in self._checkpoints:
+                raise Exception(f"No checkpoint named {name} has been saved.")
+            return self._checkpoints[name]
+
+        path = self._path(name)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise Exception(
+                f"No checkpoint named {name} was found in {self.directory}."
+            )
+
+        if name not in self._checkpoints or self._mtimes.get(name) != mtime:
+            with open(path, "rb") as file:
+                self._checkpoints[name] = pickle.load(file)
+            self._mtimes[name] = mtime
+
+        return self._checkpoints[name]
+
+    def names(self) -> List[str]:
+        """Return the names of every saved checkpoint."""
+        if self.directory is None:
+            return sorted(self._checkpoints)
+
+        prefix = f"v{CHECKPOINT_VERSION}-"
+        return sorted(
+            unquote(path.stem[len(prefix) :])
+            for path in self.directory.glob(f"{prefix}*.pickle")
+        )
+
+    def delete(self, name: str) -> None:
+        """Remove a checkpoint, if it exists."""
+        self._checkpoints.pop(name, None)
+        self._mtimes.pop(name, None)
+        if self.directory is not None:
+            self._path(name).unlink(missing_ok=True)
+
+    def compare(
+        self,
+        name: str,
+        models: Dict[int, Iterable[UniqueId]],
+        job_digests: Optional[Dict[int, str]] = None,
+    ) -> StabilityResult:
+        """Compare the models of each job, keyed by job_id, with a checkpoint."""
+        return self.compare_many([name], models, job_digests)[name]
+
+    def compare_many(
+        self,
+        names: Iterable[str],
+        models: Dict[int, Iterable[UniqueId]],
+        job_digests: Optional[Dict[int, str]] = None,
+    ) -> Dict[str, StabilityResult]:
+        """
+        Compare one model selection with many checkpoints.
+
+        Given the digest of each job's models, a checkpoint with the same job
+        digests is unchanged, at the cost of comparing one hash per job.
+        Otherwise the selection is sorted and hashed, once however many
+        checkpoints are compared, and a checkpoint with the same hash is
+        unchanged. Checkpoints that still differ are decompressed and diffed,
+        and their job digests find the jobs that changed.
+        """
+        union: Optional[Set[UniqueId]] = None
+        current_digest: Optional[str] = None
+
+        results = {}
+        for name in names:
+            checkpoint = self.load(name)
+            result = StabilityResult(name)
+            results[name] = result
+            # Checkpoints of a set of models have no job digests to compare.
+            if (
+                job_digests is not None
+                and len(checkpoint.job_digests) > 0
+                and checkpoint.job_digests == job_digests
+            ):
+                continue
+
+            if union is None:
+                union, encoded = _union(models)
+                current_digest = hashlib.sha256(encoded).hexdigest()
+            if checkpoint.digest == current_digest:
+                continue
+
+            original = checkpoint.unique_ids()
+            result.missing = original - union
+            result.added = union - original
+            if len(checkpoint.job_digests) == 0:
+                continue
+
+            if job_digests is None:
+                job_digests = _job_digests(models)
+            result.changed_jobs = {
+                job_id
+                for job_id in checkpoint.job_digests.keys() | job_digests.keys()
+                if checkpoint.job_digests.get(job_id) != job_digests.get(job_id)
+            }
+
+        return results
+
+
+class CheckpointMapping(MutableMapping[str, Set[UniqueId]]):
+    """
+    The checkpoints of a store, as a mapping from each name to its models.
+
+    Reading a checkpoint decompresses its models. Assigning a set of models
+    saves a checkpoint of them, with no per-job hashes.
+    """
+
+    def __init__(self, store: CheckpointStore) -> None:
+        self.store = store
+
+    def __getitem__(self, name: str) -> Set[UniqueId]:
+        if name not in self.store.names():
+            raise KeyError(name)
+        return self.store.load(name).unique_ids()
+
+    def __setitem__(self, name: str, unique_ids: Iterable[UniqueId]) -> None:
+        self.store.save(Checkpoint.from_unique_ids(name, unique_ids))
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self.store.names():
+            raise KeyError(name)
+        self.store.delete(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.names())
+
+    def __len__(self) -> int:
+        return len(self.store.names())
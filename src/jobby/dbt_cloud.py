@@ -1,17 +1,67 @@
-from typing import Dict, List
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
 
 import requests
 from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from jobby.metrics import MetricsCollector, NullMetrics
+
+# The status dbt Cloud gives to runs that succeeded.
+SUCCESS_STATUS = 10
 
 
 class DBTCloud:
     """A minimalistic API client for fetching dbt Cloud data."""
 
-    def __init__(self, account_id: int, api_key: str, dbt_cloud_base_url: str) -> None:
+    def __init__(
+        self,
+        account_id: int,
+        api_key: str,
+        dbt_cloud_base_url: str,
+        max_workers: int = 8,
+        retries: int = 5,
+        backoff_factor: float = 0.5,
+        metrics: Optional[MetricsCollector] = None,
+    ) -> None:
         self.account_id = account_id
         self._api_key = api_key
         self.dbt_cloud_base_url = dbt_cloud_base_url
-        self._manifests: Dict = {}
+        self.max_workers = max_workers
+        self.metrics = metrics or NullMetrics()
+        self._session = self._create_session(retries, backoff_factor)
+
+    def _create_session(self, retries: int, backoff_factor: float) -> requests.Session:
+        """Create a pooled session that retries throttled and failed requests."""
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=self.max_workers)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {
+                "Authorization": f"Bearer {self._api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        return session
+
+    @property
+    def _account_url(self) -> str:
+        base_url = self.dbt_cloud_base_url
+        if not base_url.startswith(("http://", "https://")):
+            base_url = f"https://{base_url}"
+        return f"{base_url}/api/v2/accounts/{self.account_id}"
 
     def _check_for_creds(self):
         """Confirm the presence of credentials"""
@@ -21,128 +71,170 @@ class DBTCloud:
         if not self.account_id:
             raise Exception("An account_id is required to get dbt Cloud jobs.")
 
-    def get_latest_job_runs(self, job_id: int) -> Dict:
-        """Obtain the most recent run for a job"""
-        offset = 0
+    def _get(self, path: str, parameters: Optional[Dict] = None) -> requests.Response:
+        """Issue a GET request against the account's API, raising on failure."""
+        with self.metrics.phase("http.get"):
+            response = self._session.get(
+                url=f"{self._account_url}/{path}", params=parameters
+            )
+        self.metrics.count("http.requests")
+        self.metrics.count("http.bytes", len(response.content))
+        response.raise_for_status()
+        return response
+
+    def _get_page(self, path: str, parameters: Dict, offset: int) -> Dict:
+        return self._get(path, {**parameters, "offset": offset}).json()
+
+    def _iterate_pages(self, path: str, parameters: Dict) -> Iterator[List[Dict]]:
+        """
+        Yield each page of a paginated endpoint in order.
+
+        The first page is fetched alone to learn the page size and total count.
+        The remaining pages are then fetched concurrently, a window of
+        max_workers pages at a time, so that callers which stop early do not
+        download the whole collection.
+        """
+        first_page = self._get_page(path, parameters, 0)
+        yield first_page["data"]
+
+        limit = first_page["extra"]["filters"]["limit"]
+        total_count = first_page["extra"]["pagination"]["total_count"]
+        offsets = list(range(limit, total_count, limit))
+        if len(offsets) == 0:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(offsets), self.max_workers):
+                window = offsets[start : start + self.max_workers]
+                for page in executor.map(
+                    lambda offset: self._get_page(path, parameters, offset), window
+                ):
+                    yield page["data"]
+
+    def get_recent_successful_runs(self, job_id: int, count: int = 5) -> List[Dict]:
+        """Return up to `count` of a job's most recent successful runs, newest first"""
+
+        parameters = {
+            "job_definition_id": job_id,
+            "order_by": "-id",
+        }
+
+        successful_runs: List[Dict] = []
+        for runs in self._iterate_pages("runs/", parameters):
+            for specficic_run in runs:
+                if specficic_run["is_success"]:
+                    successful_runs.append(specficic_run)
+                    if len(successful_runs) == count:
+                        return successful_runs
 
-        run = None
+        return successful_runs
 
-        while True:
-            parameters = {
-                "offset": offset,
-                "job_definition_id": job_id,
-                "order_by": "-id",
-            }
+    def get_latest_job_runs(self, job_id: int) -> Dict:
+        """Obtain the most recent run for a job"""
 
-            response = requests.get(
-                url=f"https://{self.dbt_cloud_base_url}/api/v2/accounts/{self.account_id}/runs/",
-                params=parameters,
-                headers={
-                    "Authorization": f"Bearer {self._api_key}",
-                    "Content-Type": "application/json",
-                },
-            )
+        runs = self.get_recent_successful_runs(job_id, count=1)
+        if len(runs) == 0:
+            raise Exception("Unable to find a latest run.")
 
-            run_data = response.json()
+        logger.debug(f"Using run {runs[0]['id']}")
+        return runs[0]
 
-            for specficic_run in run_data["data"]:
-                if specficic_run["is_success"]:
-                    logger.debug(f"Using run {specficic_run['id']}")
-                    run = specficic_run
-                    break
+    def get_latest_run(self, environemnt_id: int) -> Dict:
+        """
+        Return the most recent successful run for an environment.
 
-            if run is not None:
-                break
+        The runs endpoint is asked for the environment's newest successful run
+        alone. If the filters are not honoured, the runs of the environment's
+        first job are searched instead.
+        """
 
-            if (
-                run_data["extra"]["filters"]["limit"]
-                + run_data["extra"]["filters"]["offset"]
-                >= run_data["extra"]["pagination"]["total_count"]
-            ):
-                break
+        self._check_for_creds()
 
-            offset += run_data["extra"]["filters"]["limit"]
+        parameters = {
+            "environment_id": environemnt_id,
+            "status": SUCCESS_STATUS,
+            "order_by": "-id",
+            "limit": 1,
+        }
+        runs = self._get("runs/", parameters).json()["data"]
+
+        if len(runs) > 0 and not (
+            runs[0].get("is_success")
+            and runs[0].get("environment_id") is not None
+            and int(runs[0]["environment_id"]) == int(environemnt_id)
+        ):
+            logger.warning(
+                "The runs endpoint did not filter by environment and status. "
+                "Searching the runs of the environment's first job instead."
+            )
+            return self._get_latest_run_by_job(environemnt_id)
 
-        if run is None:
+        if len(runs) == 0:
             raise Exception("Unable to find a latest run.")
 
-        return run
+        logger.debug(f"Using run {runs[0]['id']}")
+        return runs[0]
 
-    def get_latest_manifest(self, environemnt_id: int) -> Dict:
-        """Return the most recently generated manifest.json file for an environment"""
-
-        # Find the most recent run for an environemnt.
-
-        self._check_for_creds()
+    def _get_latest_run_by_job(self, environemnt_id: int) -> Dict:
+        """Return the most recent successful run of an environment's first job"""
 
         jobs = self.get_jobs(environemnt_id)
 
         if len(jobs) == 0:
             raise Exception("No recent jobs found.")
 
-        run = self.get_latest_job_runs(jobs[0]["id"])
+        return self.get_latest_job_runs(jobs[0]["id"])
 
-        manifest_response = requests.get(
-            url=f"https://{self.dbt_cloud_base_url}/api/v2/accounts/{self.account_id}/runs/{run['id']}/artifacts/manifest.json",
-            headers={
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-            },
-        )
-
-        return manifest_response.json()
+    def get_newer_run(
+        self, environemnt_id: int, run_id: Optional[int]
+    ) -> Optional[Dict]:
+        """Return the latest successful run if it is newer than run_id, or None"""
+        run = self.get_latest_run(environemnt_id)
+        if run_id is not None and run["id"] <= run_id:
+            return None
+        return run
 
-    def get_jobs(self, environment_id: int) -> List[Dict]:
-        """Return a list of Jobs for all the dbt Cloud jobs in an environment."""
+    def get_artifact(self, run_id: int, path: str) -> bytes:
+        """Return the raw contents of an artifact generated by a run"""
 
         self._check_for_creds()
 
-        offset = 0
+        return self._get(f"runs/{run_id}/artifacts/{path}").content
 
-        jobs = []
+    def get_run_results(self, run_id: int) -> bytes:
+        """Return the raw contents of the run_results.json file generated by a run"""
+        return self.get_artifact(run_id, "run_results.json")
 
-        while True:
-            parameters = {"offset": offset}
+    def get_latest_manifest_content(self, environemnt_id: int) -> bytes:
+        """Return the raw bytes of the most recently generated manifest.json file"""
+        run = self.get_latest_run(environemnt_id)
+        return self.get_artifact(run["id"], "manifest.json")
 
-            # if project_id:
-            #     parameters['project_id'] = project_id
+    def get_latest_manifest(self, environemnt_id: int) -> Dict:
+        """Return the most recently generated manifest.json file for an environment"""
+        return json.loads(self.get_latest_manifest_content(environemnt_id))
 
-            response = requests.get(
-                url=f"https://{self.dbt_cloud_base_url}/api/v2/accounts/{self.account_id}/jobs/",
-                params=parameters,
-                headers={
-                    "Authorization": f"Bearer {self._api_key}",
-                    "Content-Type": "application/json",
-                },
-            )
+    def get_jobs(self, environment_id: int) -> List[Dict]:
+        """Return a list of Jobs for all the dbt Cloud jobs in an environment."""
 
-            job_data = response.json()
-            jobs.extend(job_data["data"])
+        self._check_for_creds()
 
-            if (
-                job_data["extra"]["filters"]["limit"]
-                + job_data["extra"]["filters"]["offset"]
-                >= job_data["extra"]["pagination"]["total_count"]
-            ):
-                break
+        # if project_id:
+        #     parameters['project_id'] = project_id
 
-            offset += job_data["extra"]["filters"]["limit"]
+        jobs = [job for page in self._iterate_pages("jobs/", {}) for job in page]
 
-        return list(filter(lambda x: x["environment_id"] == environment_id, jobs))
+        return list(
+            filter(
+                lambda x: x["environment_id"] is not None
+                and int(x["environment_id"]) == int(environment_id),
+                jobs,
+            )
+        )
 
     def get_job(self, job_id: int) -> Dict:
         """Generate a Job based on a dbt Cloud job."""
 
         self._check_for_creds()
 
-        response = requests.get(
-            url=(
-                f"https://{self.dbt_cloud_base_url}/api/v2/accounts/"
-                f"{self.account_id}/jobs/{job_id}"
-            ),
-            headers={
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-            },
-        )
-        return response.json()["data"]
+        return self._get(f"jobs/{job_id}").json()["data"]
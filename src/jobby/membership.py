@@ -0,0 +1,243 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx
+from dbt.graph import UniqueId
+from loguru import logger
+
+from jobby.reachability import ReachabilityIndex
+from jobby.types.job import Job
+from jobby.types.node_index import NodeIndex
+
+
+@dataclass
+class DuplicateModel:
+    """A model that is built by more than one job."""
+
+    unique_id: UniqueId
+    job_ids: List[int]
+    # The model's execution time in seconds, if known.
+    time: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.job_ids)
+
+    @property
+    def wasted_time(self) -> Optional[float]:
+        """The seconds spent building the model more than once, per run of every job."""
+        if self.time is None:
+            return None
+        return self.time * (self.count - 1)
+
+
+@dataclass
+class DeduplicationPlan:
+    """A set of transfers that leave each model with a single owning job."""
+
+    # The job chosen to build each duplicated model.
+    owners: Dict[UniqueId, int]
+    # Models to move with Jobby.transfer_models, as (models, source, target).
+    transfers: List[Tuple[Set[UniqueId], int, int]]
+    # Duplicated models that no job could own without a circular dependency.
+    skipped: List[UniqueId] = field(default_factory=list)
+    # The job dependency graph after the transfers, as job_id pairs.
+    dependencies: Set[Tuple[int, int]] = field(default_factory=set)
+
+
+@dataclass
+class ImpactedJobs:
+    """The jobs affected by a set of changed models."""
+
+    # Jobs that build a changed model.
+    direct: Set[int]
+    # Jobs that build a descendant of a changed model, but no changed model.
+    downstream: Set[int]
+
+
+class MembershipIndex:
+    """
+    An inverted index from each model to the jobs that build it.
+
+    The index is built in one pass over the models of every job, on first
+    use, and answers which models are built more than once, and which job
+    should own each of them. Impact queries use each job's model bitset
+    instead, so they stay correct as jobs are modified.
+    """
+
+    def __init__(self, jobs: Iterable[Job]) -> None:
+        self.jobs: Dict[int, Job] = {job.job_id: job for job in jobs}
+        self._job_ids: Optional[Dict[UniqueId, List[int]]] = None
+
+    @property
+    def job_ids(self) -> Dict[UniqueId, List[int]]:
+        """The ids of the jobs that build each model."""
+        if self._job_ids is None:
+            self._job_ids = {}
+            for job_id, job in self.jobs.items():
+                for unique_id in job.models:
+                    self._job_ids.setdefault(unique_id, []).append(job_id)
+        return self._job_ids
+
+    def jobs_for(self, unique_id: UniqueId) -> List[int]:
+        """Return the ids of the jobs that build a model."""
+        return list(self.job_ids.get(unique_id, []))
+
+    def impacted(
+        self, changed: Iterable[UniqueId], reachability: ReachabilityIndex
+    ) -> ImpactedJobs:
+        """Return the jobs that build, or build downstream of, changed models."""
+        index: NodeIndex = reachability.index
+        changed = [unique_id for unique_id in changed if unique_id in index]
+        changed_bits = index.encode(changed)
+        downstream_bits = reachability.descendants_of(changed) & ~changed_bits
+
+        impacted = ImpactedJobs(direct=set(), downstream=set())
+        for job_id, job in self.jobs.items():
+            bits = job.bits(index)
+            if bits & changed_bits:
+                impacted.direct.add(job_id)
+            elif bits & downstream_bits:
+                impacted.downstream.add(job_id)
+
+        return impacted
+
+    def duplicates(
+        self, timings: Optional[Dict[UniqueId, float]] = None
+    ) -> List[DuplicateModel]:
+        """
+        Return the models built by more than one job, most duplicated first.
+
+        Timings default to those stored on the jobs by Jobby.estimate_runtimes.
+        When any are known, models are ranked by wasted time instead.
+        """
+        if timings is None:
+            timings = {}
+            for job in self.jobs.values():
+                timings.update(job.timings)
+
+        duplicates = [
+            DuplicateModel(unique_id, list(job_ids), timings.get(unique_id))
+            for unique_id, job_ids in self.job_ids.items()
+            if len(job_ids) > 1
+        ]
+
+        if len(timings) > 0:
+            duplicates.sort(
+                key=lambda duplicate: (
+                    -(duplicate.wasted_time or 0.0),
+                    -duplicate.count,
+                    duplicate.unique_id,
+                )
+            )
+        else:
+            duplicates.sort(
+                key=lambda duplicate: (-duplicate.count, duplicate.unique_id)
+            )
+
+        return duplicates
+
+    def deduplicate(
+        self, order: Dict[UniqueId, int], reachability: ReachabilityIndex
+    ) -> DeduplicationPlan:
+        """
+        Choose a single owning job for every duplicated model.
+
+        Once a model leaves a job, the job's remaining descendants of it depend
+        on the owner instead, so ownership adds edges to the graph of job
+        dependencies. Duplicates are settled in topological order, and each
+        goes to the job holding most of its parents and children whose new
+        edges keep that graph acyclic, so every job's model_dependencies can
+        still be built before it. Models with no such owner stay duplicated.
+
+        Order is the topological position of every node in the whole graph, as
+        SelectorGenerator.foundation returns. Models that are not in the graph,
+        such as models removed from the manifest, are skipped.
+        """
+        models: Dict[int, Set[UniqueId]] = {
+            job_id: set(job.models) for job_id, job in self.jobs.items()
+        }
+
+        # Jobs that need each model without building it.
+        needed_by: Dict[UniqueId, Set[int]] = {}
+        for job_id, job_models in models.items():
+            for parent in reachability.external_parents(job_models):
+                needed_by.setdefault(parent, set()).add(job_id)
+
+        job_graph = networkx.DiGraph()
+        job_graph.add_nodes_from(self.jobs)
+        for unique_id, job_ids in self.job_ids.items():
+            if len(job_ids) == 1:
+                for job_id in needed_by.get(unique_id, ()):
+                    job_graph.add_edge(job_ids[0], job_id)
+
+        owners: Dict[UniqueId, int] = {}
+        moves: Dict[Tuple[int, int], Set[UniqueId]] = {}
+        skipped: List[UniqueId] = []
+
+        duplicated = []
+        for unique_id, job_ids in self.job_ids.items():
+            if len(job_ids) < 2:
+                continue
+            if unique_id not in reachability or unique_id not in order:
+                logger.warning(
+                    "Skipping {unique_id}, which is not in the graph",
+                    unique_id=unique_id,
+                )
+                skipped.append(unique_id)
+                continue
+            duplicated.append(unique_id)
+
+        for unique_id in sorted(duplicated, key=order.__getitem__):
+            holders = self.job_ids[unique_id]
+            children = reachability.children(unique_id)
+            neighbours = reachability.parents(unique_id) | children
+
+            candidates = []
+            for owner in holders:
+                edges = {
+                    (owner, holder)
+                    for holder in holders
+                    if holder != owner and children & models[holder]
+                }
+                edges.update(
+                    (owner, job_id)
+                    for job_id in needed_by.get(unique_id, ())
+                    if job_id != owner
+                )
+                locality = len(neighbours & models[owner])
+                candidates.append(
+                    ((-locality, len(edges), -len(models[owner]), owner), owner, edges)
+                )
+
+            for _, owner, edges in sorted(candidates):
+                if not any(
+                    networkx.has_path(job_graph, target, source)
+                    for source, target in edges
+                ):
+                    break
+            else:
+                logger.warning(
+                    "Unable to choose an owner for {unique_id} without a circular "
+                    "job dependency",
+                    unique_id=unique_id,
+                )
+                skipped.append(unique_id)
+                continue
+
+            owners[unique_id] = owner
+            job_graph.add_edges_from(edges)
+            for holder in holders:
+                if holder != owner:
+                    models[holder].discard(unique_id)
+                    moves.setdefault((holder, owner), set()).add(unique_id)
+
+        return DeduplicationPlan(
+            owners=owners,
+            transfers=[
+                (unique_ids, source, target)
+                for (source, target), unique_ids in moves.items()
+            ],
+            skipped=skipped,
+            dependencies=set(job_graph.edges),
+        )
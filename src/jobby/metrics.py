@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional
+
+# Called with a phase's name, its wall time in seconds and its item count,
+# each time the phase ends.
+PhaseHook = Callable[[str, float, int], None]
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    time: float = 0.0
+    items: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class Phase:
+    """A running phase. Add to `items` to record how much work it covered."""
+
+    __slots__ = ("collector", "name", "items", "_start")
+
+    def __init__(self, collector: "MetricsCollector", name: str, items: int) -> None:
+        self.collector = collector
+        self.name = name
+        self.items = items
+
+    def __enter__(self) -> "Phase":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.collector._record(self.name, time.perf_counter() - self._start, self.items)
+
+
+class _NullPhase:
+    """A phase that records nothing. One instance is shared by every caller."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullPhase":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    @property
+    def items(self) -> int:
+        return 0
+
+    @items.setter
+    def items(self, value: int) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class MetricsCollector:
+    """
+    Records the wall time, call count and item count of each phase of work, and
+    named counters such as HTTP requests and bytes.
+
+    Phases are timed with `with metrics.phase(name):`, and may nest; each is
+    reported under its own name. A hook, if given, is called as every phase
+    ends. Work done inside forked worker processes is not seen by the
+    collector, only the phase that encloses it in the parent.
+    """
+
+    enabled = True
+
+    def __init__(self, hook: Optional[PhaseHook] = None) -> None:
+        self.hook = hook
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str, items: int = 0) -> Phase:
+        """Time a block of work, as a context manager."""
+        return Phase(self, name, items)
+
+    def _record(self, name: str, elapsed: float, items: int) -> None:
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats()
+            stats.calls += 1
+            stats.time += elapsed
+            stats.items += items
+
+        if self.hook is not None:
+            self.hook(name, elapsed, items)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add to a named counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        """Drop everything recorded so far."""
+        with self._lock:
+            self.phases.clear()
+            self.counters.clear()
+
+    def report(self) -> Dict:
+        """Return the recorded phases and counters as plain dictionaries."""
+        with self._lock:
+            return {
+                "phases": {
+                    name: stats.as_dict() for name, stats in self.phases.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def to_json(self, **kwargs) -> str:
+        """Return the report as a JSON document."""
+        return json.dumps(self.report(), **kwargs)
+
+
+class NullMetrics(MetricsCollector):
+    """A collector that records nothing, used when metrics are disabled."""
+
+    enabled = False
+
+    def phase(self, name: str, items: int = 0) -> _NullPhase:
+        return _NULL_PHASE
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
@@ -1,35 +1,104 @@
-from typing import List
+import json
+import math
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from xml.sax.saxutils import escape, quoteattr
 
+import networkx
 import pydot
+from dbt.graph import UniqueId
 
+from jobby.membership import MembershipIndex
+from jobby.reachability import ReachabilityIndex
 from jobby.types.job import Job
+from jobby.types.model import Model
+from jobby.types.node_index import NodeIndex
+
+
+# Dependencies on these resource types are not drawn.
+IGNORED_RESOURCE_TYPES = ["macro", "operation", "test"]
+
+COLORS = {"model": "#4491b0", "source": "#66a138"}
+EDGE_COLOR = "#316c88"
+CRITICAL_COLOR = "#d62728"
+
+
+def _runtime_label(job: Job) -> str:
+    """Summarize a job's estimated runtime for its cluster label."""
+    runtime = job.runtime
+    return (
+        f"{job.name}\n{runtime.total_time:.0f}s total, "
+        f"{runtime.critical_path_time:.0f}s critical path, "
+        f"~{runtime.makespan:.0f}s on {runtime.threads} threads"
+    )
+
+
+def _job_label(job: Job) -> str:
+    return job.name if job.runtime is None else _runtime_label(job)
+
+
+def _runtime_annotations(
+    jobs: Iterable[Job],
+) -> Tuple[Dict[UniqueId, float], Set[Tuple[UniqueId, UniqueId]]]:
+    """Collect the model timings and critical-path edges of a set of jobs."""
+    timings: Dict[UniqueId, float] = {}
+    critical_edges = set()
+    for job in jobs:
+        timings.update(job.timings)
+        if job.runtime is not None:
+            path = job.runtime.critical_path
+            critical_edges.update(zip(path, path[1:]))
+    return timings, critical_edges
+
+
+def _dependencies(model: Model) -> Iterator[UniqueId]:
+    for depends_on in model.depends_on:
+        if depends_on.split(".")[0] not in IGNORED_RESOURCE_TYPES:
+            yield depends_on
 
 
 def generate_dot_graph(jobs: List[Job], name):
-    """Create a PyDot Graph for a list of Jobs"""
+    """
+    Create a PyDot Graph for a list of Jobs
+
+    Jobs with runtime estimates (see Jobby.estimate_runtimes) have their model
+    execution times shown on nodes and edges, and their critical path in red.
+    Each node and edge is added once. For large job sets, use write_graph.
+    """
 
     dot_graph = pydot.Dot(name, graph_type="digraph", rankdir="LR")
 
+    timings, critical_edges = _runtime_annotations(jobs)
+    declared: Set[str] = set()
+
     for job in jobs:
 
-        subgraph = pydot.Cluster(f"job_{job.job_id}", label=job.name, simplify=True)
+        subgraph = pydot.Cluster(
+            f"job_{job.job_id}", label=_job_label(job), simplify=True
+        )
 
         if len(job.models) == 0:
             continue
 
         for unique_id, model in job.models.items():
+            if unique_id in declared:
+                continue
+            declared.add(unique_id)
+
             options = {}
-            if model.unique_id.startswith("model"):
-                options["fillcolor"] = "#4491b0"
-                options["color"] = "#4491b0"
-            elif model.unique_id.startswith("source"):
-                options["fillcolor"] = "#66a138"
-                options["color"] = "#66a138"
+            color = COLORS.get(unique_id.split(".")[0])
+            if color is not None:
+                options["fillcolor"] = color
+                options["color"] = color
+
+            label = model.name
+            if unique_id in timings:
+                label = f"{model.name}\n{timings[unique_id]:.1f}s"
 
             subgraph.add_node(
                 pydot.Node(
                     f"{unique_id}",
-                    label=model.name,
+                    label=label,
                     shape="box",
                     style="filled",
                     fontcolor="white",
@@ -39,33 +108,364 @@ def generate_dot_graph(jobs: List[Job], name):
 
         dot_graph.add_subgraph(subgraph)
 
+    connected: Set[str] = set()
     for job in jobs:
         for unique_id, model in job.models.items():
-            for depends_on in model.depends_on:
-
-                if depends_on.split(".")[0] in ["macro", "operation", "test"]:
-                    continue
-
-                options = {}
-                if depends_on.startswith("model"):
-                    options["fillcolor"] = "#4491b0"
-                    options["color"] = "#4491b0"
-                elif depends_on.startswith("source"):
-                    options["fillcolor"] = "#66a138"
-                    options["color"] = "#66a138"
-
-                dot_graph.add_node(
-                    pydot.Node(
-                        f"{depends_on}",
-                        shape="box",
-                        style="filled",
-                        fontcolor="white",
-                        **options,
+            if unique_id in connected:
+                continue
+            connected.add(unique_id)
+
+            for depends_on in _dependencies(model):
+
+                if depends_on not in declared:
+                    declared.add(depends_on)
+
+                    options = {}
+                    color = COLORS.get(depends_on.split(".")[0])
+                    if color is not None:
+                        options["fillcolor"] = color
+                        options["color"] = color
+
+                    dot_graph.add_node(
+                        pydot.Node(
+                            f"{depends_on}",
+                            shape="box",
+                            style="filled",
+                            fontcolor="white",
+                            **options,
+                        )
                     )
-                )
+
+                options = {"color": EDGE_COLOR}
+                if depends_on in timings:
+                    options["label"] = f"{timings[depends_on]:.1f}s"
+                    options["weight"] = max(int(timings[depends_on]), 1)
+                if (depends_on, unique_id) in critical_edges:
+                    options["color"] = CRITICAL_COLOR
+                    options["penwidth"] = 3
 
                 dot_graph.add_edge(
-                    pydot.Edge(f"{depends_on}", f"{unique_id}", color="#316c88")
+                    pydot.Edge(f"{depends_on}", f"{unique_id}", **options)
                 )
 
     return dot_graph
+
+
+def job_dependency_graph(
+    jobs: Iterable[Job], reachability: Optional[ReachabilityIndex] = None
+) -> networkx.DiGraph:
+    """
+    Build the graph of dependencies between jobs.
+
+    There is an edge from one job to another when the second needs models
+    that the first builds. Each edge's `models` are those unique_ids, and its
+    `weight` is their count. Dependencies come from Job.model_dependencies,
+    and are read from the compiled graph when a ReachabilityIndex is given.
+    """
+    jobs = list(jobs)
+    job_ids = MembershipIndex(jobs).job_ids
+
+    dependencies: Dict[Tuple[int, int], Set[UniqueId]] = {}
+    for job in jobs:
+        for depends_on in job.model_dependencies(reachability):
+            for upstream_id in job_ids.get(depends_on, ()):
+                dependencies.setdefault((upstream_id, job.job_id), set()).add(
+                    depends_on
+                )
+
+    graph = networkx.DiGraph()
+    for job in jobs:
+        graph.add_node(job.job_id, name=job.name, models=len(job.models))
+    graph.add_edges_from(
+        (upstream_id, job_id, {"models": models, "weight": len(models)})
+        for (upstream_id, job_id), models in dependencies.items()
+    )
+
+    return graph
+
+
+def _quote(value) -> str:
+    """Quote a DOT identifier or string."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return '"' + escaped.replace("\n", "\\n") + '"'
+
+
+class _DotWriter:
+    """Streams a graph to a file in Graphviz DOT format."""
+
+    def __init__(self, file: IO[str], name: str) -> None:
+        self.file = file
+        file.write(f"digraph {_quote(name)} {{\n  rankdir=LR;\n")
+        file.write('  node [shape=box, style=filled, fontcolor="white"];\n')
+
+    def start_group(self, group_id: str, label: str) -> None:
+        self.file.write(
+            f"  subgraph {_quote('cluster_' + group_id)} {{\n"
+            f"    label={_quote(label)};\n"
+        )
+
+    def end_group(self) -> None:
+        self.file.write("  }\n")
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, object]) -> str:
+        return ", ".join(f"{key}={_quote(value)}" for key, value in attributes.items())
+
+    def node(self, node_id: str, attributes: Dict) -> None:
+        options: Dict[str, object] = {}
+        label = attributes.get("label", node_id)
+        if "time" in attributes:
+            label = f"{label}\n{attributes['time']:.1f}s"
+        options["label"] = label
+
+        kind = attributes.get("kind")
+        color = COLORS.get(kind, EDGE_COLOR if kind == "job" else None)
+        if color is not None:
+            options["fillcolor"] = color
+            options["color"] = color
+
+        self.file.write(f"  {_quote(node_id)} [{self._attributes(options)}];\n")
+
+    def edge(self, source: str, target: str, attributes: Dict) -> None:
+        options: Dict[str, object] = {"color": EDGE_COLOR}
+        if "time" in attributes:
+            options["label"] = f"{attributes['time']:.1f}s"
+            options["weight"] = max(int(attributes["time"]), 1)
+        if "weight" in attributes:
+            options["label"] = attributes["weight"]
+            options["weight"] = attributes["weight"]
+            options["penwidth"] = f"{1 + math.log2(attributes['weight']):.2f}"
+        if attributes.get("critical"):
+            options["color"] = CRITICAL_COLOR
+            options["penwidth"] = 3
+
+        self.file.write(
+            f"  {_quote(source)} -> {_quote(target)} [{self._attributes(options)}];\n"
+        )
+
+    def close(self) -> None:
+        self.file.write("}\n")
+
+
+# GraphML attribute keys: (name, domain, type).
+_GRAPHML_KEYS = [
+    ("label", "node", "string"),
+    ("kind", "node", "string"),
+    ("job", "node", "long"),
+    ("models", "node", "long"),
+    ("time", "all", "double"),
+    ("weight", "edge", "long"),
+    ("critical", "edge", "boolean"),
+]
+
+
+class _GraphMLWriter:
+    """Streams a graph to a file in GraphML format. Groups become a job attribute."""
+
+    def __init__(self, file: IO[str], name: str) -> None:
+        self.file = file
+        file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        )
+        for key, domain, key_type in _GRAPHML_KEYS:
+            file.write(
+                f'  <key id="{key}" for="{domain}" attr.name="{key}" '
+                f'attr.type="{key_type}"/>\n'
+            )
+        file.write(f'  <graph id={quoteattr(name)} edgedefault="directed">\n')
+
+    def start_group(self, group_id: str, label: str) -> None:
+        pass
+
+    def end_group(self) -> None:
+        pass
+
+    @staticmethod
+    def _data(attributes: Dict) -> str:
+        return "".join(
+            f'<data key="{key}">{escape(_graphml_value(attributes[key]))}</data>'
+            for key, _, _ in _GRAPHML_KEYS
+            if key in attributes
+        )
+
+    def node(self, node_id: str, attributes: Dict) -> None:
+        self.file.write(
+            f"    <node id={quoteattr(node_id)}>{self._data(attributes)}</node>\n"
+        )
+
+    def edge(self, source: str, target: str, attributes: Dict) -> None:
+        self.file.write(
+            f"    <edge source={quoteattr(source)} target={quoteattr(target)}>"
+            f"{self._data(attributes)}</edge>\n"
+        )
+
+    def close(self) -> None:
+        self.file.write("  </graph>\n</graphml>\n")
+
+
+def _graphml_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class _JSONWriter:
+    """Streams a graph to a file as a JSON object of node and edge lists."""
+
+    def __init__(self, file: IO[str], name: str) -> None:
+        self.file = file
+        self._section: Optional[str] = None
+        self._sections: Set[str] = set()
+        self._first = True
+        file.write(f'{{"name": {json.dumps(name)}')
+
+    def _start(self, section: str) -> None:
+        if self._section != section:
+            if self._section is not None:
+                self.file.write("]")
+            self.file.write(f', "{section}": [')
+            self._section = section
+            self._sections.add(section)
+            self._first = True
+
+    def _write(self, item: Dict) -> None:
+        self.file.write(("" if self._first else ", ") + json.dumps(item))
+        self._first = False
+
+    def start_group(self, group_id: str, label: str) -> None:
+        pass
+
+    def end_group(self) -> None:
+        pass
+
+    def node(self, node_id: str, attributes: Dict) -> None:
+        self._start("nodes")
+        self._write({"id": node_id, **attributes})
+
+    def edge(self, source: str, target: str, attributes: Dict) -> None:
+        self._start("edges")
+        self._write({"source": source, "target": target, **attributes})
+
+    def close(self) -> None:
+        # Nodes are written before edges, so only missing sections are added.
+        for section in ("nodes", "edges"):
+            if section not in self._sections:
+                self._start(section)
+        self.file.write("]}\n")
+
+
+_WRITERS = {"dot": _DotWriter, "graphml": _GraphMLWriter, "json": _JSONWriter}
+_SUFFIXES = {".dot": "dot", ".gv": "dot", ".graphml": "graphml", ".json": "json"}
+
+
+def _write_models(jobs: List[Job], writer) -> None:
+    """Write every model, grouped by job, then every dependency, once each."""
+    timings, critical_edges = _runtime_annotations(jobs)
+
+    declared: Set[str] = set()
+    for job in jobs:
+        if len(job.models) == 0:
+            continue
+
+        writer.start_group(f"job_{job.job_id}", _job_label(job))
+        for unique_id, model in job.models.items():
+            if unique_id in declared:
+                continue
+            declared.add(unique_id)
+
+            attributes = {
+                "label": model.name,
+                "kind": unique_id.split(".")[0],
+                "job": job.job_id,
+            }
+            if unique_id in timings:
+                attributes["time"] = timings[unique_id]
+            writer.node(unique_id, attributes)
+        writer.end_group()
+
+    for job in jobs:
+        for model in job.models.values():
+            for depends_on in _dependencies(model):
+                if depends_on not in declared:
+                    declared.add(depends_on)
+                    writer.node(depends_on, {"kind": depends_on.split(".")[0]})
+
+    connected: Set[str] = set()
+    for job in jobs:
+        for unique_id, model in job.models.items():
+            if unique_id in connected:
+                continue
+            connected.add(unique_id)
+
+            for depends_on in _dependencies(model):
+                attributes = {}
+                if depends_on in timings:
+                    attributes["time"] = timings[depends_on]
+                if (depends_on, unique_id) in critical_edges:
+                    attributes["critical"] = True
+                writer.edge(depends_on, unique_id, attributes)
+
+
+def _write_jobs(jobs: List[Job], writer) -> None:
+    """Write one node per job, and one edge per pair of dependent jobs."""
+    for job in jobs:
+        attributes = {
+            "label": _job_label(job),
+            "kind": "job",
+            "job": job.job_id,
+            "models": len(job.models),
+        }
+        if job.runtime is not None:
+            attributes["time"] = job.runtime.makespan
+        writer.node(f"job_{job.job_id}", attributes)
+
+    graph = job_dependency_graph(jobs)
+    for upstream_id, job_id, weight in graph.edges(data="weight"):
+        writer.edge(f"job_{upstream_id}", f"job_{job_id}", {"weight": weight})
+
+
+def write_graph(
+    jobs: Iterable[Job],
+    path: Union[str, Path],
+    name: str = "jobs",
+    graph_format: Optional[str] = None,
+    collapse_jobs: bool = False,
+) -> None:
+    """
+    Stream the graph of a set of jobs straight to a file.
+
+    Unlike generate_dot_graph, no document is built in memory, and every node
+    and edge is written once. The format ("dot", "graphml" or "json") is taken
+    from the file extension unless given. With collapse_jobs, each job becomes
+    a single node, and jobs are linked by edges weighted by the number of
+    models one needs from the other, which keeps account-wide diagrams small.
+    """
+    path = Path(path)
+    graph_format = graph_format or _SUFFIXES.get(path.suffix.lower())
+    if graph_format not in _WRITERS:
+        raise Exception(
+            f"Unable to write a graph to {path}. Supported formats are "
+            f"{', '.join(_WRITERS)}."
+        )
+
+    jobs = list(jobs)
+    with open(path, "w", encoding="utf-8") as file:
+        writer = _WRITERS[graph_format](file, name)
+        if collapse_jobs:
+            _write_jobs(jobs, writer)
+        else:
+            _write_models(jobs, writer)
+        writer.close()
+
+
+def model_overlap(jobs: List[Job], index: NodeIndex) -> Dict[Tuple[int, int], int]:
+    """Count the models shared by every pair of jobs that overlap."""
+    bits = [(job.job_id, job.bits(index)) for job in jobs]
+    overlap = {}
+    for position, (job_id, job_bits) in enumerate(bits):
+        for other_id, other_bits in bits[position + 1 :]:
+            shared = job_bits & other_bits
+            if shared:
+                overlap[(job_id, other_id)] = NodeIndex.count(shared)
+    return overlap
@@ -0,0 +1,68 @@
+import gc
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+Shared = TypeVar("Shared")
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+# The task currently being mapped. Forked workers inherit this through
+# copy-on-write memory, so neither the shared state nor the items are pickled.
+_task: Optional[tuple] = None
+
+
+def default_workers() -> int:
+    """The number of workers to use when none is specified."""
+    return os.cpu_count() or 1
+
+
+def _run(index: int) -> Any:
+    function, shared, items = _task
+    return function(shared, items[index])
+
+
+def _executor(workers: int) -> Executor:
+    """Prefer forked processes, which share memory, and fall back to threads."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        )
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def parallel_map(
+    function: Callable[[Shared, Item], Result],
+    shared: Shared,
+    items: Sequence[Item],
+    workers: Optional[int] = None,
+) -> List[Result]:
+    """
+    Return [function(shared, item) for item in items], computed across workers.
+
+    Results are returned in the order of items. function must be defined at
+    module level so that it can be referenced by worker processes, and its
+    results must be picklable.
+    """
+    global _task
+
+    workers = min(workers or default_workers(), len(items))
+    if workers <= 1:
+        return [function(shared, item) for item in items]
+
+    if _task is not None:
+        raise RuntimeError("parallel_map calls cannot be nested.")
+
+    _task = (function, shared, items)
+
+    # Move existing objects out of the garbage collector's view so that
+    # collections in the workers do not copy every inherited page.
+    gc.freeze()
+    try:
+        with _executor(workers) as executor:
+            chunksize = max(1, len(items) // (workers * 4))
+            return list(executor.map(_run, range(len(items)), chunksize=chunksize))
+    finally:
+        gc.unfreeze()
+        _task = None
@@ -0,0 +1,199 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Optional, Set, Tuple
+
+import networkx
+from dbt.graph import UniqueId
+
+from jobby.types.job import Job
+
+
+@dataclass
+class PartitionPlan:
+    """A proposed split of one job's models into several jobs."""
+
+    partitions: List[Set[UniqueId]]
+    durations: List[float]
+    makespan: float
+    cross_edges: int
+    jobs: List[Job] = field(default_factory=list)
+
+
+class JobPartitioner:
+    """
+    Splits a set of models into jobs so that estimated wall-clock time drops.
+
+    Each job is assumed to run its models with `threads` threads, so its
+    duration is the larger of its total model time divided by threads and
+    its critical path. Jobs are numbered, and a model may only be placed in a
+    job at or after the jobs of all its parents, so the jobs form a DAG. A job
+    starts once every job it depends on has finished, and the makespan is the
+    longest path through that DAG.
+
+    Models are assigned from the leaves of the graph upwards, in order of
+    decreasing top level (the longest path of model times from the roots to a
+    model), as a list-scheduling heuristic. Each model goes to the job that
+    minimizes the resulting makespan plus `cross_edge_penalty` seconds per
+    dependency crossing jobs. Models shared by several downstream jobs are
+    drawn into earlier jobs, which the downstream jobs then wait for.
+    """
+
+    def __init__(
+        self,
+        graph: networkx.DiGraph,
+        timings: Dict[UniqueId, float],
+        threads: int = 4,
+        cross_edge_penalty: float = 1.0,
+        default_time: Optional[float] = None,
+    ) -> None:
+        self.graph = graph
+        self.timings = timings
+        self.threads = threads
+        self.cross_edge_penalty = cross_edge_penalty
+        if default_time is None:
+            known = [time for time in timings.values() if time > 0]
+            default_time = sum(known) / len(known) if len(known) > 0 else 1.0
+        self.default_time = default_time
+
+    def time(self, unique_id: UniqueId) -> float:
+        """The estimated execution time of a model, in seconds."""
+        return self.timings.get(unique_id, self.default_time)
+
+    def _makespan(
+        self,
+        loads: List[float],
+        critical_paths: List[float],
+        upstream_jobs: List[Set[int]],
+    ) -> Tuple[float, List[float]]:
+        """Return the makespan of a plan and the duration of each job."""
+        durations = [
+            max(load / self.threads, critical_path)
+            for load, critical_path in zip(loads, critical_paths)
+        ]
+        finish: List[float] = []
+        for job, duration in enumerate(durations):
+            start = max(
+                (finish[upstream] for upstream in upstream_jobs[job]), default=0
+            )
+            finish.append(start + duration)
+        return max(finish, default=0.0), durations
+
+    def partition(self, unique_ids: Collection[UniqueId], n: int) -> PartitionPlan:
+        """
+        Split unique_ids into at most n jobs.
+
+        A plan is built for every job count from 1 to n, and the one with the
+        lowest makespan plus cross-edge penalty is returned, so jobs are only
+        split when splitting pays off.
+        """
+        if n < 1:
+            raise Exception("A job can only be partitioned into one or more jobs.")
+
+        subgraph = self.graph.subgraph(unique_ids)
+        order = list(networkx.topological_sort(subgraph))
+
+        top_level: Dict[UniqueId, float] = {}
+        for unique_id in order:
+            top_level[unique_id] = self.time(unique_id) + max(
+                (top_level[parent] for parent in subgraph.predecessors(unique_id)),
+                default=0,
+            )
+
+        plans = [
+            self._partition(subgraph, order, top_level, count)
+            for count in range(1, n + 1)
+        ]
+        return min(
+            plans,
+            key=lambda plan: plan.makespan + self.cross_edge_penalty * plan.cross_edges,
+        )
+
+    def _partition(
+        self,
+        subgraph: networkx.DiGraph,
+        order: List[UniqueId],
+        top_level: Dict[UniqueId, float],
+        n: int,
+    ) -> PartitionPlan:
+        """Assign models to exactly n numbered jobs, from the leaves upwards."""
+        assignment: Dict[UniqueId, int] = {}
+        path_in_job: Dict[UniqueId, float] = {}
+        loads = [0.0] * n
+        critical_paths = [0.0] * n
+        upstream_jobs: List[Set[int]] = [set() for _ in range(n)]
+        cross_edges = 0
+
+        position = {unique_id: index for index, unique_id in enumerate(order)}
+        waiting = {
+            unique_id: subgraph.out_degree(unique_id) for unique_id in subgraph.nodes
+        }
+        ready = [
+            (-top_level[unique_id], -position[unique_id], unique_id)
+            for unique_id, count in waiting.items()
+            if count == 0
+        ]
+        heapq.heapify(ready)
+
+        while ready:
+            _, _, unique_id = heapq.heappop(ready)
+            time = self.time(unique_id)
+            children = list(subgraph.successors(unique_id))
+            latest = min((assignment[child] for child in children), default=n - 1)
+
+            best = None
+            for job in range(latest, -1, -1):
+                downstream = {assignment[c] for c in children if assignment[c] != job}
+                path = time + max(
+                    (path_in_job[c] for c in children if assignment[c] == job),
+                    default=0,
+                )
+
+                candidate_loads = list(loads)
+                candidate_loads[job] += time
+                candidate_paths = list(critical_paths)
+                candidate_paths[job] = max(candidate_paths[job], path)
+                candidate_upstream = list(upstream_jobs)
+                for other in downstream:
+                    candidate_upstream[other] = upstream_jobs[other] | {job}
+
+                makespan, _ = self._makespan(
+                    candidate_loads, candidate_paths, candidate_upstream
+                )
+                crossed = sum(1 for c in children if assignment[c] != job)
+                cost = (
+                    makespan + self.cross_edge_penalty * crossed,
+                    candidate_loads[job],
+                    -job,
+                )
+                if best is None or cost < best[0]:
+                    best = (cost, job, path, downstream, crossed)
+
+            _, job, path, downstream, crossed = best
+            assignment[unique_id] = job
+            path_in_job[unique_id] = path
+            loads[job] += time
+            critical_paths[job] = max(critical_paths[job], path)
+            for other in downstream:
+                upstream_jobs[other].add(job)
+            cross_edges += crossed
+
+            for parent in subgraph.predecessors(unique_id):
+                waiting[parent] -= 1
+                if waiting[parent] == 0:
+                    heapq.heappush(
+                        ready, (-top_level[parent], -position[parent], parent)
+                    )
+
+        makespan, durations = self._makespan(loads, critical_paths, upstream_jobs)
+
+        partitions: List[Set[UniqueId]] = [set() for _ in range(n)]
+        for unique_id, job in assignment.items():
+            partitions[job].add(unique_id)
+        used = [job for job in range(n) if len(partitions[job]) > 0]
+
+        return PartitionPlan(
+            partitions=[partitions[job] for job in used],
+            durations=[durations[job] for job in used],
+            makespan=makespan,
+            cross_edges=cross_edges,
+        )
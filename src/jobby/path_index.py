@@ -0,0 +1,90 @@
+from fnmatch import fnmatchcase
+from pathlib import PurePath
+from typing import Dict, Iterable, List, Set, Tuple
+
+from dbt.graph import UniqueId
+
+_WILDCARDS = set("*?[")
+
+
+class _PathEntry:
+    __slots__ = ("children", "unique_ids")
+
+    def __init__(self):
+        self.children: Dict[str, _PathEntry] = {}
+        self.unique_ids: List[UniqueId] = []
+
+    @property
+    def is_directory(self) -> bool:
+        return len(self.children) > 0
+
+
+class PathIndex:
+    """
+    An in-memory trie of node file paths that answers `path:` selectors.
+
+    Globs are matched with the same rules as `pathlib.Path.glob`, but against
+    the `original_file_path` of every node instead of the filesystem. A node is
+    selected when its file, or any directory containing it, matches.
+    """
+
+    def __init__(self, nodes: Iterable[Tuple[UniqueId, str]]) -> None:
+        self._root = _PathEntry()
+        for unique_id, original_file_path in nodes:
+            entry = self._root
+            for part in PurePath(original_file_path).parts:
+                entry = entry.children.setdefault(part, _PathEntry())
+            entry.unique_ids.append(unique_id)
+
+    def _directories(self, entry: _PathEntry) -> Iterable[_PathEntry]:
+        """Yield a directory and every directory beneath it."""
+        stack = [entry]
+        while stack:
+            entry = stack.pop()
+            yield entry
+            stack.extend(
+                child for child in entry.children.values() if child.is_directory
+            )
+
+    def _match(self, parts: Tuple[str, ...]) -> List[_PathEntry]:
+        entries = [self._root]
+        for position, part in enumerate(parts):
+            final = position == len(parts) - 1
+            matches: List[_PathEntry] = []
+
+            for entry in entries:
+                if part == "**":
+                    if entry.is_directory:
+                        matches.extend(self._directories(entry))
+                elif _WILDCARDS.intersection(part):
+                    matches.extend(
+                        child
+                        for name, child in entry.children.items()
+                        if fnmatchcase(name, part) and (final or child.is_directory)
+                    )
+                elif part in entry.children:
+                    matches.append(entry.children[part])
+
+            # Recursive wildcards can reach the same entry more than once.
+            entries = list({id(entry): entry for entry in matches}.values())
+
+        return entries
+
+    def search(self, selector: str) -> Set[UniqueId]:
+        """Return the unique_ids of every node located at or below a matching path."""
+        parts = PurePath(selector).parts
+        if len(parts) == 0:
+            raise ValueError(f"Unacceptable path selector: {selector!r}")
+
+        selected: Set[UniqueId] = set()
+        visited: Set[int] = set()
+        stack = self._match(parts)
+        while stack:
+            entry = stack.pop()
+            if id(entry) in visited:
+                continue
+            visited.add(id(entry))
+            selected.update(entry.unique_ids)
+            stack.extend(entry.children.values())
+
+        return selected
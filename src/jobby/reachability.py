@@ -0,0 +1,161 @@
+from typing import Callable, Collection, Container, Dict, Iterable, List, Set, Tuple
+
+import networkx
+from dbt.graph import UniqueId
+
+from jobby.types.node_index import NodeIndex
+
+
+class ReachabilityIndex:
+    """
+    Adjacency and transitive closures of a graph, keyed by NodeIndex positions.
+
+    Parents and children are stored as tuples of positions. Ancestor and
+    descendant closures are bitsets over the NodeIndex, computed on first use
+    from the closures of each neighbour and memoized, so "everything upstream
+    of X inside job J" is `ancestors(X) & job.bits(index)`.
+    """
+
+    def __init__(self, graph: networkx.DiGraph, index: NodeIndex) -> None:
+        self.index = index
+        for unique_id in graph.nodes:
+            index.add(unique_id)
+
+        self._parents: List[Tuple[int, ...]] = [()] * len(index)
+        self._children: List[Tuple[int, ...]] = [()] * len(index)
+        position = index.positions
+        for unique_id in graph.nodes:
+            self._parents[position[unique_id]] = tuple(
+                position[parent] for parent in graph.predecessors(unique_id)
+            )
+            self._children[position[unique_id]] = tuple(
+                position[child] for child in graph.successors(unique_id)
+            )
+
+        self._ancestors: Dict[int, int] = {}
+        self._descendants: Dict[int, int] = {}
+
+    def __contains__(self, unique_id: UniqueId) -> bool:
+        """Return True if the node was in the graph the index was built from."""
+        position = self.index.positions.get(unique_id)
+        return position is not None and position < len(self._parents)
+
+    def parents(self, unique_id: UniqueId) -> Set[UniqueId]:
+        """Return the direct parents of a node."""
+        unique_ids = self.index.unique_ids
+        return {
+            unique_ids[parent]
+            for parent in self._parents[self.index.position(unique_id)]
+        }
+
+    def children(self, unique_id: UniqueId) -> Set[UniqueId]:
+        """Return the direct children of a node."""
+        unique_ids = self.index.unique_ids
+        children = self._children[self.index.position(unique_id)]
+        return {unique_ids[child] for child in children}
+
+    @staticmethod
+    def _closure(
+        position: int, adjacency: List[Tuple[int, ...]], memo: Dict[int, int]
+    ) -> int:
+        """Compute the transitive closure of a node, memoizing every node visited."""
+        stack = [position]
+        while stack:
+            node = stack[-1]
+            if node in memo:
+                stack.pop()
+                continue
+
+            pending = [
+                neighbour for neighbour in adjacency[node] if neighbour not in memo
+            ]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            bits = 0
+            for neighbour in adjacency[node]:
+                bits |= memo[neighbour] | (1 << neighbour)
+            memo[node] = bits
+
+        return memo[position]
+
+    def ancestors(self, unique_id: UniqueId) -> int:
+        """Return every node upstream of unique_id, as a bitset."""
+        return self._closure(
+            self.index.position(unique_id), self._parents, self._ancestors
+        )
+
+    def descendants(self, unique_id: UniqueId) -> int:
+        """Return every node downstream of unique_id, as a bitset."""
+        return self._closure(
+            self.index.position(unique_id), self._children, self._descendants
+        )
+
+    def ancestors_of(self, unique_ids: Iterable[UniqueId]) -> int:
+        """Return every node upstream of any of unique_ids, as a bitset."""
+        bits = 0
+        for unique_id in unique_ids:
+            bits |= self.ancestors(unique_id)
+        return bits
+
+    def descendants_of(self, unique_ids: Iterable[UniqueId]) -> int:
+        """Return every node downstream of any of unique_ids, as a bitset."""
+        bits = 0
+        for unique_id in unique_ids:
+            bits |= self.descendants(unique_id)
+        return bits
+
+    def external_parents(self, unique_ids: Collection[UniqueId]) -> Set[UniqueId]:
+        """
+        Return the parents of a set of nodes that are not themselves in the set.
+
+        Nodes that are not in the index, such as the models of a job resolved
+        against an older manifest, are skipped.
+        """
+        index = self.index
+        parents = {
+            index.unique_ids[parent]
+            for unique_id in unique_ids
+            if unique_id in self
+            for parent in self._parents[index.position(unique_id)]
+        }
+        return {parent for parent in parents if parent not in unique_ids}
+
+    def upstream_within(
+        self,
+        seeds: Iterable[UniqueId],
+        within: Container[UniqueId],
+        expand: Callable[[UniqueId], bool] = lambda unique_id: True,
+    ) -> List[UniqueId]:
+        """
+        Return the nodes of `within` that are reachable upstream from seeds.
+
+        Only paths that stay inside `within` are followed, and the search only
+        continues past nodes for which `expand` is true. Nodes are returned in
+        the order they are reached. The cost is proportional to the nodes
+        reached, not to the size of the graph.
+        """
+        unique_ids = self.index.unique_ids
+        positions = self.index.positions
+
+        reached: List[UniqueId] = []
+        visited: Set[UniqueId] = set()
+        stack = [seed for seed in seeds if seed in within]
+        while stack:
+            unique_id = stack.pop()
+            if unique_id in visited:
+                continue
+            visited.add(unique_id)
+            reached.append(unique_id)
+
+            if not expand(unique_id):
+                continue
+
+            for parent in self._parents[positions[unique_id]]:
+                parent_id = unique_ids[parent]
+                if parent_id in within and parent_id not in visited:
+                    stack.append(parent_id)
+
+        return reached
@@ -0,0 +1,255 @@
+from dataclasses import dataclass, field
+from operator import attrgetter
+from pathlib import PurePath
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx
+from dbt.graph import UniqueId
+
+from jobby.path_index import PathIndex
+from jobby.selector_engine import (
+    SELECTOR_GLOB,
+    SELECTOR_PATTERN,
+    default_method,
+    is_selected_node,
+    parse_source_selector,
+)
+from jobby.types.manifest import GenericNode, Manifest
+
+Edge = Tuple[UniqueId, UniqueId]
+
+# Every property of a node that selectors and the graph depend on.
+_node_state = attrgetter(*GenericNode.__slots__)
+
+
+def linked_parents(manifest: Manifest, node: GenericNode) -> Set[UniqueId]:
+    """Return the parents that dbt's Linker gives a node in the compiled graph."""
+    parents = set()
+    for dependency in node.depends_on_nodes:
+        if (
+            dependency not in manifest.nodes
+            and dependency not in manifest.sources
+            and dependency not in manifest.metrics
+        ):
+            raise Exception(
+                f"{node.unique_id} depends on {dependency}, which was not found "
+                "in the manifest."
+            )
+        parents.add(dependency)
+    return parents
+
+
+@dataclass
+class ManifestDiff:
+    """The nodes and graph edges that differ between two manifests."""
+
+    added: Set[UniqueId]
+    removed: Set[UniqueId]
+    # Nodes whose name, fqn, tags, paths, config or dependencies changed.
+    modified: Set[UniqueId]
+    edges_added: Set[Edge]
+    edges_removed: Set[Edge]
+
+    @property
+    def changed(self) -> Set[UniqueId]:
+        return self.added | self.removed | self.modified
+
+
+@dataclass
+class RefreshReport(ManifestDiff):
+    """What a Jobby.refresh changed."""
+
+    # The number of cached selector atoms that had to be evaluated again.
+    invalidated_atoms: int = 0
+    # The models added to and removed from each job whose models changed.
+    jobs: Dict[int, Tuple[Set[UniqueId], Set[UniqueId]]] = field(default_factory=dict)
+
+
+def diff_manifests(
+    old: Manifest, new: Manifest, graph: networkx.DiGraph
+) -> ManifestDiff:
+    """
+    Compare a new manifest with the manifest that `graph` was compiled from.
+
+    Edges are only recomputed for added and modified nodes, since a node's
+    edges come from its own dependencies.
+    """
+    old_nodes = dict(old.all_nodes())
+    new_nodes = dict(new.all_nodes())
+
+    added = set(new_nodes.keys() - old_nodes.keys())
+    removed = set(old_nodes.keys() - new_nodes.keys())
+    modified = {
+        unique_id
+        for unique_id in new_nodes.keys() & old_nodes.keys()
+        if _node_state(old_nodes[unique_id]) != _node_state(new_nodes[unique_id])
+    }
+
+    edges_added: Set[Edge] = set()
+    edges_removed: Set[Edge] = set()
+    for unique_id in added | modified:
+        parents = linked_parents(new, new_nodes[unique_id])
+        previous = set(graph.predecessors(unique_id)) if unique_id in graph else set()
+        edges_added.update((parent, unique_id) for parent in parents - previous)
+        edges_removed.update((parent, unique_id) for parent in previous - parents)
+
+    for unique_id in removed:
+        if unique_id not in graph:
+            continue
+        edges_removed.update(graph.in_edges(unique_id))
+        for child in graph.successors(unique_id):
+            if child in new_nodes and child not in modified:
+                # Unchanged nodes cannot lose a parent, so this raises.
+                linked_parents(new, new_nodes[child])
+            edges_removed.add((unique_id, child))
+
+    return ManifestDiff(added, removed, modified, edges_added, edges_removed)
+
+
+def apply_diff(graph: networkx.DiGraph, diff: ManifestDiff) -> None:
+    """Patch a compiled graph in place. Raises, unchanged, if a cycle is created."""
+    graph.remove_nodes_from(diff.removed)
+    graph.add_nodes_from(sorted(diff.added))
+    graph.remove_edges_from(diff.edges_removed)
+    graph.add_edges_from(diff.edges_added)
+
+    # A new edge can only close a cycle if its parent is downstream of its child.
+    parents = {parent for parent, _ in diff.edges_added}
+    downstream = reach(graph, (child for _, child in diff.edges_added), upstream=False)
+    if parents.isdisjoint(downstream):
+        return
+
+    try:
+        cycle = networkx.find_cycle(graph)
+    except networkx.NetworkXNoCycle:
+        return
+
+    graph.remove_edges_from(diff.edges_added)
+    graph.remove_nodes_from(diff.added)
+    graph.add_nodes_from(diff.removed)
+    graph.add_edges_from(diff.edges_removed)
+    raise RuntimeError("Found a cycle: {}".format(cycle))
+
+
+def reach(
+    graph: networkx.DiGraph, seeds: Iterable[UniqueId], upstream: bool
+) -> Set[UniqueId]:
+    """Return the seeds in `graph` and every node upstream or downstream of them."""
+    neighbours = graph.predecessors if upstream else graph.successors
+    reached = {seed for seed in seeds if seed in graph}
+    stack = list(reached)
+    while stack:
+        for neighbour in neighbours(stack.pop()):
+            if neighbour not in reached:
+                reached.add(neighbour)
+                stack.append(neighbour)
+    return reached
+
+
+class SelectionInvalidator:
+    """
+    Decides which cached selector atoms a manifest change can affect.
+
+    An atom's seeds can only change if its criterion matches a changed node,
+    in either version of the manifest. `+x` can only change if a seed is
+    downstream of a changed node, and `x+` if a seed is upstream of one, in
+    either graph, so those criteria are also matched against the changed
+    nodes' descendants or ancestors. Atoms using `@`, or methods that are not
+    understood here, are always invalidated.
+    """
+
+    def __init__(
+        self,
+        changed: List[GenericNode],
+        upstream: List[GenericNode],
+        downstream: List[GenericNode],
+    ) -> None:
+        self._groups: Dict[str, List[GenericNode]] = {
+            "changed": changed,
+            "upstream": upstream,
+            "downstream": downstream,
+        }
+        self._names: Dict[str, Set[str]] = {}
+        self._paths: Dict[str, PathIndex] = {}
+
+    def _names_of(self, group: str) -> Set[str]:
+        """The node names, packages and top-level directories of a group."""
+        if group not in self._names:
+            names = set()
+            for node in self._groups[group]:
+                names.update((node.fqn[-1], node.fqn[0].split(".")[0]))
+                if len(node.fqn) > 1:
+                    names.add(node.fqn[1].split(".")[0])
+            self._names[group] = names
+        return self._names[group]
+
+    def _paths_of(self, group: str) -> PathIndex:
+        if group not in self._paths:
+            self._paths[group] = PathIndex(
+                (node.unique_id, node.original_file_path)
+                for node in self._groups[group]
+            )
+        return self._paths[group]
+
+    def _matches(self, group: str, method: str, value: str) -> bool:
+        """Return True if a criterion might select any node of a group."""
+        nodes = self._groups[group]
+        if len(nodes) == 0:
+            return False
+
+        if method == "fqn":
+            if "." not in value and value != SELECTOR_GLOB:
+                return value in self._names_of(group)
+            return any(
+                is_selected_node(node.fqn, value)
+                or (len(node.fqn) > 1 and is_selected_node(node.fqn[1:], value))
+                for node in nodes
+            )
+        if method == "tag":
+            return any(value in node.tags for node in nodes)
+        if method == "path":
+            try:
+                return len(self._paths_of(group).search(value)) > 0
+            except ValueError:
+                return True
+        if method == "file":
+            return any(
+                PurePath(node.original_file_path).name == value for node in nodes
+            )
+        if method == "package":
+            return any(node.package_name == value for node in nodes)
+        if method == "source":
+            package, source, table = parse_source_selector(value)
+            return any(
+                node.unique_id.startswith("source.")
+                and package in (node.package_name, SELECTOR_GLOB)
+                and source in (node.source_name, SELECTOR_GLOB)
+                and table in (None, node.name, SELECTOR_GLOB)
+                for node in nodes
+            )
+
+        return True
+
+    def affects(self, atom: Optional[str]) -> bool:
+        """Return True if an atom's cached result may be stale."""
+        if atom is None:
+            return True
+
+        for criterion in atom.split(","):
+            match = SELECTOR_PATTERN.match(criterion)
+            if match is None or match["childrens_parents"]:
+                return True
+
+            value = match["value"]
+            method = match["method"] or default_method(value)
+
+            groups = ["changed"]
+            if match["parents"]:
+                groups.append("downstream")
+            if match["children"]:
+                groups.append("upstream")
+
+            if any(self._matches(group, method, value) for group in groups):
+                return True
+
+        return False
@@ -0,0 +1,134 @@
+import heapq
+import json
+import statistics
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Union
+
+import networkx
+from dbt.graph import UniqueId
+
+RunResultsSource = Union[str, Path, bytes]
+
+
+def read_run_results(source: RunResultsSource) -> Dict[UniqueId, float]:
+    """Return the execution time, in seconds, of each node in a run_results.json."""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as file:
+            source = file.read()
+
+    run_results = json.loads(source)
+
+    return {
+        result["unique_id"]: float(result.get("execution_time") or 0.0)
+        for result in run_results.get("results", [])
+    }
+
+
+def combine_timings(timings: List[Dict[UniqueId, float]]) -> Dict[UniqueId, float]:
+    """Combine the timings of several runs, taking the median time of each node."""
+    samples: Dict[UniqueId, List[float]] = {}
+    for run_timings in timings:
+        for unique_id, execution_time in run_timings.items():
+            samples.setdefault(unique_id, []).append(execution_time)
+
+    return {
+        unique_id: statistics.median(execution_times)
+        for unique_id, execution_times in samples.items()
+    }
+
+
+@dataclass
+class RuntimeEstimate:
+    """Estimated build time of a set of models, in seconds."""
+
+    # The sum of every model's execution time.
+    total_time: float
+    # The slowest chain of dependent models, and its total execution time.
+    critical_path: List[UniqueId]
+    critical_path_time: float
+    # The estimated wall-clock time when run with `threads` threads.
+    threads: int
+    makespan: float
+    # Models without a recorded execution time, which were given a default.
+    missing: List[UniqueId] = field(default_factory=list)
+
+    @property
+    def parallelism(self) -> float:
+        """The average number of models running at once with `threads` threads."""
+        return self.total_time / self.makespan if self.makespan > 0 else 0.0
+
+    @property
+    def max_parallelism(self) -> float:
+        """The average parallelism that unlimited threads could achieve."""
+        if self.critical_path_time == 0:
+            return 0.0
+        return self.total_time / self.critical_path_time
+
+
+def estimate_runtime(
+    graph: networkx.DiGraph,
+    unique_ids: Collection[UniqueId],
+    timings: Dict[UniqueId, float],
+    threads: int = 4,
+    default_time: Optional[float] = None,
+) -> RuntimeEstimate:
+    """
+    Estimate the build time of a set of models from per-model execution times.
+
+    The critical path is the longest path of execution times through the
+    models' subgraph. The makespan is found by simulating `threads` workers
+    that each pick up the next ready model in topological order, as dbt does.
+    """
+    if default_time is None:
+        known = [timings[unique_id] for unique_id in unique_ids if unique_id in timings]
+        default_time = sum(known) / len(known) if len(known) > 0 else 0.0
+
+    subgraph = graph.subgraph(unique_ids)
+    order = list(networkx.topological_sort(subgraph))
+    missing = [unique_id for unique_id in order if unique_id not in timings]
+    time = {unique_id: timings.get(unique_id, default_time) for unique_id in order}
+
+    # Critical path.
+    finish: Dict[UniqueId, float] = {}
+    previous: Dict[UniqueId, Optional[UniqueId]] = {}
+    for unique_id in order:
+        parent = max(subgraph.predecessors(unique_id), key=finish.get, default=None)
+        previous[unique_id] = parent
+        finish[unique_id] = time[unique_id] + (
+            finish[parent] if parent is not None else 0.0
+        )
+
+    critical_path: List[UniqueId] = []
+    node = max(finish, key=finish.get, default=None)
+    while node is not None:
+        critical_path.append(node)
+        node = previous[node]
+    critical_path.reverse()
+
+    # Makespan with a fixed number of threads.
+    position = {unique_id: index for index, unique_id in enumerate(order)}
+    waiting = {unique_id: subgraph.in_degree(unique_id) for unique_id in order}
+    ready = [position[unique_id] for unique_id in order if waiting[unique_id] == 0]
+    heapq.heapify(ready)
+    running: List = []
+    now = 0.0
+    while ready or running:
+        while ready and len(running) < max(threads, 1):
+            unique_id = order[heapq.heappop(ready)]
+            heapq.heappush(running, (now + time[unique_id], position[unique_id]))
+
+        now, index = heapq.heappop(running)
+        for child in subgraph.successors(order[index]):
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                heapq.heappush(ready, position[child])
+
+    return RuntimeEstimate(
+        total_time=sum(time.values()),
+        critical_path=critical_path,
+        critical_path_time=finish[critical_path[-1]] if critical_path else 0.0,
+        threads=threads,
+        makespan=now,
+        missing=missing,
+    )
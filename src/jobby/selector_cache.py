@@ -0,0 +1,182 @@
+from dataclasses import dataclass, asdict
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from dbt.graph import UniqueId
+from loguru import logger
+
+# A normalized selection: the sorted, de-duplicated atoms of a --select or
+# --exclude argument. None stands for dbt's default selection.
+Atoms = Optional[Tuple[str, ...]]
+SelectorKey = Tuple[Atoms, Atoms]
+
+
+def normalize_selector(selector: Optional[List[str]]) -> Atoms:
+    """Split a select or exclude list into its sorted, unique union members."""
+    if selector is None:
+        return None
+    return tuple(sorted({atom for element in selector for atom in element.split()}))
+
+
+def selector_key(
+    select: Optional[List[str]], exclude: Optional[List[str]]
+) -> SelectorKey:
+    """Return a hashable, normalized key for a (select, exclude) pair."""
+    return normalize_selector(select), normalize_selector(exclude) or ()
+
+
+def key_atoms(key: SelectorKey) -> Iterator[Optional[str]]:
+    """Yield every atom of a key. None stands for dbt's default selection."""
+    select_atoms, exclude_atoms = key
+    yield from (None,) if select_atoms is None else select_atoms
+    yield from exclude_atoms
+
+
+@dataclass
+class SelectorCacheStats:
+    hits: int = 0
+    misses: int = 0
+    atom_hits: int = 0
+    atom_misses: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class BatchResolutionStats:
+    selections: int = 0
+    unique_selections: int = 0
+    unique_atoms: int = 0
+    evaluations: int = 0
+
+    @property
+    def saved(self) -> int:
+        """Evaluations avoided compared with resolving every selection through dbt."""
+        return self.selections - self.evaluations
+
+    def as_dict(self) -> Dict[str, int]:
+        return {**asdict(self), "saved": self.saved}
+
+
+class SelectorCache:
+    """
+    Memoizes selector evaluation per (select, exclude) pair and per selector atom.
+
+    A selection is the union of its select atoms minus the union of its exclude
+    atoms, so caching each atom lets `a b c` reuse earlier results for `a`, `b`
+    and `c`. Entries are only valid for the manifest and graph they were
+    computed against, and are dropped as soon as either changes.
+    """
+
+    def __init__(
+        self,
+        evaluator: Callable[[Optional[List[str]], Optional[List[str]]], Set[UniqueId]],
+    ) -> None:
+        self._evaluate = evaluator
+        self._selectors: Dict[SelectorKey, FrozenSet[UniqueId]] = {}
+        self._atoms: Dict[Optional[str], FrozenSet[UniqueId]] = {}
+        self._manifest = None
+        self._graph = None
+        self.stats = SelectorCacheStats()
+
+    def bind(self, manifest, graph) -> None:
+        """Associate the cache with a manifest and graph. Clear it if they changed."""
+        if manifest is self._manifest and graph is self._graph:
+            return
+
+        if self._manifest is not None:
+            logger.debug("Manifest or graph changed. Clearing the selector cache.")
+        self.clear()
+        self._manifest = manifest
+        self._graph = graph
+
+    def clear(self) -> None:
+        """Drop every cached selection."""
+        self._selectors.clear()
+        self._atoms.clear()
+
+    def atoms(self) -> List[Optional[str]]:
+        """Return every atom with a cached result."""
+        return list(self._atoms)
+
+    def invalidate(self, atoms: Iterable[Optional[str]]) -> int:
+        """
+        Drop the cached results of some atoms, and of every selection using them.
+
+        Returns the number of selections dropped.
+        """
+        atoms = {atom for atom in atoms if atom in self._atoms}
+        for atom in atoms:
+            del self._atoms[atom]
+
+        stale = [key for key in self._selectors if atoms.intersection(key_atoms(key))]
+        for key in stale:
+            del self._selectors[key]
+
+        return len(stale)
+
+    def missing_atoms(self, keys: Iterable[SelectorKey]) -> List[Optional[str]]:
+        """Return the distinct atoms used by keys that have not been evaluated yet."""
+        atoms: Dict[Optional[str], None] = {}
+        for select_atoms, exclude_atoms in keys:
+            if select_atoms is None:
+                atoms[None] = None
+            else:
+                atoms.update(dict.fromkeys(select_atoms))
+            atoms.update(dict.fromkeys(exclude_atoms))
+
+        return [atom for atom in atoms if atom not in self._atoms]
+
+    def store_atom(self, atom: Optional[str], result: Iterable[UniqueId]) -> None:
+        """Record the result of an atom that was evaluated elsewhere."""
+        self.stats.atom_misses += 1
+        self._atoms[atom] = frozenset(result)
+
+    def evaluate_atom(self, atom: Optional[str]) -> FrozenSet[UniqueId]:
+        """Evaluate a single union member. None evaluates dbt's default selection."""
+        if atom in self._atoms:
+            self.stats.atom_hits += 1
+            return self._atoms[atom]
+
+        self.stats.atom_misses += 1
+        result = frozenset(self._evaluate(None if atom is None else [atom], []))
+        self._atoms[atom] = result
+        return result
+
+    def _evaluate_atoms(self, atoms: Atoms) -> Set[UniqueId]:
+        if atoms is None:
+            return set(self.evaluate_atom(None))
+
+        output: Set[UniqueId] = set()
+        for atom in atoms:
+            output.update(self.evaluate_atom(atom))
+        return output
+
+    def evaluate(
+        self, select: Optional[List[str]], exclude: Optional[List[str]]
+    ) -> Set[UniqueId]:
+        """Get a set of models given a select and exclude statement"""
+        key = selector_key(select, exclude)
+
+        if key in self._selectors:
+            self.stats.hits += 1
+            return set(self._selectors[key])
+
+        self.stats.misses += 1
+        select_atoms, exclude_atoms = key
+        result = self._evaluate_atoms(select_atoms)
+        if len(exclude_atoms) > 0:
+            result.difference_update(self._evaluate_atoms(exclude_atoms))
+
+        self._selectors[key] = frozenset(result)
+        return result
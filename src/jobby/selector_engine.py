@@ -0,0 +1,356 @@
+import os
+import re
+from array import array
+from pathlib import PurePath
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from dbt.graph import UniqueId
+from dbt.node_types import NodeType
+from loguru import logger
+
+from jobby.types.manifest import GenericNode, Manifest
+
+# dbt's grammar for a single selection criterion, e.g. `@tag:nightly` or `2+model+`.
+SELECTOR_PATTERN = re.compile(
+    r"\A"
+    r"(?P<childrens_parents>(\@))?"
+    r"(?P<parents>((?P<parents_depth>(\d*))\+))?"
+    r"((?P<method>([\w.]+)):)?(?P<value>(.*?))"
+    r"(?P<children>(\+(?P<children_depth>(\d*))))?"
+    r"\Z"
+)
+SELECTOR_GLOB = "*"
+
+
+def _depth(raw: Optional[str]) -> Optional[int]:
+    return int(raw) if raw else None
+
+
+def is_selected_node(fqn: Sequence[str], selector: str) -> bool:
+    """Match a node's fqn against an fqn selector, as dbt does."""
+    if fqn[-1] == selector:
+        return True
+
+    flat_fqn = [item for segment in fqn for item in segment.split(".")]
+    parts = selector.split(".")
+    if len(flat_fqn) < len(parts):
+        return False
+
+    for position, part in enumerate(parts):
+        if part == SELECTOR_GLOB:
+            return True
+        if flat_fqn[position] != part:
+            return False
+
+    return True
+
+
+def default_method(value: str) -> str:
+    """Return the selector method dbt uses for a criterion without one."""
+    if os.path.sep in value or (os.path.altsep and os.path.altsep in value):
+        return "path"
+    if value.lower().endswith((".sql", ".py", ".csv")):
+        return "file"
+    return "fqn"
+
+
+def parse_source_selector(selector: str) -> Tuple[str, str, Optional[str]]:
+    """Split a `source:` selector value into its package, source and table."""
+    parts = selector.split(".")
+    if len(parts) == 1:
+        return SELECTOR_GLOB, parts[0], None
+    if len(parts) == 2:
+        return SELECTOR_GLOB, parts[0], parts[1]
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2]
+
+    raise Exception(
+        f'Invalid source selector value "{selector}". Sources must be of the '
+        "form `${source_name}`, `${source_name}.${target_name}`, or "
+        "`${package_name}.${source_name}.${target_name}`"
+    )
+
+
+class CSRGraph:
+    """
+    A directed graph in compressed sparse row form.
+
+    Nodes are dense integer positions. The neighbours of node `i` are
+    `targets[offsets[i]:offsets[i + 1]]`, so the whole adjacency structure is
+    two flat integer arrays.
+    """
+
+    def __init__(self, size: int, edges: Sequence[Tuple[int, int]]) -> None:
+        self.size = size
+
+        counts = [0] * (size + 1)
+        for source, _ in edges:
+            counts[source + 1] += 1
+        for position in range(size):
+            counts[position + 1] += counts[position]
+
+        cursor = counts[:-1]
+        targets = array("l", bytes(array("l").itemsize * len(edges)))
+        for source, target in edges:
+            targets[cursor[source]] = target
+            cursor[source] += 1
+
+        self.offsets = array("l", counts)
+        self.targets = targets
+
+    def transpose(self) -> "CSRGraph":
+        """Return the graph with every edge reversed."""
+        offsets, targets = self.offsets, self.targets
+        return CSRGraph(
+            self.size,
+            [
+                (targets[edge], source)
+                for source in range(self.size)
+                for edge in range(offsets[source], offsets[source + 1])
+            ],
+        )
+
+    def neighbours(self, position: int) -> array:
+        return self.targets[self.offsets[position] : self.offsets[position + 1]]
+
+    def reach(self, seeds: Iterable[int], depth: Optional[int] = None) -> Set[int]:
+        """
+        Return the nodes reachable from seeds in at most `depth` steps.
+
+        Like the breadth-first search behind dbt's graph operators, a depth of
+        None is unlimited and a depth of 0 behaves like 1. Seeds are only
+        included when they are reachable from another seed.
+        """
+        offsets, targets = self.offsets, self.targets
+        visited = bytearray(self.size)
+        reached: List[int] = []
+
+        frontier = list(seeds)
+        steps = None if depth is None else max(depth, 1)
+        while len(frontier) > 0 and (steps is None or steps > 0):
+            next_frontier = []
+            for node in frontier:
+                for neighbour in targets[offsets[node] : offsets[node + 1]]:
+                    if not visited[neighbour]:
+                        visited[neighbour] = 1
+                        next_frontier.append(neighbour)
+            reached.extend(next_frontier)
+            frontier = next_frontier
+            if steps is not None:
+                steps -= 1
+
+        return set(reached)
+
+
+class SelectorEngine:
+    """
+    An in-process implementation of dbt's node selection syntax.
+
+    The manifest's dependency graph is held as a pair of CSR graphs (children
+    and parents) over NodeIndex positions, restricted to the nodes dbt can
+    select. Supported syntax: node names and fqn patterns, `fqn:`, `tag:`,
+    `path:`, `file:`, `package:` and `source:` methods, the `+`, `n+` and `@`
+    graph operators, `,` intersections, space-separated unions, and excludes.
+    Like ResourceTypeSelector with [NodeType.Model], results contain models
+    only.
+    """
+
+    def __init__(self, manifest: Manifest) -> None:
+        self.manifest = manifest
+        self.index = manifest.node_index
+        positions = self.index.positions
+
+        size = len(self.index)
+        self.members = bytearray(size)
+        self.models = bytearray(size)
+        for unique_id, node in manifest.all_nodes():
+            position = positions[unique_id]
+            if manifest.is_graph_member(unique_id):
+                self.members[position] = 1
+                self.models[position] = node.resource_type == NodeType.Model
+
+        # Edges are linked the same way dbt's Linker does, from the
+        # dependencies of nodes, exposures and metrics.
+        edges: List[Tuple[int, int]] = []
+        for section in (manifest.nodes, manifest.exposures, manifest.metrics):
+            for unique_id, node in section.items():
+                child = positions[unique_id]
+                if not self.members[child]:
+                    continue
+                for dependency in node.depends_on_nodes:
+                    parent = positions.get(dependency)
+                    if parent is not None and self.members[parent]:
+                        edges.append((parent, child))
+
+        self.children = CSRGraph(size, edges)
+        self.parents = self.children.transpose()
+
+        # Plain names select the nodes whose name, package or top-level
+        # directory matches, so index all three.
+        self._names: Dict[str, Set[int]] = {}
+        self._tags: Dict[str, Set[int]] = {}
+        for unique_id, node in manifest.all_nodes():
+            position = positions[unique_id]
+            if not self.members[position]:
+                continue
+
+            for tag in node.tags:
+                self._tags.setdefault(tag, set()).add(position)
+
+            if unique_id not in manifest.nodes:
+                continue
+            keys = {node.fqn[-1], node.fqn[0].split(".")[0]}
+            if len(node.fqn) > 1:
+                keys.add(node.fqn[1].split(".")[0])
+            for key in keys:
+                self._names.setdefault(key, set()).add(position)
+
+        self._methods: Dict[str, Callable[[str], Set[int]]] = {
+            "fqn": self._search_fqn,
+            "tag": self._search_tag,
+            "path": self._search_path,
+            "file": self._search_file,
+            "package": self._search_package,
+            "source": self._search_source,
+        }
+
+    def _member_nodes(
+        self, sections: Iterable[Dict]
+    ) -> Iterator[Tuple[int, GenericNode]]:
+        positions = self.index.positions
+        for section in sections:
+            for unique_id, node in section.items():
+                position = positions[unique_id]
+                if self.members[position]:
+                    yield position, node
+
+    def _all_sections(self) -> Tuple[Dict, ...]:
+        manifest = self.manifest
+        return manifest.nodes, manifest.sources, manifest.exposures, manifest.metrics
+
+    def _search_fqn(self, selector: str) -> Set[int]:
+        if "." not in selector and selector != SELECTOR_GLOB:
+            return set(self._names.get(selector, ()))
+
+        return {
+            position
+            for position, node in self._member_nodes([self.manifest.nodes])
+            if is_selected_node(node.fqn, selector)
+            or (len(node.fqn) > 1 and is_selected_node(node.fqn[1:], selector))
+        }
+
+    def _search_tag(self, selector: str) -> Set[int]:
+        return set(self._tags.get(selector, ()))
+
+    def _search_path(self, selector: str) -> Set[int]:
+        positions = self.index.positions
+        return {
+            positions[unique_id]
+            for unique_id in self.manifest.path_index.search(selector)
+            if self.members[positions[unique_id]]
+        }
+
+    def _search_file(self, selector: str) -> Set[int]:
+        return {
+            position
+            for position, node in self._member_nodes(self._all_sections())
+            if PurePath(node.original_file_path).name == selector
+        }
+
+    def _search_package(self, selector: str) -> Set[int]:
+        return {
+            position
+            for position, node in self._member_nodes(self._all_sections())
+            if node.package_name == selector
+        }
+
+    def _search_source(self, selector: str) -> Set[int]:
+        target_package, target_source, target_table = parse_source_selector(selector)
+        return {
+            position
+            for position, node in self._member_nodes([self.manifest.sources])
+            if target_package in (node.package_name, SELECTOR_GLOB)
+            and target_source in (node.source_name, SELECTOR_GLOB)
+            and target_table in (None, node.name, SELECTOR_GLOB)
+        }
+
+    def _select_criterion(self, criterion: str) -> Set[int]:
+        """Return the nodes selected by one criterion, such as `+tag:nightly`."""
+        match = SELECTOR_PATTERN.match(criterion)
+        if match is None:
+            raise Exception(f'Invalid selector spec "{criterion}"')
+
+        if match["childrens_parents"] and match["children"]:
+            raise Exception(
+                f'Invalid node spec {criterion} - "@" prefix and "+" suffix are '
+                "incompatible"
+            )
+
+        value = match["value"]
+        method = match["method"] or default_method(value)
+        search = self._methods.get(method)
+        if search is None:
+            raise Exception(f"'{method}' is not a supported selector method.")
+
+        selected = search(value)
+        result = set(selected)
+
+        if match["childrens_parents"]:
+            descendants = self.children.reach(selected) | selected
+            result |= self.parents.reach(descendants) | descendants
+
+        if match["parents"]:
+            result |= self.parents.reach(selected, _depth(match["parents_depth"]))
+
+        if match["children"]:
+            result |= self.children.reach(selected, _depth(match["children_depth"]))
+
+        return result
+
+    def _select_union(self, selector: List[str]) -> Set[int]:
+        """Return the union of the space-separated members of a selector."""
+        selected: Set[int] = set()
+        for element in selector:
+            for member in element.split():
+                intersection = set.intersection(
+                    *[self._select_criterion(part) for part in member.split(",")]
+                )
+                if len(intersection) == 0:
+                    logger.debug(
+                        "The selection criterion '{member}' does not match any nodes",
+                        member=member,
+                    )
+                selected |= intersection
+        return selected
+
+    def select(
+        self, select: Optional[List[str]], exclude: Optional[List[str]]
+    ) -> Set[UniqueId]:
+        """
+        Return the models chosen by a select and exclude statement.
+
+        A select of None selects every model, as dbt does by default.
+        """
+        if select is None:
+            selected = range(len(self.models))
+        else:
+            selected = self._select_union(select)
+
+        excluded = self._select_union(exclude) if exclude else set()
+
+        unique_ids = self.index.unique_ids
+        return {
+            unique_ids[position]
+            for position in selected
+            if self.models[position] and position not in excluded
+        }
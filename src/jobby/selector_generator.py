@@ -1,11 +1,15 @@
-from typing import List, Tuple, Callable, Set, Dict
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple, Callable, Set, Dict
 
 import networkx
 from dbt.graph import Graph, UniqueId
 from loguru import logger
 
+from jobby.branching import LongestPathDecomposition
+from jobby.metrics import MetricsCollector, NullMetrics
 from jobby.types.job import Job
 from jobby.types.manifest import Manifest
+from jobby.verification import SelectorVerifier
 
 
 class SelectionMismatchException(Exception):
@@ -17,6 +21,44 @@ class SelectionMismatchException(Exception):
         self.removed = removed
         self.difference = difference
 
+    def __reduce__(self):
+        # Keep the exception picklable, so it can be returned from worker processes.
+        return (
+            self.__class__,
+            (self.message, self.added, self.removed, self.difference),
+        )
+
+
+@dataclass
+class SelectorFailure:
+    """
+    Why a selector could not be generated for a job.
+
+    Failures are summarized in a worker process, rather than returned as the
+    exception raised, so that exceptions which cannot be pickled do not stop
+    the batch.
+    """
+
+    job_id: int
+    error_type: str
+    message: str
+    # Models the new selector added or removed, for a SelectionMismatchException.
+    added: Set[UniqueId] = field(default_factory=set)
+    removed: Set[UniqueId] = field(default_factory=set)
+
+    @classmethod
+    def from_exception(cls, job_id: int, exception: Exception) -> "SelectorFailure":
+        return cls(
+            job_id=job_id,
+            error_type=type(exception).__name__,
+            message=str(exception),
+            added=set(getattr(exception, "added", ())),
+            removed=set(getattr(exception, "removed", ())),
+        )
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
 
 class SelectorGenerator:
     """A class that can generate string-based selectors for a given graph."""
@@ -26,6 +68,8 @@ class SelectorGenerator:
         manifest: Manifest,
         graph: Graph,
         selector_evaluator: Callable[[List[str], List[str]], Set[UniqueId]],
+        verifier: Optional[SelectorVerifier] = None,
+        metrics: Optional[MetricsCollector] = None,
     ):
         self.manifest = manifest
         self.graph = graph
@@ -33,82 +77,81 @@ class SelectorGenerator:
         self.evaluate: Callable[
             [List[str], List[str]], Set[UniqueId]
         ] = selector_evaluator
+        self.verifier = verifier
+        self.metrics = metrics or NullMetrics()
+        self._foundation: Optional[Tuple[int, int, Dict[UniqueId, int]]] = None
 
-    def identify_foundation_nodes(self, selected_graph: networkx.DiGraph):
-        # Set a baseline
-        networkx.set_node_attributes(selected_graph, False, "foundation")
-
-        # Add foundation attribute for foundational nodes.
-        nodes_to_update: Dict[UniqueId, bool] = {}
-        for unique_id, node in self.manifest.nodes.items():
-            source_models = [
-                dependency.split(".")[0] == "source"
-                for dependency in node.depends_on_nodes
-            ]
-            foundation = all(source_models) and len(source_models) > 0
-            nodes_to_update[unique_id] = foundation
-            if foundation:
-                logger.trace(
-                    "{unique} is a foundation node. {deps}",
-                    unique=unique_id,
-                    deps=node.depends_on_nodes,
-                )
-        networkx.set_node_attributes(selected_graph, nodes_to_update, "foundation")
-
-    def _select_foundation_selectors(self, selected_graph) -> Tuple[Set[str], Set[str]]:
-        """Identify a set of selectors that are stable for parent selection."""
-
-        sections = set()
-        self.identify_foundation_nodes(selected_graph)
-        nodes = list(networkx.topological_sort(selected_graph))
-
-        for node in nodes:
-            ancestor_foundation: Dict[UniqueId, bool] = {}
-            for dependency in self.manifest.get_node(node).depends_on_nodes:
-                if dependency not in selected_graph.nodes:
-                    ancestor_foundation[dependency] = False
-                else:
-                    ancestor_foundation[dependency] = (
-                        selected_graph.nodes[dependency]["foundation"] is True
-                    )
+    @property
+    def foundation(self) -> Tuple[int, int, Dict[UniqueId, int]]:
+        """
+        Foundation classification of the whole graph, computed once.
 
-            if selected_graph.nodes[node]["foundation"]:
-                logger.trace(
-                    "{node} has already been identified as foundational.", node=node
-                )
-                continue
+        Returns the bitset of nodes whose dependencies are all sources, the
+        bitset of nodes that are foundational when their entire upstream is
+        selected, and the topological position of every node. A node can only
+        be foundational within a selection if it is in the second bitset.
+        """
+        if self._foundation is None:
+            index = self.manifest.node_index
+            base = 0
+            candidates = 0
+            order: Dict[UniqueId, int] = {}
+            for position, unique_id in enumerate(
+                networkx.topological_sort(self.digraph)
+            ):
+                order[unique_id] = position
+                node = self.manifest.nodes.get(unique_id)
+                if node is None or len(node.depends_on_nodes) == 0:
+                    continue
+
+                if all(
+                    dependency.split(".")[0] == "source"
+                    for dependency in node.depends_on_nodes
+                ):
+                    base |= index.bit(unique_id)
+                    candidates |= index.bit(unique_id)
+                elif all(
+                    dependency in index and candidates & index.bit(dependency)
+                    for dependency in node.depends_on_nodes
+                ):
+                    candidates |= index.bit(unique_id)
+
+            self._foundation = (base, candidates, order)
+
+        return self._foundation
+
+    def clear_foundation(self) -> None:
+        """Discard the foundation classification, after the graph has changed."""
+        self._foundation = None
+
+    def identify_foundation_nodes(self, node_set: Set[UniqueId]) -> Set[UniqueId]:
+        """
+        Return the foundation nodes of a selection: nodes whose dependencies
+        are all sources, and selected nodes whose dependencies are all
+        foundation nodes within the selection.
+        """
+        base, candidates, order = self.foundation
+        index = self.manifest.node_index
 
-            elif len(ancestor_foundation) == 0:
-                selected_graph.nodes[node]["foundation"] = False
+        foundation_nodes: Set[UniqueId] = set()
+        selected = index.encode(node for node in node_set if node in index)
+        for node in sorted(index.iterate(selected & candidates), key=order.get):
+            if base & index.bit(node) or all(
+                dependency in foundation_nodes
+                for dependency in self.manifest.get_node(node).depends_on_nodes
+            ):
+                foundation_nodes.add(node)
 
-            elif all(ancestor_foundation.values()):
-                logger.trace(
-                    "{node} identified as foundational. {ancestors}",
-                    node=node,
-                    ancestors=ancestor_foundation,
-                )
-                selected_graph.nodes[node]["foundation"] = True
+        return foundation_nodes
 
-            else:
-                selected_graph.nodes[node]["foundation"] = False
+    def _select_foundation_selectors(self, selected_graph) -> Tuple[Set[str], Set[str]]:
+        """Identify a set of selectors that are stable for parent selection."""
 
-        foundation_nodes = {
-            node
-            for node, value in networkx.get_node_attributes(
-                selected_graph, "foundation"
-            ).items()
-            if value is True
-        }
+        sections = set()
+        foundation_nodes = self.identify_foundation_nodes(set(selected_graph.nodes))
 
         logger.trace("Foundation nodes: {nodes}", nodes=foundation_nodes)
 
-        colors = {}
-        for node in selected_graph.nodes:
-            if selected_graph.nodes[node]["foundation"]:
-                colors[node] = "red"
-            else:
-                colors[node] = "green"
-
         removed_nodes = set()
 
         foundation_subgraph = selected_graph.subgraph(foundation_nodes)
@@ -156,48 +199,37 @@ class SelectorGenerator:
         selected_graph.remove_nodes_from(foundation_nodes)
         known_nodes.update(foundation_nodes)
 
-        max_iter = 10000000
+        branches = LongestPathDecomposition(selected_graph)
+
         iter = 0
-        while iter <= max_iter and len(selected_graph.nodes) > 0:
+        while len(branches) > 0:
             logger.trace("Branching iteration {iteration}", iteration=iter)
             iter += 1
 
-            if len(selected_graph.nodes) <= 2:
+            if len(branches) <= 2:
                 sections.update(
-                    {
-                        self.manifest.get_model_name(node)
-                        for node in selected_graph.nodes
-                    }
+                    {self.manifest.get_model_name(node) for node in branches.nodes}
                 )
-                selected_graph.remove_nodes_from(
-                    {node for node in selected_graph.nodes}
-                )
-                continue
+                break
 
-            longest_branch = networkx.dag_longest_path(selected_graph)
+            longest_branch = branches.longest_path()
 
             if len(longest_branch) < 3:
                 sections.update(
                     {self.manifest.get_model_name(node) for node in longest_branch}
                 )
 
-                selected_graph.remove_nodes_from(longest_branch)
+                branches.remove(longest_branch)
                 continue
 
             # Grab the start and end
-            component_subgraph = selected_graph.subgraph(longest_branch).copy()
-
-            sorted_nodes = [
-                node for node in networkx.topological_sort(component_subgraph)
-            ]
-
-            start_point = self.manifest.get_model_name(sorted_nodes[0])
-            end_point = self.manifest.get_model_name(sorted_nodes[-1])
+            start_point = self.manifest.get_model_name(longest_branch[0])
+            end_point = self.manifest.get_model_name(longest_branch[-1])
             new_section = f"{start_point}+,+{end_point}"
             sections.add(new_section)
 
             # Remove the branching nodes from selected graph
-            selected_graph.remove_nodes_from({node for node in sorted_nodes})
+            branches.remove(longest_branch)
 
         return [(list(sections), [])]
 
@@ -234,48 +266,97 @@ class SelectorGenerator:
 
         return select + (exclude if len(exclude_list) > 0 else "")
 
-    def generate(self, job: Job, optimize=False) -> List[Tuple[List[str], List[str]]]:
-        """Generate a selector for a Job"""
+    def _verify_with_evaluator(
+        self, selector: List[Tuple[List[str], List[str]]], expected: Set[UniqueId]
+    ) -> Tuple[Set[UniqueId], Set[UniqueId], Dict[str, Set[UniqueId]]]:
+        """Compare a selector with an expected model set, evaluating it through dbt."""
+        new_model_lists = [
+            self.evaluate(select_list, exclude_list)
+            for select_list, exclude_list in selector
+        ]
+        new_models = set.union(*new_model_lists)
+        difference, added, removed = self.validate_selection(expected, new_models)
+
+        culprits: Dict[str, Set[UniqueId]] = {}
+        if len(difference) != 0:
+            for select_list, exclude_list in selector:
+                for select in select_list:
+                    intersection = added.intersection(self.evaluate([select], []))
+                    if len(intersection) > 0:
+                        culprits[select] = intersection
+
+        return added, removed, culprits
+
+    def _cross_check(
+        self,
+        job: Job,
+        selector: List[Tuple[List[str], List[str]]],
+        expected: Set[UniqueId],
+        added: Set[UniqueId],
+        removed: Set[UniqueId],
+    ) -> None:
+        """Confirm that dbt agrees with the verifier about a selector's models."""
+        dbt_added, dbt_removed, _ = self._verify_with_evaluator(selector, expected)
+        if dbt_added != added or dbt_removed != removed:
+            raise Exception(
+                f"Selector verification for {job.name} disagrees with dbt. "
+                f"Verifier added {added} and removed {removed}; "
+                f"dbt added {dbt_added} and removed {dbt_removed}."
+            )
+
+    def generate(
+        self, job: Job, optimize=False, cross_check=False
+    ) -> List[Tuple[List[str], List[str]]]:
+        """
+        Generate a selector for a Job.
+
+        The new selector is verified with the SelectorVerifier when one is
+        configured, and through dbt otherwise. With cross_check, the verifier's
+        result is also confirmed through dbt.
+        """
 
         # Get the original list of models for future comparison.
         original_models: Set[UniqueId] = set(job.models.copy().keys())
 
         logger.info("Generating selector for {job}", job=job.name)
 
-        if optimize:
-            new_selector = self._create_new_selector(job)
-        else:
-            new_selector = self._generate_trivial_selector(job)
+        with self.metrics.phase("selectors.create", items=len(original_models)):
+            if optimize:
+                new_selector = self._create_new_selector(job)
+            else:
+                new_selector = self._generate_trivial_selector(job)
 
-        new_model_lists = [
-            self.evaluate(select_list, exclude_list)
-            for select_list, exclude_list in new_selector
-        ]
-        new_models = set.union(*new_model_lists)
-        difference, added, removed = self.validate_selection(
-            original_models, new_models
-        )
+        with self.metrics.phase("selectors.verify", items=len(original_models)):
+            if self.verifier is not None:
+                added, removed, culprits = self.verifier.verify(
+                    new_selector, original_models
+                )
+                if cross_check:
+                    self._cross_check(
+                        job, new_selector, original_models, added, removed
+                    )
+            else:
+                added, removed, culprits = self._verify_with_evaluator(
+                    new_selector, original_models
+                )
 
-        if len(difference) != 0:
+        if len(added) != 0 or len(removed) != 0:
             exception = SelectionMismatchException(
                 message=f"Identified selector drift. Added: {added}. Removed {removed}",
                 added=added,
                 removed=removed,
-                difference=difference,
+                difference=added | removed,
             )
 
             logger.error(exception)
             logger.info("Identifying errant items.")
 
-            for select_list, exclude_list in new_selector:
-                for select in select_list:
-                    new_model_lists = self.evaluate([select], [])
-                    if len(added.intersection(new_model_lists)) > 0:
-                        logger.error(
-                            "{selector} is responsible for adding {intersection}",
-                            selector=select,
-                            intersection=added.intersection(new_model_lists),
-                        )
+            for select, intersection in culprits.items():
+                logger.error(
+                    "{selector} is responsible for adding {intersection}",
+                    selector=select,
+                    intersection=intersection,
+                )
 
             raise exception
 
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from dbt.graph import UniqueId
+from loguru import logger
+
+from jobby.types.job import Job
+
+if TYPE_CHECKING:
+    from jobby import Jobby
+
+
+Selectors = Tuple[Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]]], ...]
+
+
+class JobState(NamedTuple):
+    """
+    The immutable state of a job within a simulation: its name and model bitset,
+    and the run steps and selectors it started with.
+    """
+
+    name: Optional[str]
+    bits: int
+    steps: Tuple[str, ...] = ()
+    selectors: Selectors = ()
+
+
+def _freeze(selectors: List[Tuple[List[str], List[str]]]) -> Selectors:
+    return tuple(
+        tuple(None if part is None else tuple(part) for part in selector)
+        for selector in selectors
+    )
+
+
+def _thaw(selectors: Selectors) -> List[Tuple[List[str], List[str]]]:
+    return [
+        tuple(None if part is None else list(part) for part in selector)
+        for selector in selectors
+    ]
+
+
+class Change(NamedTuple):
+    """One recorded operation: the state of each job it touched, before and after."""
+
+    description: str
+    states: Dict[int, Tuple[Optional[JobState], Optional[JobState]]]
+
+
+class SimulationSession:
+    """
+    A what-if scenario over a set of jobs, recorded as deltas.
+
+    The starting jobs are captured once as model bitsets over the manifest's
+    NodeIndex, with their names, steps and selectors, so later changes to the
+    Job objects do not leak into the session. Operations never copy or modify
+    Job objects. Each one replaces the states of the jobs it touches and
+    records their before and after states, so a session costs memory in
+    proportion to the jobs changed. Sessions support undo and redo. `branch`
+    starts an independent scenario from the current one, and `materialize`
+    builds real Jobs on demand.
+    """
+
+    def __init__(
+        self,
+        jobby: Jobby,
+        jobs: Iterable[Job],
+        _base: Optional[Dict[int, JobState]] = None,
+    ) -> None:
+        self.jobby = jobby
+        self.index = jobby.manifest.node_index
+
+        if _base is None:
+            _base = {
+                job.job_id: JobState(
+                    job.name,
+                    job.bits(self.index),
+                    tuple(job.steps),
+                    _freeze(job.selectors),
+                )
+                for job in jobs
+            }
+
+        self._base_states = _base
+        self._overlay: Dict[int, Optional[JobState]] = {}
+        self._undo: List[Change] = []
+        self._redo: List[Change] = []
+
+    def state(self, job_id: int) -> Optional[JobState]:
+        """Return the current state of a job, or None if it has been removed."""
+        if job_id in self._overlay:
+            return self._overlay[job_id]
+        return self._base_states.get(job_id)
+
+    def _require(self, job_id: int) -> JobState:
+        state = self.state(job_id)
+        if state is None:
+            raise Exception(f"Job {job_id} is not part of this simulation.")
+        return state
+
+    @property
+    def job_ids(self) -> List[int]:
+        """The ids of the jobs in the current scenario."""
+        job_ids = list(self._base_states) + [
+            job_id for job_id in self._overlay if job_id not in self._base_states
+        ]
+        return [job_id for job_id in job_ids if self.state(job_id) is not None]
+
+    def models(self, job_id: int) -> Set[UniqueId]:
+        """Return the unique_ids of the models in a job."""
+        return self.index.decode(self._require(job_id).bits)
+
+    @property
+    def changed_job_ids(self) -> Set[int]:
+        """The ids of the jobs that differ from the starting jobs."""
+        return set(self._overlay)
+
+    def _set(self, job_id: int, state: Optional[JobState]) -> None:
+        if job_id in self._base_states and state is self._base_states[job_id]:
+            self._overlay.pop(job_id, None)
+        else:
+            self._overlay[job_id] = state
+
+    def _apply(self, description: str, states: Dict[int, Optional[JobState]]) -> None:
+        """Record and apply new states for a set of jobs."""
+        change = Change(
+            description,
+            {job_id: (self.state(job_id), state) for job_id, state in states.items()},
+        )
+        for job_id, state in states.items():
+            self._set(job_id, state)
+
+        self._undo.append(change)
+        self._redo.clear()
+        logger.debug("Simulated {description}", description=description)
+
+    def undo(self) -> bool:
+        """Revert the most recent operation. Returns False if there is none."""
+        if len(self._undo) == 0:
+            return False
+        change = self._undo.pop()
+        for job_id, (before, _) in change.states.items():
+            self._set(job_id, before)
+        self._redo.append(change)
+        return True
+
+    def redo(self) -> bool:
+        """Reapply the last undone operation. Returns False if there is none."""
+        if len(self._redo) == 0:
+            return False
+        change = self._redo.pop()
+        for job_id, (_, after) in change.states.items():
+            self._set(job_id, after)
+        self._undo.append(change)
+        return True
+
+    @property
+    def history(self) -> List[str]:
+        """Descriptions of the operations applied, oldest first."""
+        return [change.description for change in self._undo]
+
+    def branch(self) -> SimulationSession:
+        """Start an independent scenario from the current one, sharing its history."""
+        session = SimulationSession(self.jobby, (), _base=self._base_states)
+        session._overlay = dict(self._overlay)
+        session._undo = list(self._undo)
+        session._redo = list(self._redo)
+        return session
+
+    def _encode_models(self, unique_ids: Iterable[UniqueId]) -> int:
+        """Encode unique_ids, which must be nodes a job can build."""
+        unique_ids = list(unique_ids)
+        unknown = [
+            unique_id
+            for unique_id in unique_ids
+            if unique_id not in self.jobby.manifest.nodes
+        ]
+        if unknown:
+            raise Exception(f"{unknown} are not models in the manifest.")
+        return self.index.encode(unique_ids)
+
+    def add_models(self, job_id: int, unique_ids: Iterable[UniqueId]) -> None:
+        """Add models to a job."""
+        state = self._require(job_id)
+        bits = state.bits | self._encode_models(unique_ids)
+        self._apply(f"add models to {job_id}", {job_id: state._replace(bits=bits)})
+
+    def remove_models(self, job_id: int, unique_ids: Iterable[UniqueId]) -> None:
+        """Remove models from a job."""
+        state = self._require(job_id)
+        bits = state.bits & ~self.index.encode(unique_ids)
+        self._apply(f"remove models from {job_id}", {job_id: state._replace(bits=bits)})
+
+    def remove_job(self, job_id: int) -> None:
+        """Remove a job from the scenario."""
+        self._require(job_id)
+        self._apply(f"remove job {job_id}", {job_id: None})
+
+    def transfer_models(
+        self, unique_ids: Iterable[UniqueId], source_id: int, target_id: int
+    ) -> None:
+        """Move models from one job to another, like Jobby.transfer_models."""
+        source = self._require(source_id)
+        target = self._require(target_id)
+
+        bits = self._encode_models(unique_ids)
+        missing = bits & ~source.bits
+        if missing:
+            raise Exception(
+                f"Job {source_id} does not contain {self.index.decode(missing)}."
+            )
+
+        self._apply(
+            f"transfer models from {source_id} to {target_id}",
+            {
+                source_id: source._replace(bits=source.bits & ~bits),
+                target_id: target._replace(bits=target.bits | bits),
+            },
+        )
+
+    def distribute_job(self, source_id: int, target_ids: List[int]) -> None:
+        """
+        Move the models that each target job needs out of the source job, like
+        Jobby.distribute_job. The source job is removed if it is left empty.
+        """
+        reachability = self.jobby.reachability
+        source_models = self.models(source_id)
+
+        states: Dict[int, Optional[JobState]] = {}
+        for target_id in target_ids:
+            target = self._require(target_id)
+            target_models = self.index.decode(target.bits)
+
+            dependencies = reachability.upstream_within(
+                reachability.external_parents(target_models),
+                source_models,
+                expand=lambda unique_id: unique_id.split(".")[0]
+                in ["model", "snapshot"],
+            )
+            source_models.difference_update(dependencies)
+
+            moved = [
+                dependency
+                for dependency in dependencies
+                if dependency.split(".")[0] in ["model", "snapshot"]
+            ]
+            states[target_id] = target._replace(
+                bits=target.bits | self.index.encode(moved)
+            )
+
+        source = self._require(source_id)
+        states[source_id] = (
+            source._replace(bits=self.index.encode(source_models))
+            if len(source_models) > 0
+            else None
+        )
+
+        self._apply(f"distribute {source_id} into {target_ids}", states)
+
+    def union(self, job_id: int, other_ids: Iterable[int]) -> None:
+        """Add the models of other jobs to a job."""
+        state = self._require(job_id)
+        bits = state.bits
+        for other_id in other_ids:
+            bits |= self._require(other_id).bits
+        self._apply(f"union {job_id} with others", {job_id: state._replace(bits=bits)})
+
+    def intersect(self, job_id: int, other_ids: Iterable[int]) -> None:
+        """Keep only the models of a job that every other job also contains."""
+        state = self._require(job_id)
+        bits = state.bits
+        for other_id in other_ids:
+            bits &= self._require(other_id).bits
+        self._apply(
+            f"intersect {job_id} with others", {job_id: state._replace(bits=bits)}
+        )
+
+    def materialize(self, optimize=False) -> Dict[int, Job]:
+        """
+        Build the Jobs of the current scenario.
+
+        Every job gets new Models for its models. Unchanged jobs keep the steps
+        and selectors they started with. Changed jobs get a selector and run
+        step generated for their models. Models no longer in the manifest,
+        after a refresh, are left out.
+        """
+        nodes = self.jobby.manifest.nodes
+        jobs: Dict[int, Job] = {}
+        for job_id in self.job_ids:
+            state = self._require(job_id)
+            unique_ids = list(self.index.iterate(state.bits))
+            missing = [unique_id for unique_id in unique_ids if unique_id not in nodes]
+            if missing:
+                logger.warning(
+                    "Leaving {missing} out of job {job_id}, as they are no longer "
+                    "in the manifest",
+                    missing=missing,
+                    job_id=job_id,
+                )
+            models = self.jobby._build_models(
+                unique_id for unique_id in unique_ids if unique_id in nodes
+            )
+
+            if job_id not in self._overlay:
+                jobs[job_id] = Job(
+                    job_id=job_id,
+                    name=state.name,
+                    steps=list(state.steps),
+                    selectors=_thaw(state.selectors),
+                    models=models,
+                )
+                continue
+
+            job = Job(
+                job_id=job_id,
+                name=state.name,
+                steps=[],
+                selectors=[([model.name for model in models.values()], [])],
+                models=models,
+            )
+            if len(job.models) > 0:
+                generator = self.jobby.selector_generator
+                job.selectors = generator.generate(job, optimize=optimize)
+                job.steps = [f"dbt build {generator.render_selector(job.selectors)}"]
+
+            jobs[job_id] = job
+
+        return jobs
@@ -1,11 +1,57 @@
 from __future__ import annotations
 
+import weakref
 from typing import Set, List, Dict, Optional, Tuple
 
 from dbt.graph import UniqueId
 from loguru import logger
 
+from jobby.checkpoints import digest
+from jobby.reachability import ReachabilityIndex
+from jobby.runtime import RuntimeEstimate
 from jobby.types.model import Model
+from jobby.types.node_index import NodeIndex
+
+
+class ModelDict(dict):
+    """A dictionary of Models that counts its modifications."""
+
+    version = 0
+
+    def _modified(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._modified()
+
+    def setdefault(self, key, default=None):
+        self._modified()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._modified()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._modified()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self._modified()
 
 
 class Job:
@@ -20,14 +66,62 @@ class Job:
         self.job_id = job_id
         self.name: Optional[str] = name
         self.steps = steps
-        self.models: Dict[UniqueId, Model] = models if models is not None else {}
+        self.models = models if models is not None else {}
         self.selectors: List[Tuple[List[str], List[str]]] = (
             selectors if selectors is not None else []
         )
         self.warning_state = False
+        self.timings: Dict[UniqueId, float] = {}
+        self.runtime: Optional[RuntimeEstimate] = None
+
+    @property
+    def models(self) -> ModelDict:
+        return self._models
+
+    @models.setter
+    def models(self, models: Dict[UniqueId, Model]) -> None:
+        self._models = models if isinstance(models, ModelDict) else ModelDict(models)
+        self._bits: Optional[Tuple[weakref.ref, int, int, int]] = None
+        self._digest: Optional[Tuple[int, int, str]] = None
+
+    def bits(self, index: NodeIndex) -> int:
+        """Return the job's model membership as a bitset over a NodeIndex."""
+        # The index is held weakly, so a bitset is never reused for a new index
+        # that happens to share the id of a collected one.
+        version = (self._models.version, len(self._models))
+        if (
+            self._bits is None
+            or self._bits[0]() is not index
+            or self._bits[1:3] != version
+        ):
+            self._bits = (weakref.ref(index), *version, index.encode(self._models))
+        return self._bits[3]
+
+    def digest(self) -> str:
+        """Return the content hash of the job's models, as saved in checkpoints."""
+        version = (self._models.version, len(self._models))
+        if self._digest is None or self._digest[:2] != version:
+            self._digest = (*version, digest(self._models.keys()))
+        return self._digest[2]
+
+    def __getstate__(self) -> Dict:
+        # Weak references cannot be pickled, so copies recompute their bitset.
+        state = dict(self.__dict__)
+        state["_bits"] = None
+        return state
+
+    def model_dependencies(
+        self, reachability: Optional[ReachabilityIndex] = None
+    ) -> Set[str]:
+        """
+        Return a set of all the external models that this job requires.
+
+        If a ReachabilityIndex is provided, dependencies are read from the graph
+        instead of from each Model's depends_on.
+        """
+        if reachability is not None:
+            return reachability.external_parents(self.models)
 
-    def model_dependencies(self) -> Set[str]:
-        """Return a set of all the external models that this job requires."""
         output = set()
         for _, model in self.models.items():
             output.update(model.depends_on)
@@ -68,9 +162,9 @@ class Job:
         new_job = Job(
             job_id=self.job_id,
             name=self.name,
-            steps=self.steps,
-            selectors=self.selectors,
-            models=self.models,
+            steps=list(self.steps),
+            selectors=list(self.selectors),
+            models=dict(self.models),
         )
 
         for job in other_jobs:
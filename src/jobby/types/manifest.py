@@ -1,50 +1,358 @@
-from typing import Dict, List, Optional, Set
+import io
+import sys
+from pathlib import Path
+from typing import IO, Dict, FrozenSet, Iterator, Optional, Tuple, Union
 
+import ijson
 from dbt.graph import UniqueId
 from dbt.node_types import NodeType
 
+from jobby.path_index import PathIndex
 from jobby.types.model import Model
-from pydantic import BaseModel, Field
+from jobby.types.node_index import NodeIndex
 
+# Top-level manifest sections that contain graph members.
+SECTIONS = ("nodes", "sources", "exposures", "metrics")
 
-class GenericConfig(BaseModel):
-    enabled: bool
+# Node properties that are copied verbatim from the manifest. Everything else
+# (raw_code, compiled_code, columns, docs, ...) is skipped while streaming.
+_SCALAR_FIELDS = {
+    "name",
+    "unique_id",
+    "fqn",
+    "tags",
+    "resource_type",
+    "package_name",
+    "source_name",
+    "path",
+    "root_path",
+    "original_file_path",
+    "empty",
+}
 
+ManifestSource = Union[str, Path, bytes, IO[bytes]]
 
-class GenericNode(BaseModel):
-    name: str
-    unique_id: str
-    fqn: List[str]
-    config: Optional[GenericConfig]
-    depends_on: Optional[Dict] = Field(default_factory=dict)
-    empty: bool = False
-    tags: Set[str]
-    resource_type: NodeType
-    package_name: str
-    source_name: Optional[str]
-    path: str
-    root_path: str
-    original_file_path: str
+
+class GenericConfig:
+    """The subset of a node's config that jobby relies on."""
+
+    __slots__ = ("enabled",)
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def __reduce__(self):
+        return GenericConfig, (self.enabled,)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GenericConfig) and self.enabled == other.enabled
+
+    def __hash__(self) -> int:
+        return hash(self.enabled)
+
+
+_ENABLED = GenericConfig(True)
+_DISABLED = GenericConfig(False)
+
+
+class GenericNode:
+    """A compact, read-only projection of a node, source, exposure or metric."""
+
+    __slots__ = (
+        "name",
+        "unique_id",
+        "fqn",
+        "config",
+        "depends_on_nodes",
+        "empty",
+        "tags",
+        "resource_type",
+        "package_name",
+        "source_name",
+        "path",
+        "root_path",
+        "original_file_path",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        unique_id: str,
+        fqn: Tuple[str, ...],
+        resource_type: NodeType,
+        package_name: str,
+        path: str,
+        root_path: str,
+        original_file_path: str,
+        depends_on_nodes: Tuple[str, ...] = (),
+        tags: FrozenSet[str] = frozenset(),
+        config: Optional[GenericConfig] = None,
+        source_name: Optional[str] = None,
+        empty: bool = False,
+    ):
+        self.name = name
+        self.unique_id = unique_id
+        self.fqn = fqn
+        self.config = config
+        self.depends_on_nodes = depends_on_nodes
+        self.empty = empty
+        self.tags = tags
+        self.resource_type = resource_type
+        self.package_name = package_name
+        self.source_name = source_name
+        self.path = path
+        self.root_path = root_path
+        self.original_file_path = original_file_path
 
     @property
-    def depends_on_nodes(self):
-        return self.depends_on["nodes"]
+    def depends_on(self) -> Dict:
+        return {"nodes": list(self.depends_on_nodes)}
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"GenericNode({self.unique_id})"
+
+
+class _NodeFactory:
+    """Builds GenericNodes, sharing repeated strings and tag sets between nodes."""
+
+    def __init__(self):
+        self._tags: Dict[FrozenSet[str], FrozenSet[str]] = {}
+        self._fqns: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def build(self, fields: Dict) -> GenericNode:
+        tags = frozenset(fields.get("tags") or ())
+        fqn = tuple(sys.intern(part) for part in fields.get("fqn") or ())
+        source_name = fields.get("source_name")
+        enabled = fields.get("enabled")
+
+        return GenericNode(
+            name=fields["name"],
+            unique_id=fields["unique_id"],
+            fqn=self._fqns.setdefault(fqn, fqn),
+            resource_type=NodeType(fields["resource_type"]),
+            package_name=sys.intern(fields["package_name"]),
+            path=fields.get("path") or "",
+            root_path=sys.intern(fields.get("root_path") or ""),
+            original_file_path=fields.get("original_file_path") or "",
+            depends_on_nodes=tuple(fields.get("depends_on_nodes") or ()),
+            tags=self._tags.setdefault(tags, tags),
+            config=_DISABLED if enabled is False else _ENABLED,
+            source_name=sys.intern(source_name) if source_name else None,
+            empty=bool(fields.get("empty", False)),
+        )
+
+    def from_dict(self, value: Dict) -> GenericNode:
+        fields = {key: value[key] for key in _SCALAR_FIELDS if key in value}
+        fields["depends_on_nodes"] = (value.get("depends_on") or {}).get("nodes")
+        fields["enabled"] = (value.get("config") or {}).get("enabled")
+        return self.build(fields)
+
+
+def _read_value(events: Iterator):
+    """Materialize the next (small) JSON value from an ijson event stream."""
+    event, value = next(events)
+    if event == "start_array":
+        output = []
+        while True:
+            event, value = next(events)
+            if event == "end_array":
+                return output
+            if event in ("start_map", "start_array"):
+                raise ValueError("Nested collections are not supported here.")
+            output.append(value)
+    if event == "start_map":
+        _skip_container(events)
+        return None
+    return value
+
+
+def _skip_container(events: Iterator) -> None:
+    """Consume events until the container that was just opened is closed."""
+    depth = 1
+    for event, _ in events:
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _skip_value(events: Iterator) -> None:
+    """Consume the next JSON value without building any Python objects for it."""
+    event, _ = next(events)
+    if event in ("start_map", "start_array"):
+        _skip_container(events)
+
+
+def _read_member(events: Iterator, member: str):
+    """Read a single member of the next JSON object, skipping all others."""
+    event, _ = next(events)
+    if event != "start_map":
+        if event == "start_array":
+            _skip_container(events)
+        return None
+
+    output = None
+    for event, key in events:
+        if event == "end_map":
+            break
+        if key == member:
+            output = _read_value(events)
+        else:
+            _skip_value(events)
+    return output
+
+
+def _read_node(events: Iterator, factory: _NodeFactory) -> GenericNode:
+    event, _ = next(events)
+    if event != "start_map":
+        raise ValueError("Expected a JSON object for a manifest node.")
+
+    fields: Dict = {}
+    for event, key in events:
+        if event == "end_map":
+            break
+        if key in _SCALAR_FIELDS:
+            fields[key] = _read_value(events)
+        elif key == "depends_on":
+            fields["depends_on_nodes"] = _read_member(events, "nodes")
+        elif key == "config":
+            fields["enabled"] = _read_member(events, "enabled")
+        else:
+            _skip_value(events)
+
+    return factory.build(fields)
+
+
+def _read_section(
+    events: Iterator, factory: _NodeFactory
+) -> Dict[UniqueId, GenericNode]:
+    section: Dict[UniqueId, GenericNode] = {}
+    event, _ = next(events)
+    if event == "null":
+        return section
+    if event != "start_map":
+        raise ValueError("Expected a JSON object for a manifest section.")
+
+    for event, unique_id in events:
+        if event == "end_map":
+            break
+        section[UniqueId(unique_id)] = _read_node(events, factory)
+    return section
+
+
+def read_manifest_sections(
+    stream: IO[bytes],
+) -> Dict[str, Dict[UniqueId, GenericNode]]:
+    """
+    Stream a manifest.json file, projecting each graph member onto a GenericNode.
+
+    Only the fields that jobby uses are materialized. Large properties such as
+    raw_code, compiled_code, columns and docs are skipped as the file is read.
+    """
+    factory = _NodeFactory()
+    sections: Dict[str, Dict[UniqueId, GenericNode]] = {name: {} for name in SECTIONS}
+
+    events = ijson.basic_parse(stream, use_float=True)
+    event, _ = next(events)
+    if event != "start_map":
+        raise ValueError("A manifest must be a JSON object.")
+
+    for event, key in events:
+        if event == "end_map":
+            break
+        if key in sections:
+            sections[key] = _read_section(events, factory)
+        else:
+            _skip_value(events)
+
+    return sections
 
 
 class Manifest:
     def __init__(self, data: Dict):
-        self.sources: Dict[UniqueId, GenericNode] = {
-            key: GenericNode(**value) for key, value in data["sources"].items()
-        }
-        self.nodes: Dict[UniqueId, GenericNode] = {
-            key: GenericNode(**value) for key, value in data["nodes"].items()
-        }
-        self.exposures: Dict[UniqueId, GenericNode] = {
-            key: GenericNode(**value) for key, value in data["exposures"].items()
-        }
-        self.metrics: Dict[UniqueId, GenericNode] = {
-            key: GenericNode(**value) for key, value in data["metrics"].items()
-        }
+        factory = _NodeFactory()
+
+        def project(section: Dict) -> Dict[UniqueId, GenericNode]:
+            return {
+                key: value
+                if isinstance(value, GenericNode)
+                else factory.from_dict(value)
+                for key, value in section.items()
+            }
+
+        self.sources: Dict[UniqueId, GenericNode] = project(data["sources"])
+        self.nodes: Dict[UniqueId, GenericNode] = project(data["nodes"])
+        self.exposures: Dict[UniqueId, GenericNode] = project(data["exposures"])
+        self.metrics: Dict[UniqueId, GenericNode] = project(data["metrics"])
+
+        self._path_index: Optional[PathIndex] = None
+        self.node_index = NodeIndex(unique_id for unique_id, _ in self.all_nodes())
+
+    @classmethod
+    def load(cls, source: ManifestSource) -> "Manifest":
+        """Stream a Manifest from a file path, raw bytes, or a binary file object."""
+        if isinstance(source, (str, Path)):
+            with open(source, "rb") as file:
+                return cls(read_manifest_sections(file))
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls(read_manifest_sections(io.BytesIO(source)))
+
+        return cls(read_manifest_sections(source))
+
+    def all_nodes(self) -> Iterator[Tuple[UniqueId, GenericNode]]:
+        """Iterate over every node, source, exposure and metric in the manifest."""
+        for section in (self.nodes, self.sources, self.exposures, self.metrics):
+            yield from section.items()
+
+    def update(self, other: "Manifest") -> None:
+        """
+        Replace this manifest's nodes with those of another manifest, in place.
+
+        NodeIndex positions are append-only, so new nodes are given new
+        positions and bitsets encoded before the update remain valid.
+        """
+        for name in SECTIONS:
+            section = getattr(self, name)
+            section.clear()
+            section.update(getattr(other, name))
+
+        for unique_id, _ in self.all_nodes():
+            self.node_index.add(unique_id)
+        self._path_index = None
+
+    def is_graph_member(self, unique_id: UniqueId) -> bool:
+        """
+        Return True if dbt's selectors can select and traverse through a node:
+        enabled sources and metrics, exposures, and enabled, non-empty nodes.
+        """
+        if unique_id in self.sources:
+            return self.sources[unique_id].config.enabled
+        if unique_id in self.exposures:
+            return True
+        if unique_id in self.metrics:
+            return self.metrics[unique_id].config.enabled
+        node = self.nodes[unique_id]
+        return not node.empty and node.config.enabled
+
+    @property
+    def path_index(self) -> PathIndex:
+        """An index of node file paths, built on first use."""
+        if self._path_index is None:
+            self._path_index = PathIndex(
+                (unique_id, node.original_file_path)
+                for unique_id, node in self.all_nodes()
+            )
+        return self._path_index
 
     def get_node(self, unique_id: UniqueId) -> GenericNode:
         """Get a model using the model's UniqueId"""
@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, Iterator, List, Set
+
+from dbt.graph import UniqueId
+
+
+class NodeIndex:
+    """
+    A dense, append-only integer numbering of unique_ids.
+
+    Sets of nodes are encoded as Python ints in which bit `i` is set when the
+    node at position `i` is a member, so set algebra across many jobs becomes
+    integer arithmetic. Positions never change once assigned, which keeps
+    previously encoded bitsets valid as nodes are added.
+    """
+
+    def __init__(self, unique_ids: Iterable[UniqueId] = ()) -> None:
+        self.unique_ids: List[UniqueId] = []
+        self.positions: Dict[UniqueId, int] = {}
+        for unique_id in unique_ids:
+            self.add(unique_id)
+
+    def __len__(self) -> int:
+        return len(self.unique_ids)
+
+    def __contains__(self, unique_id: UniqueId) -> bool:
+        return unique_id in self.positions
+
+    def add(self, unique_id: UniqueId) -> int:
+        """Return the position of a unique_id, assigning the next free one if new."""
+        position = self.positions.get(unique_id)
+        if position is None:
+            position = len(self.unique_ids)
+            self.positions[unique_id] = position
+            self.unique_ids.append(unique_id)
+        return position
+
+    def position(self, unique_id: UniqueId) -> int:
+        return self.positions[unique_id]
+
+    def bit(self, unique_id: UniqueId) -> int:
+        return 1 << self.positions[unique_id]
+
+    def encode(self, unique_ids: Iterable[UniqueId]) -> int:
+        """Encode a collection of unique_ids as a bitset."""
+        bitmap = bytearray((len(self.unique_ids) >> 3) + 1)
+        positions = self.positions
+        for unique_id in unique_ids:
+            position = positions[unique_id]
+            bitmap[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bitmap, "little")
+
+    @staticmethod
+    def iterate_positions(bits: int) -> Iterator[int]:
+        """Yield the position of every set bit, in ascending order."""
+        binary = bin(bits)[:1:-1]
+        position = binary.find("1")
+        while position != -1:
+            yield position
+            position = binary.find("1", position + 1)
+
+    def iterate(self, bits: int) -> Iterator[UniqueId]:
+        """Yield the unique_id of every member of a bitset, in index order."""
+        unique_ids = self.unique_ids
+        for position in self.iterate_positions(bits):
+            yield unique_ids[position]
+
+    def decode(self, bits: int) -> Set[UniqueId]:
+        """Decode a bitset into a set of unique_ids."""
+        return set(self.iterate(bits))
+
+    @staticmethod
+    def count(bits: int) -> int:
+        """Return the number of members in a bitset."""
+        return bin(bits).count("1")
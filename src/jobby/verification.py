@@ -0,0 +1,167 @@
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from dbt.graph import Graph, UniqueId
+from dbt.node_types import NodeType
+
+from jobby.reachability import ReachabilityIndex
+from jobby.types.manifest import Manifest
+
+# The selector forms produced by SelectorGenerator: `name`, `+name` and
+# `start+,+end`. Anything else is evaluated through dbt.
+NAME_PATTERN = re.compile(r"^(\+?)([A-Za-z0-9_]+)$")
+BRANCH_PATTERN = re.compile(r"^([A-Za-z0-9_]+)\+,\+([A-Za-z0-9_]+)$")
+
+Selection = List[Tuple[List[str], List[str]]]
+
+
+class SelectorVerifier:
+    """
+    Evaluates jobby's own generated selector forms without going through dbt.
+
+    Name matching follows dbt's fqn selector method: a name selects the nodes
+    whose name, package or top-level directory equals it. Graph operators are
+    answered from ancestor and descendant bitsets, computed over the same graph
+    members dbt traverses (enabled, non-empty nodes), and results are filtered
+    to models. Selections containing any other syntax are handed to
+    `fallback`, which evaluates them through dbt.
+    """
+
+    def __init__(
+        self,
+        manifest: Manifest,
+        graph: Graph,
+        reachability: ReachabilityIndex,
+        fallback: Callable[[List[str], List[str]], Set[UniqueId]],
+    ) -> None:
+        self.manifest = manifest
+        self.index = reachability.index
+        self.fallback = fallback
+
+        members = {
+            unique_id
+            for unique_id in graph.graph.nodes
+            if manifest.is_graph_member(unique_id)
+        }
+        if len(members) == len(graph.graph):
+            self.reachability = reachability
+        else:
+            self.reachability = ReachabilityIndex(
+                graph.graph.subgraph(members), self.index
+            )
+
+        self.models = self.index.encode(
+            unique_id
+            for unique_id, node in manifest.nodes.items()
+            if unique_id in members and node.resource_type == NodeType.Model
+        )
+
+        self.names: Dict[str, int] = {}
+        for unique_id in members:
+            node = manifest.nodes.get(unique_id)
+            if node is None:
+                continue
+            bit = self.index.bit(unique_id)
+            keys = {node.fqn[-1], node.fqn[0].split(".")[0]}
+            if len(node.fqn) > 1:
+                keys.add(node.fqn[1].split(".")[0])
+            for key in keys:
+                self.names[key] = self.names.get(key, 0) | bit
+
+    def _with_ancestors(self, bits: int) -> int:
+        for unique_id in self.index.iterate(bits):
+            bits |= self.reachability.ancestors(unique_id)
+        return bits
+
+    def _with_descendants(self, bits: int) -> int:
+        for unique_id in self.index.iterate(bits):
+            bits |= self.reachability.descendants(unique_id)
+        return bits
+
+    def atom(self, atom: str) -> Optional[int]:
+        """Return the models selected by a generated selector atom, or None."""
+        match = NAME_PATTERN.match(atom)
+        if match:
+            parents, name = match.groups()
+            bits = self.names.get(name, 0)
+            if parents:
+                bits = self._with_ancestors(bits)
+            return bits & self.models
+
+        match = BRANCH_PATTERN.match(atom)
+        if match:
+            start, end = match.groups()
+            downstream = self._with_descendants(self.names.get(start, 0))
+            upstream = self._with_ancestors(self.names.get(end, 0))
+            return downstream & upstream & self.models
+
+        return None
+
+    def _atoms(self, selector: List[str]) -> Optional[Dict[str, int]]:
+        """Evaluate every atom of a selector, or return None if any is unsupported."""
+        results: Dict[str, int] = {}
+        for element in selector:
+            for atom in element.split():
+                if atom not in results:
+                    bits = self.atom(atom)
+                    if bits is None:
+                        return None
+                    results[atom] = bits
+        return results
+
+    def evaluate(self, select: List[str], exclude: List[str]) -> Set[UniqueId]:
+        """Return the models selected by a select and exclude statement."""
+        selected = self._atoms(select) if select is not None else None
+        excluded = self._atoms(exclude or [])
+        if selected is None or excluded is None:
+            return self.fallback(select, exclude)
+
+        bits = 0
+        for atom_bits in selected.values():
+            bits |= atom_bits
+        for atom_bits in excluded.values():
+            bits &= ~atom_bits
+        return self.index.decode(bits)
+
+    def verify(
+        self, selection: Selection, expected: Set[UniqueId]
+    ) -> Tuple[Set[UniqueId], Set[UniqueId], Dict[str, Set[UniqueId]]]:
+        """
+        Compare the models of a selection with an expected set.
+
+        Returns the models added and removed by the selection, and for each
+        select atom responsible for an addition, the models it added. Atoms are
+        evaluated once and reused for both the comparison and the attribution.
+        """
+        expected_bits = self.index.encode(expected)
+
+        bits = 0
+        contributions: Dict[str, int] = {}
+        for select, exclude in selection:
+            selected = self._atoms(select) if select is not None else None
+            excluded = self._atoms(exclude or [])
+            if selected is None or excluded is None:
+                models = self.index.encode(self.fallback(select, exclude))
+                bits |= models
+                contributions[" ".join(select or [])] = models
+                continue
+
+            removed = 0
+            for atom_bits in excluded.values():
+                removed |= atom_bits
+            for atom, atom_bits in selected.items():
+                bits |= atom_bits & ~removed
+                contributions[atom] = contributions.get(atom, 0) | atom_bits & ~removed
+
+        added = bits & ~expected_bits
+        culprits = {
+            atom: self.index.decode(atom_bits & added)
+            for atom, atom_bits in contributions.items()
+            if atom_bits & added
+        }
+
+        return (
+            self.index.decode(added),
+            self.index.decode(expected_bits & ~bits),
+            culprits,
+        )
@@ -0,0 +1,129 @@
+"""A local stand-in for the parts of the dbt Cloud API that jobby calls."""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeCloud:
+    """
+    Serves jobs, runs and artifacts for account 1 over HTTP on localhost.
+
+    Failures queued with `fail` are returned before any real response, and
+    every request is recorded with its path, query and arrival time.
+    """
+
+    def __init__(self, page_size: int = 10) -> None:
+        self.page_size = page_size
+        self.jobs: List[Dict] = []
+        self.runs: List[Dict] = []
+        self.artifacts: Dict[Tuple[int, str], bytes] = {}
+        # Whether runs/ honours the environment_id and status filters.
+        self.filter_runs = True
+        # Seconds to wait before answering a page, by offset.
+        self.delays: Dict[int, float] = {}
+        self.requests: List[Tuple[str, Dict[str, str], float]] = []
+        self._failures: List[Tuple[int, Dict[str, str]]] = []
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "FakeCloud":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail(
+        self, status: int, times: int = 1, retry_after: Optional[str] = None
+    ) -> None:
+        """Answer the next `times` requests with an error status."""
+        headers = {} if retry_after is None else {"Retry-After": retry_after}
+        self._failures.extend([(status, headers)] * times)
+
+    def paths(self) -> List[str]:
+        return [path for path, _, _ in self.requests]
+
+    def _respond(self, path: str, query: Dict[str, str]) -> Tuple[int, bytes]:
+        limit = int(query.get("limit", self.page_size))
+        offset = int(query.get("offset", 0))
+        time.sleep(self.delays.get(offset, 0))
+
+        def page(items: List[Dict]) -> bytes:
+            return json.dumps(
+                {
+                    "data": items[offset : offset + limit],
+                    "extra": {
+                        "filters": {"limit": limit, "offset": offset},
+                        "pagination": {"total_count": len(items)},
+                    },
+                }
+            ).encode()
+
+        if path == "jobs/":
+            return 200, page(self.jobs)
+
+        match = re.fullmatch(r"jobs/(\d+)", path)
+        if match:
+            job = next(job for job in self.jobs if job["id"] == int(match.group(1)))
+            return 200, json.dumps({"data": job}).encode()
+
+        if path == "runs/":
+            keys = ["job_definition_id"]
+            if self.filter_runs:
+                keys += ["environment_id", "status"]
+            runs = [
+                run
+                for run in self.runs
+                if all(str(run.get(key)) == query[key] for key in keys if key in query)
+            ]
+            runs.sort(key=lambda run: -run["id"])
+            return 200, page(runs)
+
+        match = re.fullmatch(r"runs/(\d+)/artifacts/(.+)", path)
+        if match and (int(match.group(1)), match.group(2)) in self.artifacts:
+            return 200, self.artifacts[int(match.group(1)), match.group(2)]
+
+        return 404, b"{}"
+
+    def _handler(self):
+        cloud = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                query = {key: value[0] for key, value in parse_qs(url.query).items()}
+                path = re.sub(r"^/api/v2/accounts/1/", "", url.path)
+
+                with cloud._lock:
+                    cloud.requests.append((path, query, time.monotonic()))
+                    failure = cloud._failures.pop(0) if cloud._failures else None
+
+                headers: Dict[str, str] = {}
+                if failure is not None:
+                    status, headers = failure
+                    body = b'{"status": {"is_success": false}}'
+                else:
+                    status, body = cloud._respond(path, query)
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
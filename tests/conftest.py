@@ -0,0 +1,33 @@
+import pytest
+
+from jobby import Jobby
+from jobby.checkpoints import CheckpointStore
+from tests.cloud import FakeCloud
+from tests.manifests import make_manifest, write_manifest
+
+
+@pytest.fixture
+def manifest():
+    return make_manifest()
+
+
+@pytest.fixture
+def manifest_path(tmp_path, manifest):
+    return write_manifest(tmp_path / "manifest.json", manifest)
+
+
+@pytest.fixture
+def jobby(tmp_path, manifest_path):
+    return Jobby(
+        1,
+        "key",
+        manifest_path=manifest_path,
+        use_cache=False,
+        checkpoint_store=CheckpointStore(tmp_path / "checkpoints"),
+    )
+
+
+@pytest.fixture
+def cloud():
+    with FakeCloud() as cloud:
+        yield cloud
@@ -0,0 +1,178 @@
+"""Synthetic dbt manifests, shaped like the parts of manifest.json jobby reads."""
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from jobby.types.job import Job
+
+DIRECTORIES = ["staging", "marts/core", "marts/finance", "intermediate"]
+
+
+def make_manifest(
+    models: int = 200, sources: int = 10, seed: int = 1, root: str = "/project"
+) -> Dict:
+    """
+    Build a manifest of sources, models in four directories, tests, a snapshot,
+    an exposure and a metric. Models carry the large properties the streaming
+    loader skips: raw and compiled code, columns and docs.
+    """
+    generator = random.Random(seed)
+    nodes: Dict[str, Dict] = {}
+    source_nodes: Dict[str, Dict] = {}
+
+    for i in range(sources):
+        unique_id = f"source.pkg.src{i % 3}.tbl{i}"
+        source_nodes[unique_id] = {
+            "name": f"tbl{i}",
+            "unique_id": unique_id,
+            "fqn": ["pkg", f"src{i % 3}", f"tbl{i}"],
+            "config": {"enabled": True},
+            "tags": ["raw"],
+            "resource_type": "source",
+            "package_name": "pkg",
+            "source_name": f"src{i % 3}",
+            "path": "models/sources.yml",
+            "root_path": root,
+            "original_file_path": "models/sources.yml",
+            "description": "A source table.",
+            "columns": {"id": {"name": "id", "meta": {}}},
+        }
+
+    model_ids: List[str] = []
+    for i in range(models):
+        directory = DIRECTORIES[min(i * len(DIRECTORIES) // models, 3)]
+        unique_id = f"model.pkg.m{i}"
+        if i < models // 5:
+            parents = generator.sample(list(source_nodes), k=generator.randint(1, 2))
+        else:
+            parents = generator.sample(model_ids, k=generator.randint(1, 3))
+            if generator.random() < 0.1:
+                parents.append(generator.choice(list(source_nodes)))
+
+        nodes[unique_id] = {
+            "name": f"m{i}",
+            "unique_id": unique_id,
+            "fqn": ["pkg", *directory.split("/"), f"m{i}"],
+            "config": {"enabled": True, "materialized": "table", "meta": {}},
+            "depends_on": {"nodes": sorted(set(parents)), "macros": []},
+            "tags": [["daily"], ["hourly"], []][i % 3],
+            "resource_type": "model",
+            "package_name": "pkg",
+            "path": f"{directory}/m{i}.sql",
+            "root_path": root,
+            "original_file_path": f"models/{directory}/m{i}.sql",
+            "raw_code": "select 1 " * 50,
+            "compiled_code": "select 1 " * 50,
+            "docs": {"show": True},
+            "columns": {"a": {"name": "a", "tags": [], "meta": {"nested": [1, 2]}}},
+        }
+        model_ids.append(unique_id)
+
+        if i % 4 == 0:
+            test_id = f"test.pkg.not_null_m{i}_a.{i}"
+            nodes[test_id] = {
+                "name": f"not_null_m{i}_a",
+                "unique_id": test_id,
+                "fqn": ["pkg", "not_null"],
+                "config": {"enabled": True},
+                "depends_on": {"nodes": [unique_id], "macros": []},
+                "tags": [],
+                "resource_type": "test",
+                "package_name": "pkg",
+                "path": f"not_null_m{i}_a.sql",
+                "root_path": root,
+                "original_file_path": f"models/{directory}/schema.yml",
+                "raw_code": "{{ test_not_null() }}",
+            }
+
+    nodes["snapshot.pkg.snap1"] = {
+        "name": "snap1",
+        "unique_id": "snapshot.pkg.snap1",
+        "fqn": ["pkg", "snap1"],
+        "config": {"enabled": True},
+        "depends_on": {"nodes": [model_ids[0]], "macros": []},
+        "tags": [],
+        "resource_type": "snapshot",
+        "package_name": "pkg",
+        "path": "snap1.sql",
+        "root_path": root,
+        "original_file_path": "snapshots/snap1.sql",
+        "raw_code": "select 1",
+    }
+
+    return {
+        "metadata": {"dbt_version": "1.3.0", "env": {}},
+        "nodes": nodes,
+        "sources": source_nodes,
+        "macros": {"macro.pkg.x": {"name": "x", "macro_sql": "select 1"}},
+        "exposures": {
+            "exposure.pkg.dashboard": {
+                "name": "dashboard",
+                "unique_id": "exposure.pkg.dashboard",
+                "fqn": ["pkg", "dashboard"],
+                "config": {"enabled": True},
+                "depends_on": {"nodes": [model_ids[-1]], "macros": []},
+                "tags": [],
+                "resource_type": "exposure",
+                "package_name": "pkg",
+                "path": "exposures.yml",
+                "root_path": root,
+                "original_file_path": "models/exposures.yml",
+                "owner": {"email": "owner@example.com"},
+            }
+        },
+        "metrics": {},
+        "docs": {},
+        "parent_map": {},
+        "child_map": {},
+    }
+
+
+def write_manifest(path: Path, manifest: Optional[Dict] = None, **kwargs) -> str:
+    """Write a manifest, by default a new synthetic one, and return its path."""
+    path.write_text(json.dumps(manifest or make_manifest(**kwargs)))
+    return str(path)
+
+
+def make_job(
+    jobby,
+    job_id: int,
+    name: str,
+    selectors: List[Tuple[Optional[List[str]], Optional[List[str]]]],
+) -> Job:
+    """A job with selectors, and the models they select."""
+    job = Job(job_id, name, [f"dbt build (job {job_id})"], selectors=list(selectors))
+    for select, exclude in job.selectors:
+        for unique_id in jobby.get_models_for_selector_strings(select, exclude):
+            job.models[unique_id] = jobby.manifest.get_model(unique_id)
+    return job
+
+
+# (select, exclude) pairs covering dbt's selector methods, graph operators,
+# intersections, unions and exclusions, on manifests from make_manifest.
+SELECTORS: List[Tuple[Optional[List[str]], Optional[List[str]]]] = [
+    (["m5"], None),
+    (["+m50"], None),
+    (["m10+"], None),
+    (["2+m120"], None),
+    (["m10+1"], None),
+    (["@m30"], None),
+    (["m16+,+m150"], None),
+    (["tag:daily"], None),
+    (["tag:daily,staging"], None),
+    (["tag:daily", "m7+"], ["m9"]),
+    (["path:models/staging"], None),
+    (["path:models/marts/core/m90.sql"], None),
+    (["source:src1+"], None),
+    (["source:src1.tbl4+"], None),
+    (["fqn:marts"], None),
+    (["staging"], None),
+    (["marts.core"], None),
+    (["pkg"], ["+m100"]),
+    (["m1 m2", "m3"], []),
+    (["snap1"], None),
+    (["+snap1+"], None),
+    (["+exposure:dashboard"], None),
+    (None, ["tag:daily"]),
+]
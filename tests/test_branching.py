@@ -0,0 +1,87 @@
+import random
+
+import networkx
+import pytest
+
+from jobby.branching import LongestPathDecomposition
+
+
+def networkx_decomposition(graph):
+    """The branching loop _create_new_selector ran before LongestPathDecomposition."""
+    paths = []
+    while len(graph) > 0:
+        if len(graph) <= 2:
+            paths.append(sorted(graph.nodes))
+            break
+        path = networkx.dag_longest_path(graph)
+        paths.append(path)
+        graph.remove_nodes_from(path)
+    return paths
+
+
+def decomposition(graph):
+    branches = LongestPathDecomposition(graph)
+    paths = []
+    while len(branches) > 0:
+        if len(branches) <= 2:
+            paths.append(sorted(branches.nodes))
+            break
+        path = branches.longest_path()
+        paths.append(path)
+        branches.remove(path)
+    return paths
+
+
+def random_dag(nodes, seed, max_parents=3, window=200, shuffle=False):
+    generator = random.Random(seed)
+    names = [f"model.pkg.m{i}" for i in range(nodes)]
+    edges = [
+        (names[parent], names[i])
+        for i in range(1, nodes)
+        for parent in generator.sample(
+            range(max(0, i - window), i), min(i, generator.randint(0, max_parents))
+        )
+    ]
+    if shuffle:
+        # Insertion order that is not a topological order.
+        generator.shuffle(names)
+        generator.shuffle(edges)
+
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(names)
+    graph.add_edges_from(edges)
+    return graph
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize(
+    "max_parents, window, shuffle",
+    [(3, 200, False), (2, 20, True), (1, 5, True), (4, 8, False)],
+)
+def test_matches_networkx(seed, max_parents, window, shuffle):
+    graph = random_dag(300, seed, max_parents, window, shuffle)
+    # Copying reorders each node's predecessors, which breaks ties between
+    # parents, so both are given a copy as _create_new_selector does.
+    assert decomposition(graph.copy()) == networkx_decomposition(graph.copy())
+
+
+def test_ties_between_equal_paths():
+    # Many paths of equal length, which only networkx's tie-break separates.
+    graph = networkx.DiGraph()
+    for chain in range(6):
+        for step in range(3):
+            graph.add_edge(f"c{chain}s{step}", f"c{chain}s{step + 1}")
+    graph.add_edges_from([("c5s0", "c0s1"), ("c2s2", "c4s3"), ("c1s1", "c3s2")])
+    graph.add_nodes_from(["a", "b", "z"])
+
+    assert decomposition(graph.copy()) == networkx_decomposition(graph.copy())
+
+
+def test_remove_updates_downstream_lengths():
+    graph = networkx.DiGraph([("a", "b"), ("b", "c"), ("c", "d"), ("x", "d")])
+    branches = LongestPathDecomposition(graph)
+    assert branches.longest_path() == ["a", "b", "c", "d"]
+
+    branches.remove(["b"])
+    assert branches.nodes == {"a", "c", "d", "x"}
+    assert branches.longest_path() == ["c", "d"]
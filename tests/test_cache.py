@@ -0,0 +1,145 @@
+import json
+import os
+import time
+
+import networkx
+
+import jobby.cache
+from jobby import Jobby
+from jobby.cache import ArtifactCache
+from jobby.metrics import MetricsCollector
+from tests.manifests import write_manifest
+
+
+def load(manifest_path, cache):
+    metrics = MetricsCollector()
+    jobby = Jobby(
+        1, "key", manifest_path=manifest_path, artifact_cache=cache, metrics=metrics
+    )
+    return jobby, "manifest.load" in metrics.phases
+
+
+def test_cached_manifest_and_graph_match(tmp_path, manifest_path):
+    cache = ArtifactCache(tmp_path / "cache")
+    loaded, parsed = load(manifest_path, cache)
+    cached, parsed_again = load(manifest_path, cache)
+
+    assert parsed and not parsed_again
+    assert list(cached.manifest.nodes) == list(loaded.manifest.nodes)
+    assert networkx.utils.graphs_equal(cached.graph.graph, loaded.graph.graph)
+    assert cached.get_models_for_selector_strings(
+        ["+m150"], None
+    ) == loaded.get_models_for_selector_strings(["+m150"], None)
+
+
+def test_changed_manifest_is_a_miss(tmp_path, manifest, manifest_path):
+    cache = ArtifactCache(tmp_path / "cache")
+    key = ArtifactCache.key_for_file(manifest_path)
+    load(manifest_path, cache)
+
+    manifest["nodes"]["model.pkg.m5"]["name"] = "renamed"
+    write_manifest(tmp_path / "manifest.json", manifest)
+    assert ArtifactCache.key_for_file(manifest_path) != key
+
+    jobby, parsed = load(manifest_path, cache)
+    assert parsed
+    assert jobby.manifest.get_model_name("model.pkg.m5") == "renamed"
+
+
+def test_key_depends_only_on_contents(tmp_path, manifest):
+    first = write_manifest(tmp_path / "first.json", manifest)
+    second = write_manifest(tmp_path / "second.json", manifest)
+    assert ArtifactCache.key_for_file(first) == ArtifactCache.key_for_file(second)
+
+
+def test_version_bump_is_a_miss(tmp_path, manifest_path, monkeypatch):
+    cache = ArtifactCache(tmp_path / "cache")
+    load(manifest_path, cache)
+    key = ArtifactCache.key_for_file(manifest_path)
+    assert cache.get(key) is not None
+
+    monkeypatch.setattr(jobby.cache, "CACHE_VERSION", jobby.cache.CACHE_VERSION + 1)
+    assert cache.get(key) is None
+    _, parsed = load(manifest_path, cache)
+    assert parsed
+    assert cache.get(key) is not None
+
+
+def test_corrupted_entry_is_discarded(tmp_path, manifest_path):
+    cache = ArtifactCache(tmp_path / "cache")
+    load(manifest_path, cache)
+    key = ArtifactCache.key_for_file(manifest_path)
+    path = cache._path(key)
+    path.write_bytes(path.read_bytes()[:100])
+
+    assert cache.get(key) is None
+    assert not path.exists()
+
+    jobby, parsed = load(manifest_path, cache)
+    assert parsed
+    assert len(jobby.manifest.nodes) > 0
+    assert cache.get(key) is not None
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ArtifactCache(tmp_path, max_age=60)
+    cache.put_timings("old", {"model.pkg.m1": 1.0})
+    cache.put_timings("new", {"model.pkg.m1": 2.0})
+    an_hour_ago = time.time() - 3600
+    os.utime(cache._path("old"), (an_hour_ago, an_hour_ago))
+
+    assert cache.get_timings("old") is None
+    assert cache.get_timings("new") == {"model.pkg.m1": 2.0}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ArtifactCache(tmp_path, max_size=None)
+    timings = {f"model.pkg.m{i}": float(i) for i in range(100)}
+    for age, key in enumerate(["a", "b", "c"]):
+        cache.put_timings(key, timings)
+        then = time.time() - 100 + age
+        os.utime(cache._path(key), (then, then))
+    cache.get_timings("a")
+
+    cache.max_size = 2 * cache._path("a").stat().st_size
+    cache.evict()
+
+    assert cache.get_timings("a") == timings
+    assert cache.get_timings("b") is None
+    assert cache.get_timings("c") == timings
+
+
+def test_cache_can_be_disabled(tmp_path, manifest_path):
+    jobby = Jobby(1, "key", manifest_path=manifest_path, use_cache=False)
+    assert jobby.artifact_cache is None
+    assert "model.pkg.m0" in jobby.manifest.nodes
+
+
+def test_last_known_good_run_survives_a_restart(tmp_path, cloud, manifest):
+    cloud.runs = [
+        {"id": run_id, "environment_id": 3, "is_success": True, "status": 10}
+        for run_id in (1, 2)
+    ]
+    cloud.artifacts[2, "manifest.json"] = json.dumps(manifest).encode()
+    cloud.artifacts[3, "manifest.json"] = json.dumps(manifest).encode()
+    cache = ArtifactCache(tmp_path / "cache")
+
+    def start():
+        return Jobby(1, "key", cloud.url, environemnt_id=3, artifact_cache=cache)
+
+    def downloads():
+        return [path for path in cloud.paths() if "/artifacts/" in path]
+
+    assert start()._manifest_run_id == 2
+    assert cache.get_run_id(ArtifactCache.key_for_environment(1, 3)) == 2
+
+    # A new process finds nothing newer than the saved run, and downloads nothing.
+    restarted = start()
+    assert restarted._manifest_run_id == 2
+    assert len(restarted.refresh().changed) == 0
+    assert downloads() == ["runs/2/artifacts/manifest.json"]
+
+    cloud.runs.append({"id": 3, "environment_id": 3, "is_success": True, "status": 10})
+    assert start()._manifest_run_id == 3
+    assert cache.get_run_id(ArtifactCache.key_for_environment(1, 3)) == 3
+    assert downloads()[1:] == ["runs/3/artifacts/manifest.json"]
@@ -0,0 +1,144 @@
+import random
+from collections import Counter
+
+import pytest
+
+from jobby import Jobby
+from jobby.cache import ArtifactCache
+from jobby.checkpoints import (
+    Checkpoint,
+    CheckpointMapping,
+    CheckpointStore,
+    _union,
+    digest,
+)
+from tests.manifests import SELECTORS, make_job
+
+
+@pytest.fixture
+def jobs(jobby):
+    return [
+        make_job(jobby, job_id, f"job {job_id}", [selector])
+        for job_id, selector in enumerate(SELECTORS[:8])
+    ]
+
+
+def job_models(jobs):
+    return {job.job_id: set(job.models) for job in jobs}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compare_matches_plain_sets(tmp_path, jobby, jobs, seed):
+    generator = random.Random(seed)
+    models = job_models(jobs)
+    store = CheckpointStore(tmp_path)
+    store.save(Checkpoint.create("before", models))
+
+    all_models = sorted(jobby.manifest.nodes)
+    for job_id in generator.sample(sorted(models), k=3):
+        models[job_id] ^= set(generator.sample(all_models, k=generator.randint(0, 5)))
+    models[100] = {"model.pkg.m1"}
+    del models[0]
+
+    # A new store reads the checkpoint back from disk.
+    result = CheckpointStore(tmp_path).compare("before", models)
+    original = set().union(*job_models(jobs).values())
+    current = set().union(*models.values())
+    assert result.missing == original - current
+    assert result.added == current - original
+    assert result.changed_jobs == {
+        job_id
+        for job_id in job_models(jobs).keys() | models.keys()
+        if job_models(jobs).get(job_id) != models.get(job_id)
+    }
+
+
+def test_unchanged_selection_is_stable(jobby, jobs):
+    jobby.save_job_checkpoint(jobs, "before")
+    jobs[1].models, jobs[2].models = jobs[2].models, jobs[1].models
+
+    assert jobby.validate_selection_stability(jobs, "before") == (set(), set())
+    result = jobby.validate_checkpoints(jobs)["before"]
+    assert result.stable
+    assert result.changed_jobs == set()
+
+
+def test_checkpoints_persist_next_to_the_artifact_cache(tmp_path, manifest_path, jobs):
+    cache = ArtifactCache(tmp_path / "cache")
+    Jobby(
+        1, "key", manifest_path=manifest_path, artifact_cache=cache
+    ).save_job_checkpoint(jobs, "before")
+    assert len(list((tmp_path / "cache" / "checkpoints").iterdir())) == 1
+
+    # A new Jobby, as in another process, validates against the saved checkpoint.
+    jobby = Jobby(1, "key", manifest_path=manifest_path, artifact_cache=cache)
+    assert jobby.validate_selection_stability(jobs, "before") == (set(), set())
+    # Remove a model that only one job selects.
+    owners = Counter(unique_id for job in jobs for unique_id in job.models)
+    job, removed = next(
+        (job, unique_id)
+        for job in jobs
+        for unique_id in sorted(job.models)
+        if owners[unique_id] == 1
+    )
+    del job.models[removed]
+    result = jobby.validate_checkpoints(jobs)["before"]
+    assert result.missing == {removed}
+    assert result.changed_jobs == {job.job_id}
+
+
+def test_unchanged_jobs_are_not_rehashed(jobby, jobs, monkeypatch):
+    jobby.save_job_checkpoint(jobs, "before")
+    original = set().union(*job_models(jobs).values())
+    hashed = []
+
+    def counting_digest(unique_ids):
+        hashed.append(set(unique_ids))
+        return digest(unique_ids)
+
+    def union(models):
+        raise AssertionError("The selection was hashed as a whole.")
+
+    monkeypatch.setattr("jobby.types.job.digest", counting_digest)
+    monkeypatch.setattr("jobby.checkpoints._union", union)
+    assert jobby.validate_checkpoints(jobs)["before"].stable
+    assert jobby.validate_selection_stability(jobs, "before") == (set(), set())
+    assert hashed == []
+
+    added = next(
+        unique_id
+        for unique_id in sorted(jobby.manifest.nodes)
+        if unique_id.startswith("model.") and unique_id not in original
+    )
+    jobs[1].models.update(jobby._build_models([added]))
+    monkeypatch.setattr("jobby.checkpoints._union", _union)
+    result = jobby.validate_checkpoints(jobs)["before"]
+    assert hashed == [set(jobs[1].models)]
+    assert result.added == {added}
+    assert result.changed_jobs == {1}
+
+
+def test_checkpoints_mapping(jobby, jobs):
+    jobby.save_job_checkpoint(jobs, "saved")
+    assert jobby.checkpoints["saved"] == set().union(*job_models(jobs).values())
+
+    jobby.checkpoints["seeded"] = {"model.pkg.m1", "model.pkg.m2"}
+    assert sorted(jobby.checkpoints) == ["saved", "seeded"]
+    result = jobby.validate_checkpoints(jobs[:1], ["seeded"])["seeded"]
+    assert result.missing == {"model.pkg.m1", "model.pkg.m2"} - set(jobs[0].models)
+    assert result.changed_jobs == set()
+
+    del jobby.checkpoints["saved"]
+    with pytest.raises(KeyError):
+        jobby.checkpoints["saved"]
+
+    jobby.checkpoints = {"only": set(jobs[0].models)}
+    assert dict(jobby.checkpoints) == {"only": set(jobs[0].models)}
+    jobby.validate_selection_stability(jobs[:1], "only")
+
+
+def test_mapping_reads_checkpoints_saved_elsewhere(tmp_path):
+    CheckpointMapping(CheckpointStore(tmp_path))["a b/c"] = ["model.pkg.m1"]
+    assert dict(CheckpointMapping(CheckpointStore(tmp_path))) == {
+        "a b/c": {"model.pkg.m1"}
+    }
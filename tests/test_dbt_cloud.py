@@ -0,0 +1,134 @@
+import pytest
+import requests
+
+from jobby.dbt_cloud import DBTCloud
+
+
+def client(cloud, **kwargs) -> DBTCloud:
+    kwargs.setdefault("backoff_factor", 0)
+    return DBTCloud(1, "key", cloud.url, **kwargs)
+
+
+def make_runs(count: int, job_id: int = 7, environment_id: int = 3, success=None):
+    success = success or (lambda run_id: True)
+    return [
+        {
+            "id": run_id,
+            "job_definition_id": job_id,
+            "environment_id": environment_id,
+            "is_success": success(run_id),
+            "status": 10 if success(run_id) else 20,
+        }
+        for run_id in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_failed_requests_are_retried(cloud, status):
+    cloud.jobs = [{"id": 1, "name": "a", "environment_id": 3}]
+    cloud.fail(status, times=2)
+
+    assert client(cloud).get_job(1)["name"] == "a"
+    assert cloud.paths() == ["jobs/1"] * 3
+
+
+def test_retry_after_is_honoured(cloud):
+    cloud.jobs = [{"id": 1, "name": "a", "environment_id": 3}]
+    cloud.fail(429, retry_after="1")
+
+    client(cloud).get_job(1)
+
+    (_, _, failed_at), (_, _, retried_at) = cloud.requests
+    assert retried_at - failed_at >= 0.9
+
+
+def test_error_is_raised_once_retries_run_out(cloud):
+    cloud.fail(503, times=10)
+
+    with pytest.raises(requests.HTTPError) as error:
+        client(cloud, retries=2).get_job(1)
+
+    assert error.value.response.status_code == 503
+    assert cloud.paths() == ["jobs/1"] * 3
+
+
+def test_client_errors_are_not_retried(cloud):
+    with pytest.raises(requests.HTTPError):
+        client(cloud).get_artifact(1, "manifest.json")
+    assert len(cloud.requests) == 1
+
+
+def test_pages_are_returned_in_order(cloud):
+    cloud.jobs = [
+        {"id": job_id, "name": str(job_id), "environment_id": job_id % 2}
+        for job_id in range(95)
+    ]
+    # Later pages finish first.
+    cloud.delays = {10: 0.2, 20: 0.1}
+
+    jobs = client(cloud, max_workers=3).get_jobs(1)
+
+    assert [job["id"] for job in jobs] == list(range(1, 95, 2))
+    offsets = [int(query.get("offset", 0)) for _, query, _ in cloud.requests]
+    assert sorted(offsets) == list(range(0, 95, 10))
+
+
+def test_recent_runs_stop_at_the_first_window_with_enough(cloud):
+    # Runs are returned newest first, 10 a page, and only runs 61 and below
+    # succeed, so run 59 is on the page at offset 140 of 190.
+    cloud.runs = make_runs(200, success=lambda run_id: run_id <= 61)
+
+    runs = client(cloud, max_workers=2).get_recent_successful_runs(7, count=3)
+
+    assert [run["id"] for run in runs] == [61, 60, 59]
+    # The first page, then windows of two pages up to the one holding run 59.
+    offsets = sorted(int(query.get("offset", 0)) for _, query, _ in cloud.requests)
+    assert offsets == list(range(0, 150, 10))
+
+
+def test_recent_runs_return_what_there_is(cloud):
+    cloud.runs = make_runs(25, success=lambda run_id: run_id == 4)
+
+    runs = client(cloud).get_recent_successful_runs(7, count=5)
+
+    assert [run["id"] for run in runs] == [4]
+    assert len(cloud.requests) == 3
+
+
+@pytest.mark.parametrize("environment_id", [3, "3"], ids=["int", "str"])
+def test_latest_run_uses_the_runs_filter(cloud, environment_id):
+    cloud.runs = make_runs(5) + [
+        {**run, "id": run["id"] + 10} for run in make_runs(2, environment_id=4)
+    ]
+
+    run = client(cloud).get_latest_run(environment_id)
+
+    assert run["id"] == 5
+    assert cloud.paths() == ["runs/"]
+
+
+@pytest.mark.parametrize("environment_id", [3, "3"], ids=["int", "str"])
+def test_latest_run_falls_back_to_the_first_job(cloud, environment_id):
+    cloud.filter_runs = False
+    cloud.jobs = [
+        {"id": 8, "name": "other", "environment_id": 4},
+        {"id": 7, "name": "a", "environment_id": 3},
+    ]
+    cloud.runs = make_runs(5, success=lambda run_id: run_id < 4) + [
+        {**run, "id": run["id"] + 10}
+        for run in make_runs(2, job_id=8, environment_id=4)
+    ]
+
+    run = client(cloud).get_latest_run(environment_id)
+
+    assert run["id"] == 3
+    assert "jobs/" in cloud.paths()
+
+
+def test_latest_manifest_is_read_from_the_latest_run(cloud):
+    cloud.runs = make_runs(2)
+    cloud.artifacts[2, "manifest.json"] = b'{"nodes": {}}'
+
+    assert client(cloud).get_latest_manifest(3) == {"nodes": {}}
+    assert client(cloud).get_latest_manifest_content(3) == b'{"nodes": {}}'
+    assert cloud.paths().count("runs/2/artifacts/manifest.json") == 2
@@ -0,0 +1,121 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from jobby.types.manifest import SECTIONS, GenericNode, Manifest
+
+
+def assert_same_nodes(manifest: Manifest, other: Manifest) -> None:
+    for name in SECTIONS:
+        section, other_section = getattr(manifest, name), getattr(other, name)
+        assert list(section) == list(other_section)
+        for unique_id, node in section.items():
+            other_node = other_section[unique_id]
+            for slot in GenericNode.__slots__:
+                assert getattr(node, slot) == getattr(other_node, slot), (
+                    unique_id,
+                    slot,
+                )
+
+
+@pytest.mark.parametrize("source", ["path", "bytes", "file"])
+def test_load_matches_dict(manifest, manifest_path, source):
+    if source == "path":
+        loaded = Manifest.load(manifest_path)
+    elif source == "bytes":
+        loaded = Manifest.load(json.dumps(manifest).encode())
+    else:
+        loaded = Manifest.load(io.BytesIO(json.dumps(manifest).encode()))
+
+    expected = Manifest(manifest)
+    assert_same_nodes(loaded, expected)
+    assert [loaded.node_index.position(u) for u, _ in loaded.all_nodes()] == [
+        expected.node_index.position(u) for u, _ in expected.all_nodes()
+    ]
+
+
+def test_nodes_match_manifest_fields(manifest, manifest_path):
+    """Every field the pydantic nodes exposed keeps its value."""
+    loaded = Manifest.load(manifest_path)
+    for name in SECTIONS:
+        for unique_id, value in manifest[name].items():
+            node = getattr(loaded, name)[unique_id]
+            assert node.name == value["name"]
+            assert node.unique_id == value["unique_id"]
+            assert list(node.fqn) == value["fqn"]
+            assert node.tags == set(value["tags"])
+            assert node.resource_type == value["resource_type"]
+            assert node.package_name == value["package_name"]
+            assert node.source_name == value.get("source_name")
+            assert node.path == value["path"]
+            assert node.root_path == value["root_path"]
+            assert node.original_file_path == value["original_file_path"]
+            assert node.config.enabled == value["config"]["enabled"]
+            assert node.depends_on_nodes == tuple(
+                value.get("depends_on", {}).get("nodes", [])
+            )
+            assert node.empty is False
+
+
+def test_repeated_values_are_shared(manifest_path):
+    loaded = Manifest.load(manifest_path)
+    nodes = list(loaded.nodes.values()) + list(loaded.sources.values())
+
+    fqns = {}
+    for node in nodes:
+        assert fqns.setdefault(node.fqn, node.fqn) is node.fqn
+    tags = {}
+    for node in nodes:
+        assert tags.setdefault(node.tags, node.tags) is node.tags
+
+    staging = [node for node in nodes if node.fqn[1:2] == ("staging",)]
+    assert len(staging) > 1
+    assert all(node.fqn[1] is staging[0].fqn[1] for node in staging)
+    assert all(node.package_name is staging[0].package_name for node in staging)
+
+
+def test_large_and_unknown_properties_are_skipped():
+    node = {
+        "name": "m",
+        "unique_id": "model.pkg.m",
+        "fqn": ["pkg", "m"],
+        "config": {"meta": {"owners": [{"a": [1, {"b": None}]}]}, "enabled": False},
+        "depends_on": {"macros": [["nested"]], "nodes": ["source.pkg.s.t"]},
+        "tags": ["a"],
+        "resource_type": "model",
+        "package_name": "pkg",
+        "path": "m.sql",
+        "root_path": "/project",
+        "original_file_path": "models/m.sql",
+        "raw_code": "select 1",
+        "columns": {"a": {"name": "a", "data_type": None, "quote": [True, 1.5]}},
+        "docs": {"show": True},
+        "empty": True,
+        "unknown_property": [[{}], []],
+    }
+    data = {
+        "metadata": {"env": {"nested": [{"a": 1}]}},
+        "nodes": {"model.pkg.m": node},
+        "sources": {},
+        "exposures": {},
+        "metrics": None,
+        "disabled": {"model.pkg.d": [node]},
+    }
+
+    loaded = Manifest.load(json.dumps(data).encode())
+    data["metrics"] = {}
+    assert_same_nodes(loaded, Manifest(data))
+
+    loaded_node = loaded.nodes["model.pkg.m"]
+    assert not hasattr(loaded_node, "raw_code")
+    assert loaded_node.config.enabled is False
+    assert loaded_node.empty is True
+    assert loaded_node.depends_on_nodes == ("source.pkg.s.t",)
+    assert not loaded.is_graph_member("model.pkg.m")
+
+
+def test_nodes_pickle(manifest_path):
+    loaded = Manifest.load(manifest_path)
+    assert_same_nodes(pickle.loads(pickle.dumps(loaded)), loaded)
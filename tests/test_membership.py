@@ -0,0 +1,112 @@
+import networkx
+import pytest
+
+from jobby.membership import MembershipIndex
+from jobby.types.job import Job
+from tests.manifests import make_job
+
+
+@pytest.fixture
+def jobs(jobby):
+    return [
+        make_job(jobby, 1, "staging", [(["staging"], None)]),
+        make_job(jobby, 2, "marts", [(["marts"], None)]),
+        make_job(jobby, 3, "daily", [(["tag:daily"], None)]),
+    ]
+
+
+def test_duplicates_are_settled_in_topological_order(jobby, jobs, monkeypatch):
+    settled = []
+    children = jobby.reachability.children
+
+    def record(unique_id):
+        settled.append(unique_id)
+        return children(unique_id)
+
+    monkeypatch.setattr(jobby.reachability, "children", record)
+    _, _, order = jobby.selector_generator.foundation
+    plan = MembershipIndex(jobs).deduplicate(order, jobby.reachability)
+
+    assert len(plan.owners) > 0
+    assert settled == sorted(settled, key=order.__getitem__)
+    assert set(settled) == set(plan.owners) | set(plan.skipped)
+
+
+def test_deduplicated_jobs_build_each_model_once(jobby, jobs):
+    before = set().union(*(job.models for job in jobs))
+    plan = jobby.deduplicate_jobs(jobs)
+
+    membership = MembershipIndex(jobs)
+    assert set(membership.job_ids) == before
+    assert {
+        unique_id
+        for unique_id, job_ids in membership.job_ids.items()
+        if len(job_ids) > 1
+    } == set(plan.skipped)
+    assert networkx.is_directed_acyclic_graph(networkx.DiGraph(plan.dependencies))
+
+
+def test_models_missing_from_the_graph_are_skipped(jobby, jobs):
+    stale = "model.pkg.removed"
+    for job in jobs[:2]:
+        job.models[stale] = None
+
+    _, _, order = jobby.selector_generator.foundation
+    plan = MembershipIndex(jobs).deduplicate(order, jobby.reachability)
+    assert stale in plan.skipped
+    assert stale not in plan.owners
+    assert all(stale not in unique_ids for unique_ids, _, _ in plan.transfers)
+
+
+def test_duplicates_rank_by_wasted_time(jobby):
+    jobs = [
+        Job(1, "a", [], models={"model.pkg.m1": None, "model.pkg.m2": None}),
+        Job(2, "b", [], models={"model.pkg.m1": None, "model.pkg.m2": None}),
+        Job(3, "c", [], models={"model.pkg.m1": None}),
+    ]
+    membership = MembershipIndex(jobs)
+    assert [duplicate.unique_id for duplicate in membership.duplicates()] == [
+        "model.pkg.m1",
+        "model.pkg.m2",
+    ]
+
+    ranked = membership.duplicates({"model.pkg.m1": 1.0, "model.pkg.m2": 5.0})
+    assert [duplicate.wasted_time for duplicate in ranked] == [5.0, 2.0]
+
+
+def test_impacted_jobs_of_an_upstream_change(jobby):
+    changed = "model.pkg.m10"
+    descendants = networkx.descendants(jobby.graph.graph, changed)
+    unrelated = next(
+        unique_id
+        for unique_id in sorted(jobby.manifest.nodes)
+        if unique_id.startswith("model.")
+        and unique_id not in descendants
+        and unique_id != changed
+    )
+    jobs = [
+        make_job(jobby, 1, "changed", [(["m10"], None)]),
+        make_job(jobby, 2, "downstream", [(["m10+"], ["m10"])]),
+        make_job(jobby, 3, "unrelated", [([unrelated.split(".")[-1]], None)]),
+    ]
+    assert len(jobs[1].models) > 0
+
+    impacted = jobby.impacted_jobs([changed], jobs)
+    assert impacted.direct == {1}
+    assert impacted.downstream == {2}
+
+
+def test_impacted_jobs_of_a_model_no_job_contains(jobby):
+    jobs = [
+        make_job(jobby, 1, "m10", [(["m10"], None)]),
+        make_job(jobby, 2, "downstream", [(["m10+"], ["m10"])]),
+    ]
+    source = next(iter(jobby.reachability.parents("model.pkg.m10")))
+
+    impacted = jobby.impacted_jobs([source], jobs)
+    assert impacted.direct == set()
+    assert impacted.downstream == {1, 2}
+
+    impacted = jobby.impacted_jobs(["model.pkg.new"], jobs)
+    assert impacted.direct == set()
+    assert impacted.downstream == set()
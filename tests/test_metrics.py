@@ -0,0 +1,75 @@
+import json
+
+from jobby import Jobby
+from jobby.metrics import MetricsCollector, NullMetrics
+from tests.manifests import make_job
+
+
+def test_phases_are_timed_counted_and_reported_to_the_hook():
+    calls = []
+    metrics = MetricsCollector(hook=lambda *call: calls.append(call))
+
+    with metrics.phase("outer", items=2) as outer:
+        with metrics.phase("inner"):
+            pass
+        with metrics.phase("inner", items=3):
+            pass
+        outer.items += 1
+    metrics.count("requests")
+    metrics.count("bytes", 10)
+    metrics.count("bytes", 5)
+
+    assert [(name, items) for name, _, items in calls] == [
+        ("inner", 0),
+        ("inner", 3),
+        ("outer", 3),
+    ]
+    report = metrics.report()
+    assert report["phases"]["inner"]["calls"] == 2
+    assert report["phases"]["inner"]["items"] == 3
+    assert report["phases"]["outer"] == {
+        "calls": 1,
+        "time": calls[2][1],
+        "items": 3,
+    }
+    # A phase's time includes the phases nested in it.
+    assert report["phases"]["outer"]["time"] >= calls[0][1] + calls[1][1]
+    assert report["counters"] == {"requests": 1, "bytes": 15}
+    assert json.loads(metrics.to_json()) == report
+
+    metrics.reset()
+    assert metrics.report() == {"phases": {}, "counters": {}}
+
+
+def test_null_metrics_record_nothing():
+    metrics = NullMetrics(hook=lambda *call: 1 / 0)
+    with metrics.phase("work", items=5) as phase:
+        phase.items += 1
+    metrics.count("requests")
+
+    assert not metrics.enabled
+    assert metrics.report() == {"phases": {}, "counters": {}}
+
+
+def test_jobby_reports_metrics(manifest_path):
+    metrics = MetricsCollector()
+    jobby = Jobby(
+        1, "key", manifest_path=manifest_path, use_cache=False, metrics=metrics
+    )
+    jobby.resolve_jobs([make_job(jobby, 1, "job", [(["m10+"], None)])])
+
+    report = jobby.metrics_report()
+    assert {"manifest.load", "graph.compile", "selectors.resolve"} <= set(
+        report["phases"]
+    )
+    assert report["selector_cache"]["atom_misses"] > 0
+
+
+def test_metrics_report_with_metrics_disabled(jobby):
+    jobby.resolve_jobs([make_job(jobby, 1, "job", [(["m10+"], None)])])
+
+    report = jobby.metrics_report()
+    assert isinstance(jobby.metrics, NullMetrics)
+    assert report["phases"] == {}
+    assert report["counters"] == {}
+    assert report["selector_cache"] == jobby.selector_cache.stats.as_dict()
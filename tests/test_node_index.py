@@ -0,0 +1,116 @@
+import copy
+import pickle
+import random
+from itertools import combinations
+
+import pytest
+
+from jobby.operations import model_overlap
+from jobby.types.node_index import NodeIndex
+from tests.manifests import SELECTORS, make_job
+
+UNIQUE_IDS = [f"model.pkg.m{i}" for i in range(300)]
+
+
+def random_sets(count, seed=1):
+    generator = random.Random(seed)
+    return [
+        set(generator.sample(UNIQUE_IDS, generator.randint(0, 120)))
+        for _ in range(count)
+    ]
+
+
+def test_set_algebra_matches_sets():
+    index = NodeIndex(UNIQUE_IDS)
+    sets = random_sets(12)
+    for first, second in combinations(sets, 2):
+        a, b = index.encode(first), index.encode(second)
+        assert index.decode(a | b) == first | second
+        assert index.decode(a & b) == first & second
+        assert index.decode(a & ~b) == first - second
+        assert index.decode(a ^ b) == first ^ second
+        assert NodeIndex.count(a & b) == len(first & second)
+
+
+def test_decoding_follows_index_order():
+    index = NodeIndex(UNIQUE_IDS)
+    members = {UNIQUE_IDS[i] for i in (299, 0, 64, 7, 8)}
+    assert list(index.iterate(index.encode(members))) == [
+        unique_id for unique_id in UNIQUE_IDS if unique_id in members
+    ]
+    assert index.decode(0) == set()
+    assert NodeIndex.count(0) == 0
+
+
+def test_positions_never_move():
+    index = NodeIndex(UNIQUE_IDS[:10])
+    bits = index.encode(UNIQUE_IDS[2:5])
+    assert index.add(UNIQUE_IDS[3]) == 3
+    for unique_id in UNIQUE_IDS[10:]:
+        index.add(unique_id)
+    assert index.decode(bits) == set(UNIQUE_IDS[2:5])
+    assert len(index) == len(UNIQUE_IDS)
+
+
+def test_unknown_unique_ids_are_rejected():
+    with pytest.raises(KeyError):
+        NodeIndex(UNIQUE_IDS[:3]).encode(["model.pkg.missing"])
+
+
+def test_job_bits_follow_model_changes(jobby):
+    index = jobby.manifest.node_index
+    job = make_job(jobby, 1, "job", [(["m10+"], None)])
+
+    def check():
+        assert index.decode(job.bits(index)) == set(job.models)
+
+    check()
+    model = job.pop_model(next(iter(job.models)))
+    check()
+    job.add_model(model)
+    check()
+    job.models.update({"model.pkg.m1": jobby.manifest.get_model("model.pkg.m1")})
+    check()
+    del job.models["model.pkg.m1"]
+    check()
+    job.models = {}
+    check()
+    assert job.bits(index) == 0
+
+
+def test_job_bits_follow_the_index(jobby):
+    job = make_job(jobby, 1, "job", [(["m10+"], None)])
+    forward = NodeIndex(sorted(jobby.manifest.nodes))
+    backward = NodeIndex(sorted(jobby.manifest.nodes, reverse=True))
+
+    for index in [forward, backward, forward]:
+        assert job.bits(index) == index.encode(job.models)
+
+    # Copies drop the cached bitset, which holds the index weakly.
+    for copied in [copy.deepcopy(job), pickle.loads(pickle.dumps(job))]:
+        assert copied.bits(backward) == backward.encode(job.models)
+
+
+def test_model_overlap_matches_set_intersections(jobby):
+    jobs = [
+        make_job(jobby, job_id, f"job {job_id}", [selection])
+        for job_id, selection in enumerate(SELECTORS)
+    ]
+    expected = {
+        (first.job_id, second.job_id): len(first.models.keys() & second.models.keys())
+        for first, second in combinations(jobs, 2)
+    }
+    expected = {pair: count for pair, count in expected.items() if count > 0}
+
+    assert model_overlap(jobs, jobby.manifest.node_index) == expected
+
+
+def test_union_keeps_every_model(jobby):
+    index = jobby.manifest.node_index
+    first = make_job(jobby, 1, "first", [(["+m120"], None)])
+    second = make_job(jobby, 2, "second", [(["m40+"], None)])
+
+    union = first.union([second])
+
+    assert union.bits(index) == first.bits(index) | second.bits(index)
+    assert index.decode(union.bits(index)) == set(first.models) | set(second.models)
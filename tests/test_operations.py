@@ -0,0 +1,183 @@
+import json
+import re
+from collections import Counter
+
+import networkx
+import pytest
+
+from jobby.operations import generate_dot_graph, job_dependency_graph, write_graph
+from jobby.types.job import Job
+
+
+def build_job(jobby, job_id, select, exclude=None):
+    job = Job(job_id, f"job {job_id}", [], selectors=[(select, exclude)])
+    job.models = jobby._build_models(
+        unique_id
+        for unique_id in jobby.get_models_for_selector_strings(select, exclude)
+        if unique_id.startswith("model.")
+    )
+    return job
+
+
+@pytest.fixture
+def jobs(jobby):
+    # The jobs share m16, and everything between it and m150.
+    return [build_job(jobby, 1, ["+m150"]), build_job(jobby, 2, ["m16+"])]
+
+
+def expected_graph(jobs):
+    models = {
+        unique_id: model for job in jobs for unique_id, model in job.models.items()
+    }
+    edges = {
+        (depends_on, unique_id)
+        for unique_id, model in models.items()
+        for depends_on in model.depends_on
+        if not depends_on.startswith("test.")
+    }
+    nodes = set(models) | {source for source, _ in edges}
+    return nodes, edges
+
+
+def unquote(name):
+    return name.strip('"')
+
+
+def dot_nodes_and_edges(graph):
+    graphs = [graph, *graph.get_subgraphs()]
+    nodes = [
+        unquote(node.get_name())
+        for subgraph in graphs
+        for node in subgraph.get_nodes()
+        if unquote(node.get_name()) not in ("node", "edge", "graph")
+    ]
+    edges = [
+        (unquote(edge.get_source()), unquote(edge.get_destination()))
+        for subgraph in graphs
+        for edge in subgraph.get_edges()
+    ]
+    return nodes, edges
+
+
+def parse_dot(path):
+    """Read the nodes and edges of a DOT file written by write_graph."""
+    nodes, edges = [], []
+    for line in path.read_text().splitlines():
+        edge = re.match(r'\s*"(.+?)" -> "(.+?)"', line)
+        node = re.match(r'\s*"(.+?)" \[', line)
+        if edge:
+            edges.append(edge.groups())
+        elif node:
+            nodes.append(node.group(1))
+    return nodes, edges
+
+
+def assert_unique(nodes, edges, jobs):
+    expected_nodes, expected_edges = expected_graph(jobs)
+    assert Counter(nodes) == Counter(expected_nodes)
+    assert Counter(edges) == Counter(expected_edges)
+
+
+def test_jobs_overlap(jobs):
+    assert set(jobs[0].models) & set(jobs[1].models)
+
+
+def test_dot(jobs, tmp_path):
+    path = tmp_path / "jobs.dot"
+    write_graph(jobs, path)
+    assert path.read_text().startswith('digraph "jobs" {')
+    assert_unique(*parse_dot(path), jobs)
+
+
+def test_generated_dot_graph(jobs):
+    assert_unique(*dot_nodes_and_edges(generate_dot_graph(jobs, "jobs")), jobs)
+
+
+def test_graphml(jobs, tmp_path):
+    path = tmp_path / "jobs.graphml"
+    write_graph(jobs, path)
+    graph = networkx.read_graphml(path)
+    assert_unique(list(graph.nodes), list(graph.edges), jobs)
+    # Shared models are drawn in the first job that builds them.
+    assert graph.nodes["model.pkg.m16"]["job"] == 1
+    assert graph.nodes["model.pkg.m190"]["job"] == 2
+
+
+def test_json(jobs, tmp_path):
+    path = tmp_path / "graph.txt"
+    write_graph(jobs, path, name="all", graph_format="json")
+    with open(path) as file:
+        graph = json.load(file)
+    assert graph["name"] == "all"
+    assert_unique(
+        [node["id"] for node in graph["nodes"]],
+        [(edge["source"], edge["target"]) for edge in graph["edges"]],
+        jobs,
+    )
+
+
+@pytest.mark.parametrize("suffix", [".dot", ".graphml", ".json"])
+def test_collapsed_jobs(jobby, tmp_path, suffix):
+    jobs = [
+        build_job(jobby, 1, ["+m40"]),
+        build_job(jobby, 2, ["m40+"], ["m40"]),
+        Job(3, "empty", []),
+    ]
+    path = tmp_path / f"jobs{suffix}"
+    write_graph(jobs, path, collapse_jobs=True)
+
+    if suffix == ".dot":
+        nodes, edges = parse_dot(path)
+    elif suffix == ".graphml":
+        graph = networkx.read_graphml(path)
+        nodes, edges = list(graph.nodes), list(graph.edges)
+    else:
+        graph = json.loads(path.read_text())
+        nodes = [node["id"] for node in graph["nodes"]]
+        edges = [(edge["source"], edge["target"]) for edge in graph["edges"]]
+
+    assert sorted(nodes) == ["job_1", "job_2", "job_3"]
+    assert edges == [("job_1", "job_2")]
+
+
+def test_unknown_formats_are_rejected(jobs, tmp_path):
+    with pytest.raises(Exception, match="Supported formats"):
+        write_graph(jobs, tmp_path / "jobs.png")
+
+
+def test_job_dependency_graph(jobby):
+    upstream = build_job(jobby, 1, ["+m40"])
+    downstream = build_job(jobby, 2, ["m40+"], ["m40"])
+    related = set(upstream.models) | set(downstream.models)
+    for model in downstream.models:
+        related |= networkx.ancestors(jobby.graph.graph, model)
+    alone = next(
+        unique_id.split(".")[-1]
+        for unique_id in sorted(jobby.manifest.nodes)
+        if unique_id.startswith("model.")
+        and unique_id not in related
+        and all(
+            parent.startswith("source.")
+            for parent in jobby.reachability.parents(unique_id)
+        )
+    )
+    jobs = [upstream, downstream, build_job(jobby, 3, [alone])]
+
+    needed = {
+        parent
+        for model in downstream.models.values()
+        for parent in model.depends_on
+        if parent in upstream.models
+    }
+    assert "model.pkg.m40" in needed
+
+    graph = jobby.job_dependency_graph(jobs)
+    assert set(graph.nodes) == {1, 2, 3}
+    assert list(graph.edges) == [(1, 2)]
+    assert graph.edges[1, 2]["models"] == needed
+    assert graph.edges[1, 2]["weight"] == len(needed)
+    assert graph.degree(3) == 0
+    assert graph.nodes[3] == {"name": "job 3", "models": 1}
+
+    # Without the compiled graph, dependencies come from each Model.
+    assert list(job_dependency_graph(jobs).edges(data="models")) == [(1, 2, needed)]
@@ -0,0 +1,94 @@
+import random
+
+import networkx
+import pytest
+
+from jobby.partitioner import JobPartitioner
+from tests.manifests import make_job
+
+
+def random_dag(seed, size=40):
+    generator = random.Random(seed)
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(f"model.pkg.m{i}" for i in range(size))
+    for i in range(1, size):
+        for parent in generator.sample(range(i), k=min(i, generator.randint(0, 3))):
+            graph.add_edge(f"model.pkg.m{parent}", f"model.pkg.m{i}")
+    timings = {node: generator.choice([0.5, 1, 5, 30]) for node in graph}
+    return graph, timings
+
+
+def job_graph(graph, partitions):
+    owner = {node: job for job, nodes in enumerate(partitions) for node in nodes}
+    jobs = networkx.DiGraph()
+    jobs.add_nodes_from(range(len(partitions)))
+    jobs.add_edges_from(
+        (owner[parent], owner[child])
+        for parent, child in graph.subgraph(owner).edges
+        if owner[parent] != owner[child]
+    )
+    return jobs
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_partitions_cover_every_model_in_acyclic_jobs(seed):
+    graph, timings = random_dag(seed)
+    models = set(random.Random(seed).sample(sorted(graph), k=30))
+    k = seed % 5 + 1
+
+    plan = JobPartitioner(graph, timings, threads=2).partition(models, k)
+
+    assert 1 <= len(plan.partitions) <= k
+    assert set().union(*plan.partitions) == models
+    assert sum(len(partition) for partition in plan.partitions) == len(models)
+    assert all(len(partition) > 0 for partition in plan.partitions)
+    assert networkx.is_directed_acyclic_graph(job_graph(graph, plan.partitions))
+
+
+def test_independent_slow_models_are_split():
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(["a", "b"])
+    graph.add_edges_from([("a", "a1"), ("b", "b1")])
+    timings = {"a": 100.0, "b": 100.0, "a1": 1.0, "b1": 1.0}
+
+    plan = JobPartitioner(graph, timings, threads=1).partition(set(timings), 3)
+
+    assert sorted(map(sorted, plan.partitions)) == [["a", "a1"], ["b", "b1"]]
+    assert plan.makespan == 101.0
+    assert plan.durations == [101.0, 101.0]
+    assert plan.cross_edges == 0
+
+
+def test_a_chain_is_not_split():
+    graph = networkx.path_graph(["a", "b", "c"], create_using=networkx.DiGraph)
+    timings = {"a": 50.0, "b": 1.0, "c": 50.0}
+
+    plan = JobPartitioner(graph, timings, threads=1).partition(set(timings), 3)
+
+    assert plan.partitions == [{"a", "b", "c"}]
+    assert plan.makespan == 101.0
+    assert plan.cross_edges == 0
+
+
+def test_partition_count_must_be_positive():
+    with pytest.raises(Exception):
+        JobPartitioner(networkx.DiGraph(), {}).partition([], 0)
+
+
+def test_partition_job_builds_verified_jobs(jobby):
+    job = make_job(jobby, 1, "all", [(["pkg"], None)])
+    timings = {unique_id: 1.0 for unique_id in job.models}
+
+    plan = jobby.partition_job(
+        job, 3, timings=timings, threads=1, cross_edge_penalty=0.0, optimize=False
+    )
+
+    assert 1 < len(plan.jobs) <= 3
+    assert plan.jobs[0].job_id == 1
+    assert all(new_job.job_id is None for new_job in plan.jobs[1:])
+    assert [set(new_job.models) for new_job in plan.jobs] == plan.partitions
+    for new_job in plan.jobs:
+        selected = set()
+        for select, exclude in new_job.selectors:
+            selected |= jobby.get_models_for_selector_strings(select, exclude)
+        assert selected == set(new_job.models)
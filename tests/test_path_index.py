@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+
+from jobby import Jobby
+from jobby.path_index import PathIndex
+from tests.manifests import make_manifest, write_manifest
+
+GLOBS = [
+    "models",
+    "models/staging",
+    "models/marts/*",
+    "models/*/core",
+    "models/**/m7*.sql",
+    "models/marts/core/m90.sql",
+    "models/staging/m1?.sql",
+    "models/[si]*",
+    "models/**",
+    "**/schema.yml",
+    "models/sources.yml",
+    "snapshots",
+    "*",
+    "missing",
+    "models/missing/*.sql",
+]
+
+
+def filesystem_search(root: Path, nodes, selector: str):
+    """The path method jobby used before PathIndex: a glob of the project."""
+    paths = {path.relative_to(root) for path in root.glob(selector)}
+    return {
+        unique_id
+        for unique_id, original_file_path in nodes
+        if Path(original_file_path) in paths
+        or any(parent in paths for parent in Path(original_file_path).parents)
+    }
+
+
+@pytest.fixture
+def project(tmp_path):
+    manifest = make_manifest(models=60, root=str(tmp_path))
+    nodes = [
+        (unique_id, node["original_file_path"])
+        for section in ("nodes", "sources", "exposures")
+        for unique_id, node in manifest[section].items()
+    ]
+    for _, original_file_path in nodes:
+        path = tmp_path / original_file_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    return tmp_path, manifest, nodes
+
+
+@pytest.mark.parametrize("selector", GLOBS)
+def test_search_matches_filesystem_glob(project, selector):
+    root, _, nodes = project
+    assert PathIndex(nodes).search(selector) == filesystem_search(root, nodes, selector)
+
+
+def test_path_selector_matches_filesystem_glob(project):
+    root, manifest, nodes = project
+    manifest_path = write_manifest(root / "manifest.json", manifest)
+    jobby = Jobby(1, "key", manifest_path=manifest_path, use_cache=False)
+    models = {unique_id for unique_id in jobby.manifest.nodes if "model." in unique_id}
+
+    for selector in GLOBS:
+        selected = jobby.get_models_for_selector_strings([f"path:{selector}"], None)
+        assert selected == filesystem_search(root, nodes, selector) & models
+
+
+def test_empty_selector_is_rejected():
+    with pytest.raises(ValueError):
+        PathIndex([]).search("")
@@ -0,0 +1,34 @@
+import networkx
+
+from jobby.types.model import Model
+from tests.manifests import SELECTORS, make_job
+
+
+def test_model_dependencies_match_depends_on(jobby):
+    for job_id, selection in enumerate(SELECTORS):
+        job = make_job(jobby, job_id, "job", [selection])
+        assert job.model_dependencies(jobby.reachability) == job.model_dependencies()
+
+
+def test_unknown_models_are_skipped(jobby):
+    job = make_job(jobby, 1, "job", [(["m60+"], None)])
+    expected = job.model_dependencies(jobby.reachability)
+
+    job.models["model.pkg.gone"] = Model(
+        name="gone", unique_id="model.pkg.gone", depends_on={"model.pkg.m1"}
+    )
+
+    assert "model.pkg.gone" not in jobby.reachability
+    assert job.model_dependencies(jobby.reachability) == expected
+
+
+def test_closures_match_networkx(jobby):
+    graph = jobby.graph.graph
+    index = jobby.manifest.node_index
+    for unique_id in ["model.pkg.m150", "model.pkg.m30", "source.pkg.src1.tbl4"]:
+        assert index.decode(
+            jobby.reachability.ancestors(unique_id)
+        ) == networkx.ancestors(graph, unique_id)
+        assert index.decode(
+            jobby.reachability.descendants(unique_id)
+        ) == networkx.descendants(graph, unique_id)
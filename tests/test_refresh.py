@@ -0,0 +1,72 @@
+import copy
+
+import pytest
+
+from jobby import Jobby
+from tests.manifests import SELECTORS, make_job, write_manifest
+
+
+def change_manifest(manifest):
+    """Add, remove and modify models, tags and dependencies."""
+    manifest = copy.deepcopy(manifest)
+    nodes = manifest["nodes"]
+
+    parents = {
+        parent
+        for node in [*nodes.values(), *manifest["exposures"].values()]
+        for parent in node["depends_on"]["nodes"]
+    }
+    leaf = next(
+        unique_id
+        for unique_id in sorted(nodes)
+        if unique_id.startswith("model.") and unique_id not in parents
+    )
+    del nodes[leaf]
+
+    nodes["model.pkg.m10"]["tags"] = ["hourly"]
+    nodes["model.pkg.m120"]["depends_on"]["nodes"].append("model.pkg.m5")
+    new = copy.deepcopy(nodes["model.pkg.m150"])
+    new.update(
+        name="m_new",
+        unique_id="model.pkg.m_new",
+        fqn=["pkg", "staging", "m_new"],
+        path="staging/m_new.sql",
+        original_file_path="models/staging/m_new.sql",
+        depends_on={"nodes": ["model.pkg.m150"], "macros": []},
+        tags=["daily"],
+    )
+    nodes[new["unique_id"]] = new
+    return manifest, leaf
+
+
+@pytest.fixture
+def changed(tmp_path, manifest):
+    new_manifest, leaf = change_manifest(manifest)
+    return write_manifest(tmp_path / "new_manifest.json", new_manifest), leaf
+
+
+def test_refresh_matches_a_fresh_build(jobby, changed):
+    path, _ = changed
+    jobs = [
+        make_job(jobby, job_id, f"job {job_id}", [selector])
+        for job_id, selector in enumerate(SELECTORS)
+    ]
+    report = jobby.refresh(manifest_path=path, jobs=jobs)
+    assert len(report.jobs) > 0
+
+    fresh = Jobby(1, "key", manifest_path=path, use_cache=False)
+    for job, selector in zip(jobs, SELECTORS):
+        expected = make_job(fresh, job.job_id, job.name, [selector])
+        assert set(job.models) == set(expected.models), selector
+
+
+def test_refresh_keeps_models_added_by_hand(jobby, changed):
+    path, leaf = changed
+    job = make_job(jobby, 1, "staging", [(["staging"], None)])
+    job.models.update(jobby._build_models(["model.pkg.m150", leaf]))
+
+    jobby.refresh(manifest_path=path, jobs=[job])
+
+    assert "model.pkg.m150" in job.models
+    assert leaf not in job.models
+    assert "model.pkg.m_new" in job.models
@@ -0,0 +1,85 @@
+import json
+
+import networkx
+import pytest
+
+from jobby.runtime import combine_timings, estimate_runtime, read_run_results
+from tests.manifests import make_job
+
+TIMINGS = {"a": 4.0, "b": 2.0, "c": 3.0, "d": 1.0, "e": 5.0, "f": 6.0}
+
+
+@pytest.fixture
+def graph():
+    # a and b feed c, which feeds d. e and f are independent.
+    graph = networkx.DiGraph([("a", "c"), ("b", "c"), ("c", "d")])
+    graph.add_nodes_from(["e", "f"])
+    return graph
+
+
+@pytest.mark.parametrize(
+    "threads, makespan", [(1, 21.0), (2, 11.0), (3, 8.0), (10, 8.0)]
+)
+def test_estimate_on_a_small_dag(graph, threads, makespan):
+    estimate = estimate_runtime(graph, set(TIMINGS), TIMINGS, threads=threads)
+
+    assert estimate.total_time == 21.0
+    assert estimate.critical_path == ["a", "c", "d"]
+    assert estimate.critical_path_time == 8.0
+    assert estimate.makespan == makespan
+    assert estimate.critical_path_time <= estimate.makespan <= estimate.total_time
+    assert estimate.parallelism == 21.0 / makespan
+    assert estimate.max_parallelism == 21.0 / 8.0
+    assert estimate.missing == []
+
+
+def test_missing_timings_default_to_the_mean(graph):
+    graph.add_edge("d", "g")
+    estimate = estimate_runtime(graph, {*TIMINGS, "g"}, TIMINGS, threads=10)
+
+    assert estimate.missing == ["g"]
+    assert estimate.total_time == 21.0 + 3.5
+    assert estimate.critical_path == ["a", "c", "d", "g"]
+    assert estimate.critical_path_time == 11.5
+    assert estimate.makespan == 11.5
+
+    assert estimate_runtime(graph, {"g"}, TIMINGS, default_time=2.0).makespan == 2.0
+    assert estimate_runtime(graph, set(), TIMINGS).makespan == 0.0
+
+
+def test_combined_timings_are_medians():
+    runs = [{"a": 1.0, "b": 2.0}, {"a": 3.0}, {"a": 10.0, "b": 4.0, "c": 7.0}]
+    assert combine_timings(runs) == {"a": 3.0, "b": 3.0, "c": 7.0}
+    assert combine_timings([]) == {}
+
+
+def test_run_results_without_timings_read_as_zero(tmp_path):
+    run_results = {
+        "results": [
+            {"unique_id": "model.pkg.m1", "execution_time": 2.5},
+            {"unique_id": "model.pkg.m2", "execution_time": None},
+            {"unique_id": "model.pkg.m3"},
+        ]
+    }
+    path = tmp_path / "run_results.json"
+    path.write_text(json.dumps(run_results))
+
+    expected = {"model.pkg.m1": 2.5, "model.pkg.m2": 0.0, "model.pkg.m3": 0.0}
+    assert read_run_results(path) == expected
+    assert read_run_results(str(path)) == expected
+    assert read_run_results(path.read_bytes()) == expected
+    assert read_run_results(b"{}") == {}
+
+
+def test_estimate_runtimes_stores_the_estimate_on_jobs(jobby):
+    job = make_job(jobby, 1, "job", [(["m10+"], None)])
+    untimed, *timed = sorted(job.models)
+    timings = {unique_id: 1.0 for unique_id in timed}
+    timings["model.pkg.elsewhere"] = 9.0
+
+    estimates = jobby.estimate_runtimes([job], threads=2, timings=timings)
+
+    assert estimates[1] is job.runtime
+    assert job.timings == {unique_id: 1.0 for unique_id in timed}
+    assert job.runtime.missing == [untimed]
+    assert job.runtime.total_time == len(job.models)
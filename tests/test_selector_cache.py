@@ -0,0 +1,95 @@
+import pytest
+
+from jobby.selector_cache import SelectorCache, selector_key
+from tests.manifests import SELECTORS, make_job
+
+
+@pytest.mark.parametrize("select, exclude", SELECTORS)
+def test_cached_selection_matches_dbt(jobby, select, exclude):
+    expected = jobby._evaluate_selector_strings(select, exclude)
+    assert jobby.get_models_for_selector_strings(select, exclude) == expected
+    assert jobby.get_models_for_selector_strings(select, exclude) == expected
+
+
+def test_hits_and_atom_reuse(jobby):
+    cache = jobby.selector_cache
+    jobby.get_models_for_selector_strings(["m5"], None)
+    jobby.get_models_for_selector_strings(["m5"], None)
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    result = jobby.get_models_for_selector_strings(["m6 m5"], ["m5"])
+    assert result == {"model.pkg.m6"}
+    assert cache.stats.atom_hits == 2
+    assert cache.stats.atom_misses == 2
+
+
+def test_equivalent_selections_share_a_key():
+    assert selector_key(["b a", "a"], None) == selector_key(["a", "b"], [])
+    assert selector_key(None, None) != selector_key([], None)
+
+
+def test_cache_is_cleared_when_the_manifest_changes(jobby):
+    calls = []
+
+    def evaluate(select, exclude):
+        calls.append(select)
+        return {"model.pkg.m1"}
+
+    cache = SelectorCache(evaluate)
+    cache.bind(jobby.manifest, jobby.graph)
+    cache.evaluate(["m1"], None)
+    cache.bind(jobby.manifest, jobby.graph)
+    cache.evaluate(["m1"], None)
+    assert len(calls) == 1
+
+    cache.bind(object(), jobby.graph)
+    cache.evaluate(["m1"], None)
+    assert len(calls) == 2
+
+
+def test_invalidate_drops_selections_using_an_atom(jobby):
+    cache = jobby.selector_cache
+    jobby.get_models_for_selector_strings(["m5", "m6"], None)
+    jobby.get_models_for_selector_strings(["m7"], None)
+
+    assert cache.invalidate(["m5"]) == 1
+    assert set(cache.atoms()) == {"m6", "m7"}
+    misses = cache.stats.misses
+    jobby.get_models_for_selector_strings(["m7"], None)
+    assert cache.stats.misses == misses
+
+
+def test_resolve_jobs_matches_per_job_evaluation(jobby):
+    jobs = [
+        make_job(jobby, job_id, f"job {job_id}", [selection])
+        for job_id, selection in enumerate(SELECTORS)
+    ]
+    jobs.append(make_job(jobby, 100, "repeated", SELECTORS[:3]))
+    expected = {job.job_id: set(job.models) for job in jobs}
+    for job in jobs:
+        job.models = {}
+
+    jobby.selector_cache.clear()
+    stats = jobby.resolve_jobs(jobs)
+
+    assert {job.job_id: set(job.models) for job in jobs} == expected
+    assert stats.selections == len(SELECTORS) + 3
+    assert stats.unique_selections == len(SELECTORS)
+    assert stats.evaluations == stats.unique_atoms
+
+
+def test_forked_workers_resolve_the_same_models(jobby):
+    jobs = [
+        make_job(jobby, job_id, f"job {job_id}", [selection])
+        for job_id, selection in enumerate(SELECTORS)
+    ]
+    expected = {job.job_id: list(job.models) for job in jobs}
+    for job in jobs:
+        job.models = {}
+
+    jobby.selector_cache.clear()
+    jobby.resolve_jobs(jobs, workers=3)
+
+    assert {job.job_id: sorted(job.models) for job in jobs} == {
+        job_id: sorted(models) for job_id, models in expected.items()
+    }
@@ -0,0 +1,135 @@
+import copy
+
+import pytest
+
+from jobby import Jobby
+from jobby.selector_engine import SelectorEngine
+from tests.manifests import SELECTORS, make_manifest, write_manifest
+
+CRITERIA = {
+    "fqn": [
+        "m5",
+        "staging",
+        "pkg",
+        "pkg.staging",
+        "pkg.marts.core",
+        "marts.*",
+        "fqn:*",
+        "fqn:pkg.marts",
+        "fqn:marts.finance",
+        "other",
+        "other.staging.o1",
+        "o1",
+        "missing",
+    ],
+    "tag": ["tag:daily", "tag:hourly", "tag:raw", "tag:missing"],
+    "path": [
+        "path:models/staging",
+        "models/marts",
+        "path:models/marts/core/m90.sql",
+        "path:models/*/core",
+    ],
+    "file": ["m90.sql", "file:m90.sql", "file:schema.yml", "file:o2.sql"],
+    "package": ["package:pkg", "package:other", "package:missing"],
+    "source": [
+        "source:src1",
+        "source:src1.tbl4",
+        "source:pkg.src1.tbl4",
+        "source:*",
+        "source:*.tbl7",
+    ],
+}
+
+OPERATORS = ["{}", "+{}", "{}+", "+{}+", "2+{}", "{}+1", "1+{}+2", "@{}"]
+
+# The exposure method is not supported natively.
+NATIVE_SELECTORS = [
+    (select, exclude)
+    for select, exclude in SELECTORS
+    if not any("exposure:" in atom for atom in select or [])
+]
+
+
+def add_package(manifest):
+    """Add a second package, and nodes dbt selects but does not traverse."""
+    manifest = copy.deepcopy(manifest)
+    template = manifest["nodes"]["model.pkg.m40"]
+    for name, parent in [("o1", "model.pkg.m40"), ("o2", "model.other.o1")]:
+        node = copy.deepcopy(template)
+        node.update(
+            name=name,
+            unique_id=f"model.other.{name}",
+            fqn=["other", "staging", name],
+            package_name="other",
+            path=f"staging/{name}.sql",
+            original_file_path=f"models/staging/{name}.sql",
+            depends_on={"nodes": [parent], "macros": []},
+            tags=["daily"],
+        )
+        manifest["nodes"][node["unique_id"]] = node
+    manifest["nodes"]["model.pkg.m45"]["config"]["enabled"] = False
+    manifest["nodes"]["model.pkg.m60"]["empty"] = True
+    return manifest
+
+
+@pytest.fixture(scope="module")
+def engines(tmp_path_factory):
+    manifest = add_package(make_manifest())
+    path = write_manifest(tmp_path_factory.mktemp("engine") / "manifest.json", manifest)
+    jobby = Jobby(1, "key", manifest_path=path, use_cache=False)
+    return jobby._evaluate_selector_strings, SelectorEngine(jobby.manifest).select
+
+
+def cases(method):
+    return [
+        operator.format(criterion)
+        for criterion in CRITERIA[method]
+        for operator in OPERATORS
+    ]
+
+
+@pytest.mark.parametrize("method", sorted(CRITERIA))
+def test_methods_and_operators_match_dbt(engines, method):
+    dbt, native = engines
+    for criterion in cases(method):
+        assert native([criterion], None) == dbt([criterion], None), criterion
+
+
+@pytest.mark.parametrize(
+    "select, exclude",
+    [
+        (["tag:daily,staging"], None),
+        (["+m150,tag:hourly"], None),
+        (["@m30,m30+"], None),
+        (["source:src1+,marts"], None),
+        (["m5 m6", "+o2"], None),
+        (["+m150"], ["tag:daily"]),
+        (["pkg"], ["+m100", "source:src2+"]),
+        (["m10+"], ["m45+"]),
+        (None, ["staging", "tag:hourly"]),
+        (None, None),
+        ([], None),
+        *NATIVE_SELECTORS,
+    ],
+)
+def test_selections_match_dbt(engines, select, exclude):
+    dbt, native = engines
+    assert native(select, exclude) == dbt(select, exclude)
+
+
+def test_native_jobby_matches_dbt_jobby(manifest_path):
+    native = Jobby(
+        1, "key", manifest_path=manifest_path, use_cache=False, native_selectors=True
+    )
+    dbt = Jobby(1, "key", manifest_path=manifest_path, use_cache=False)
+    for select, exclude in NATIVE_SELECTORS:
+        assert native.get_models_for_selector_strings(
+            select, exclude
+        ) == dbt.get_models_for_selector_strings(select, exclude)
+
+
+@pytest.mark.parametrize("criterion", ["exposure:dashboard", "@m5+", "source:a.b.c.d"])
+def test_unsupported_selectors_raise(engines, criterion):
+    _, native = engines
+    with pytest.raises(Exception):
+        native([criterion], None)
@@ -0,0 +1,147 @@
+import random
+import threading
+
+import networkx
+import pytest
+
+from jobby.selector_generator import SelectorFailure
+from tests.manifests import SELECTORS, make_job
+
+
+def baseline_foundation(manifest, selected_graph):
+    """The per-selection foundation classification before it was precomputed."""
+    foundation = {}
+    for unique_id in selected_graph.nodes:
+        dependencies = manifest.nodes[unique_id].depends_on_nodes
+        foundation[unique_id] = len(dependencies) > 0 and all(
+            dependency.split(".")[0] == "source" for dependency in dependencies
+        )
+
+    for node in networkx.topological_sort(selected_graph):
+        if foundation[node]:
+            continue
+        dependencies = manifest.get_node(node).depends_on_nodes
+        foundation[node] = len(dependencies) > 0 and all(
+            dependency in selected_graph.nodes and foundation[dependency]
+            for dependency in dependencies
+        )
+
+    return {node for node, value in foundation.items() if value}
+
+
+def baseline_selector(generator, job):
+    """The body of _create_new_selector before LongestPathDecomposition."""
+    manifest = generator.manifest
+    node_set = set.union(
+        *[generator.evaluate(select, exclude) for select, exclude in job.selectors]
+    )
+    selected_graph = generator.digraph.subgraph(node_set).copy()
+
+    sections = set()
+    foundation_nodes = baseline_foundation(manifest, selected_graph)
+    removed = set()
+    for component in networkx.connected_components(
+        networkx.to_undirected(selected_graph.subgraph(foundation_nodes))
+    ):
+        if len(component) <= 1:
+            continue
+        component_subgraph = selected_graph.subgraph(component)
+        removed.update(component)
+        sections.update(
+            f"+{manifest.get_model_name(leaf)}"
+            for leaf in component_subgraph
+            if component_subgraph.out_degree(leaf) == 0
+        )
+    selected_graph.remove_nodes_from(removed)
+
+    while len(selected_graph.nodes) > 0:
+        if len(selected_graph.nodes) <= 2:
+            sections.update(manifest.get_model_name(n) for n in selected_graph)
+            break
+        branch = networkx.dag_longest_path(selected_graph)
+        if len(branch) < 3:
+            sections.update(manifest.get_model_name(node) for node in branch)
+        else:
+            start = manifest.get_model_name(branch[0])
+            end = manifest.get_model_name(branch[-1])
+            sections.add(f"{start}+,+{end}")
+        selected_graph.remove_nodes_from(branch)
+
+    return sections
+
+
+def random_selections(jobby, count, seed=1):
+    generator = random.Random(seed)
+    models = sorted(jobby.manifest.nodes)
+    return [
+        set(generator.sample(models, generator.randint(1, 120))) for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("select, exclude", SELECTORS)
+def test_foundation_matches_baseline(jobby, select, exclude):
+    generator = jobby.selector_generator
+    selected = jobby.get_models_for_selector_strings(select, exclude)
+    selected_graph = generator.digraph.subgraph(selected).copy()
+
+    assert generator.identify_foundation_nodes(selected) == baseline_foundation(
+        jobby.manifest, selected_graph
+    )
+
+
+def test_foundation_of_arbitrary_selections_matches_baseline(jobby):
+    generator = jobby.selector_generator
+    for selected in random_selections(jobby, 30):
+        selected = {node for node in selected if node in generator.digraph}
+        selected_graph = generator.digraph.subgraph(selected).copy()
+        assert generator.identify_foundation_nodes(selected) == baseline_foundation(
+            jobby.manifest, selected_graph
+        )
+
+
+@pytest.mark.parametrize("select, exclude", SELECTORS)
+def test_new_selector_matches_baseline(jobby, select, exclude):
+    job = make_job(jobby, 1, "job", [(select, exclude)])
+    if len(job.models) == 0:
+        pytest.skip("Nothing is selected")
+
+    [(sections, _)] = jobby.selector_generator._create_new_selector(job)
+
+    assert set(sections) == baseline_selector(jobby.selector_generator, job)
+
+
+def test_foundation_is_recomputed_after_clear(jobby):
+    generator = jobby.selector_generator
+    first = generator.foundation
+    assert generator.foundation is first
+    generator.clear_foundation()
+    assert generator.foundation is not first
+    assert generator.foundation == first
+
+
+class UnpicklableError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.lock = threading.Lock()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_jobs_do_not_stop_the_batch(jobby, monkeypatch, workers):
+    jobs = [
+        make_job(jobby, 1, "good", [(["m10+"], None)]),
+        make_job(jobby, 2, "bad", [(["+m150"], None)]),
+    ]
+    generate_selector = jobby.generate_selector
+
+    def fail_for_bad(job, **kwargs):
+        if job.name == "bad":
+            raise UnpicklableError("cannot select")
+        return generate_selector(job, **kwargs)
+
+    monkeypatch.setattr(jobby, "generate_selector", fail_for_bad)
+    results = jobby.generate_selectors(jobs, optimize=False, workers=workers)
+
+    assert set(results[1].models) == set(jobs[0].models)
+    assert results[2] == SelectorFailure(
+        job_id=2, error_type="UnpicklableError", message="cannot select"
+    )
@@ -0,0 +1,118 @@
+import copy
+
+import pytest
+
+from jobby.types.job import Job
+from tests.manifests import write_manifest
+
+
+def build_job(jobby, job_id, name, select):
+    job = Job(job_id, name, [f"dbt build (job {job_id})"], selectors=[(select, None)])
+    job.models = jobby._build_models(
+        jobby.get_models_for_selector_strings(select, None)
+    )
+    return job
+
+
+@pytest.fixture
+def jobs(jobby):
+    return [
+        build_job(jobby, 1, "upstream", ["+m150"]),
+        build_job(jobby, 2, "downstream", ["m150+"]),
+        build_job(jobby, 3, "daily", ["tag:daily,marts"]),
+    ]
+
+
+def test_materialize_ignores_later_changes_to_the_jobs(jobby, jobs):
+    expected = {job.job_id: set(job.models) for job in jobs}
+    session = jobby.simulate(jobs)
+
+    for job in jobs:
+        job.models.clear()
+        job.steps.append("dbt run")
+        job.selectors[0][0].append("m1")
+        job.name = "changed"
+
+    materialized = session.materialize()
+    assert {job_id: set(job.models) for job_id, job in materialized.items()} == (
+        expected
+    )
+    assert materialized[1].name == "upstream"
+    assert materialized[1].steps == ["dbt build (job 1)"]
+    assert materialized[1].selectors == [(["+m150"], None)]
+
+
+def test_materialize_generates_selectors_for_changed_jobs(jobby, jobs):
+    session = jobby.simulate(jobs)
+    session.transfer_models(["model.pkg.m150"], 1, 2)
+
+    for optimize in [False, True]:
+        materialized = session.materialize(optimize=optimize)
+        assert 3 not in session.changed_job_ids
+        for job_id in session.changed_job_ids:
+            job = materialized[job_id]
+            assert set(job.models) == session.models(job_id)
+            assert jobby.get_models_for_selector_strings(*job.selectors[0]) >= set(
+                job.models
+            )
+
+
+def test_undo_redo_and_branch(jobby, jobs):
+    session = jobby.simulate(jobs)
+    before = {job_id: session.models(job_id) for job_id in session.job_ids}
+
+    session.remove_job(3)
+    branch = session.branch()
+    session.undo()
+    assert {job_id: session.models(job_id) for job_id in session.job_ids} == before
+    assert session.changed_job_ids == set()
+    assert 3 not in branch.job_ids
+
+    session.redo()
+    assert 3 not in session.job_ids
+    assert not session.redo()
+
+
+def test_operations_match_jobby(jobby, jobs):
+    session = jobby.simulate(jobs)
+    moved = {"model.pkg.m150"}
+    session.transfer_models(moved, 1, 2)
+    session.distribute_job(2, [3])
+
+    source, target, other = copy.deepcopy(jobs)
+    jobby.transfer_models(moved, source, target)
+    targets, remaining = jobby.distribute_job(target, [other])
+
+    assert session.models(1) == set(source.models)
+    assert session.models(3) == set(targets[3].models)
+    if remaining is None:
+        assert 2 not in session.job_ids
+    else:
+        assert session.models(2) == set(remaining.models)
+
+
+def test_only_manifest_nodes_can_be_added(jobby, jobs):
+    session = jobby.simulate(jobs)
+    with pytest.raises(Exception, match="not models"):
+        session.add_models(1, ["source.pkg.src1.tbl4"])
+    with pytest.raises(Exception, match="not models"):
+        session.transfer_models(["exposure.pkg.dashboard"], 1, 2)
+    assert session.history == []
+
+
+def test_models_removed_by_a_refresh_are_left_out(jobby, jobs, manifest, tmp_path):
+    leaf = next(
+        unique_id
+        for unique_id in sorted(jobs[1].models)
+        if len(jobby.reachability.children(unique_id)) == 0
+    )
+    session = jobby.simulate(jobs)
+    session.add_models(3, [leaf])
+
+    manifest = copy.deepcopy(manifest)
+    del manifest["nodes"][leaf]
+    jobby.refresh(manifest_path=write_manifest(tmp_path / "new.json", manifest))
+
+    materialized = session.materialize()
+    assert set(materialized[2].models) == set(jobs[1].models) - {leaf}
+    assert leaf not in materialized[3].models
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from jobby import Jobby
+from jobby.selector_generator import SelectionMismatchException
+from tests.manifests import SELECTORS, make_job, make_manifest, write_manifest
+
+
+def generated_atoms(seed=1, count=40):
+    """Atoms of the forms SelectorGenerator produces, plus dbt name matches."""
+    generator = random.Random(seed)
+    names = [f"m{i}" for i in range(200)]
+    atoms = ["staging", "marts", "pkg", "snap1", "dashboard", "+dashboard", "tbl1"]
+    for _ in range(count):
+        name = generator.choice(names)
+        atoms += [name, f"+{name}", f"{name}+,+{generator.choice(names)}"]
+    atoms += ["m16+,+m150", "m0+,+m199", "+m199", "missing", "+missing"]
+    return atoms
+
+
+@pytest.fixture(params=["enabled", "disabled"])
+def verified(request, tmp_path):
+    manifest = make_manifest()
+    if request.param == "disabled":
+        # Nodes dbt selects but does not traverse through.
+        manifest["nodes"]["model.pkg.m45"]["config"]["enabled"] = False
+        manifest["nodes"]["model.pkg.m60"]["empty"] = True
+    path = write_manifest(tmp_path / "manifest.json", manifest)
+    return Jobby(1, "key", manifest_path=path, use_cache=False)
+
+
+def test_atoms_match_dbt(verified):
+    verifier = verified.selector_generator.verifier
+    for atom in generated_atoms():
+        assert verified.manifest.node_index.decode(
+            verifier.atom(atom)
+        ) == verified._evaluate_selector_strings([atom], None), atom
+
+
+@pytest.mark.parametrize(
+    "select, exclude",
+    [
+        (["m5 +m60", "m16+,+m150"], None),
+        (["+m199"], ["+m120", "m30"]),
+        (["staging", "+m100"], ["marts"]),
+        (["tag:daily", "+m50"], None),
+        (["+m150"], ["tag:hourly"]),
+        (None, ["+m100"]),
+    ],
+)
+def test_selections_match_dbt(verified, select, exclude):
+    verifier = verified.selector_generator.verifier
+    assert verifier.evaluate(select, exclude) == verified._evaluate_selector_strings(
+        select, exclude
+    )
+
+
+def test_verify_reports_differences_and_culprits(jobby):
+    verifier = jobby.selector_generator.verifier
+    upstream = jobby._evaluate_selector_strings(["+m150"], None)
+    extra = jobby._evaluate_selector_strings(["m7"], None)
+    expected = (upstream - {"model.pkg.m16"}) | {"model.pkg.m199"}
+
+    added, removed, culprits = verifier.verify(
+        [(["+m150", "m7"], []), (["tag:daily"], ["+m150"])], expected
+    )
+
+    dbt_selected = jobby._evaluate_selector_strings(
+        ["+m150", "m7"], None
+    ) | jobby._evaluate_selector_strings(["tag:daily"], ["+m150"])
+    assert added == dbt_selected - expected
+    assert removed == expected - dbt_selected
+    assert culprits["+m150"] == {"model.pkg.m16"}
+    assert culprits["m7"] == extra - expected
+    assert culprits["tag:daily"] == added - upstream - extra
+
+
+def dbt_selection(jobby, selection):
+    return set.union(
+        *[
+            jobby._evaluate_selector_strings(select, exclude)
+            for select, exclude in selection
+        ]
+    )
+
+
+@pytest.mark.parametrize("select, exclude", SELECTORS)
+def test_generated_selectors_are_verified_as_dbt_would(jobby, select, exclude):
+    job = make_job(jobby, 1, "job", [(select, exclude)])
+    if len(job.models) == 0:
+        pytest.skip("Nothing is selected")
+
+    try:
+        new_job = jobby.generate_selector(job, optimize=True, cross_check=True)
+    except SelectionMismatchException as mismatch:
+        selected = dbt_selection(
+            jobby, jobby.selector_generator._create_new_selector(job)
+        )
+        assert mismatch.added == selected - set(job.models)
+        assert mismatch.removed == set(job.models) - selected
+        assert len(mismatch.difference) > 0
+    else:
+        assert dbt_selection(jobby, new_job.selectors) == set(job.models)